@@ -1,6 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, ClassRoom, Subject, Teacher, Student
+from django.shortcuts import render, redirect
+from django.urls import path
+from django.utils import timezone
+from .models import (
+    User, ClassRoom, Subject, Teacher, Student, Fee, GradingScale, Notice, OutboundEmail, ReportCardBatch,
+    TeacherUnavailability, Timetable,
+)
+from .forms import StudentImportForm
+from .importers import ImportFormatError, import_students, read_rows
+from . import fees, timetabling
 
 # Register the custom User model with Django's UserAdmin
 admin.site.register(User, UserAdmin)
@@ -8,5 +17,153 @@ admin.site.register(User, UserAdmin)
 # Register other models with default admin
 admin.site.register(ClassRoom)
 admin.site.register(Subject)
-admin.site.register(Teacher)
-admin.site.register(Student)
+
+
+class TeacherUnavailabilityInline(admin.TabularInline):
+    model = TeacherUnavailability
+    extra = 0
+
+
+@admin.register(Teacher)
+class TeacherAdmin(admin.ModelAdmin):
+    """Teachers with the periods they cannot be timetabled in."""
+    inlines = [TeacherUnavailabilityInline]
+    actions = ['repair_timetable']
+
+    @admin.action(description="Re-plan the timetable lessons of selected teachers")
+    def repair_timetable(self, request, queryset):
+        created = deleted = 0
+        problems = []
+        for teacher_id in queryset.values_list('pk', flat=True):
+            plan = timetabling.repair_teacher(teacher_id)
+            added, removed = timetabling.write(plan)
+            created, deleted = created + added, deleted + removed
+            problems += plan.problems()
+        self.message_user(request, f"{created} lesson(s) added, {deleted} removed.")
+        for problem in problems:
+            self.message_user(request, problem, messages.WARNING)
+
+
+@admin.register(Timetable)
+class TimetableAdmin(admin.ModelAdmin):
+    list_display = ('classroom', 'day_of_week', 'period_time', 'subject', 'teacher')
+    list_filter = ('day_of_week', 'classroom', 'teacher')
+    list_select_related = ('classroom', 'subject', 'teacher')
+
+
+@admin.register(Student)
+class StudentAdmin(admin.ModelAdmin):
+    """Student admin with a bulk roster upload next to the usual changelist."""
+    change_list_template = 'admin/school/student/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='school_student_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:school_student_changelist')
+
+        result = None
+        if request.method == 'POST':
+            form = StudentImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                try:
+                    result = import_students(read_rows(upload, upload.name), dry_run=form.cleaned_data['dry_run'])
+                except ImportFormatError as exc:
+                    form.add_error('file', str(exc))
+                else:
+                    verb = "Validated" if result.dry_run else "Imported"
+                    level = messages.SUCCESS if result.ok else messages.WARNING
+                    self.message_user(
+                        request,
+                        f"{verb} {result.created} of {result.rows} rows; {len(result.errors)} rejected.",
+                        level,
+                    )
+        else:
+            form = StudentImportForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import students',
+            'form': form,
+            'result': result,
+        }
+        return render(request, 'admin/school/student/import_form.html', context)
+
+
+@admin.register(Fee)
+class FeeAdmin(admin.ModelAdmin):
+    """Fees by term and status; bulk billing lives on the site's Fees page."""
+    list_display = ('student', 'term', 'amount', 'status', 'date')
+    list_filter = ('status', 'term')
+    list_select_related = ('student',)
+    raw_id_fields = ('student',)
+    search_fields = ('student__name', 'term')
+    actions = ['mark_paid']
+
+    @admin.action(description="Mark selected fees as paid")
+    def mark_paid(self, request, queryset):
+        updated = fees.mark_paid(queryset.values_list('pk', flat=True))
+        self.message_user(request, f"{updated} fee(s) marked as paid.")
+
+
+@admin.register(GradingScale)
+class GradingScaleAdmin(admin.ModelAdmin):
+    """Saving or deleting a scale recomputes the letters of every grade it governs."""
+    list_display = ('name', 'subject', 'bands')
+    list_select_related = ('subject',)
+
+
+@admin.register(Notice)
+class NoticeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'posted_by', 'date_posted')
+    search_fields = ('title', 'content')
+    list_select_related = ('posted_by',)
+    exclude = ('posted_by',)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.posted_by = request.user
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Outbox view; filter on DEAD to find messages that need manual follow-up."""
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['retry']
+
+    @admin.action(description="Retry selected messages now")
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status='SENT').update(status='PENDING', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} message(s) queued for another attempt.")
+
+
+@admin.register(ReportCardBatch)
+class ReportCardBatchAdmin(admin.ModelAdmin):
+    """Report-card runs and their progress; queue new ones on the site's Report Cards page."""
+    list_display = ('term', 'classroom', 'status', 'progress', 'rendered', 'unchanged', 'failed', 'created_at', 'finished_at')
+    list_filter = ('status', 'term')
+    list_select_related = ('classroom',)
+    readonly_fields = ('status', 'total', 'rendered', 'unchanged', 'failed', 'last_error', 'requested_by',
+                       'created_at', 'finished_at')
+    actions = ['requeue']
+
+    @admin.display(description="Progress")
+    def progress(self, batch):
+        return f"{batch.done}/{batch.total} ({batch.percent}%)"
+
+    @admin.action(description="Queue selected batches again")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='RUNNING').update(
+            status='PENDING', total=0, rendered=0, unchanged=0, failed=0, last_error='', finished_at=None,
+        )
+        self.message_user(request, f"{updated} batch(es) queued again.")
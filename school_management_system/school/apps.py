@@ -15,3 +15,6 @@ class SchoolConfig(AppConfig):
             Group.objects.get_or_create(name='Student')
 
         post_migrate.connect(create_user_groups, sender=self)
+
+        # Register signal receivers
+        from . import counters, fragments, grading, live, photos, rollups, scope, search  # noqa: F401
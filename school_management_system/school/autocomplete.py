@@ -0,0 +1,103 @@
+"""
+Autocomplete for foreign-key fields on large tables.
+
+A plain ``ModelChoiceField`` renders every row of its queryset as an
+``<option>``: every student, user or classroom in the school, on every
+GET of the form. ``AutocompleteSelect`` renders only the selected option
+and names an endpoint (``school:autocomplete``) that the page script in
+base.html queries as the user types. The endpoint matches prefixes
+through the full-text indexes (see school/search.py) and returns one
+page of options, limited to what the requesting teacher may see.
+
+Validating a submission is unchanged: the field looks up the one
+submitted id in its queryset. ``scope_fields`` narrows those querysets to
+the teacher's scope with the same filters the endpoint uses, so an id
+the endpoint would not offer is also rejected on submit.
+"""
+from django import forms
+from django.urls import reverse
+
+from . import search
+
+PAGE_SIZE = 20
+
+
+class Source:
+    """What one autocomplete endpoint searches, who may use it and how it is scoped for teachers."""
+    def __init__(self, kind, roles, ordering, scoped=None, related=(), label=str):
+        self.kind = kind  # The search index (school/search.py) the endpoint matches against
+        self.model = search.INDEXES[kind].model
+        self.roles = roles
+        self.ordering = ordering
+        self.scoped = scoped  # (queryset, TeacherScope) -> queryset; None: teachers see nothing
+        self.related = related
+        self.label = label
+
+    def queryset(self, scope=None, queryset=None):
+        queryset = (self.model.objects.all() if queryset is None else queryset).select_related(*self.related)
+        if scope is not None:
+            queryset = self.scoped(queryset, scope) if self.scoped else queryset.none()
+        return queryset
+
+    def options(self, q='', scope=None):
+        """One page of (id, label) pairs in name order, and whether more match."""
+        queryset = self.queryset(scope).order_by(*self.ordering)
+        if q.strip():
+            queryset = queryset.filter(search.match(self.kind, q))
+        rows = list(queryset[:PAGE_SIZE + 1])
+        return [(obj.pk, self.label(obj)) for obj in rows[:PAGE_SIZE]], len(rows) > PAGE_SIZE
+
+
+SOURCES = {
+    'student': Source(
+        'student', ['ADMIN', 'TEACHER'], ('name', 'id'),
+        scoped=lambda queryset, scope: queryset.filter(classroom_id__in=scope.classroom_ids),
+        related=('classroom',),
+        label=lambda student: f"{student.name} ({student.classroom})",
+    ),
+    'classroom': Source(
+        'classroom', ['ADMIN', 'TEACHER'], ('name', 'section', 'id'),
+        scoped=lambda queryset, scope: queryset.filter(pk__in=scope.classroom_ids),
+    ),
+    'subject': Source(
+        'subject', ['ADMIN', 'TEACHER'], ('name', 'id'),
+        scoped=lambda queryset, scope: queryset.filter(pk__in=scope.subject_ids),
+    ),
+    'user': Source('user', ['ADMIN'], ('username', 'id')),
+}
+
+
+class AutocompleteSelect(forms.Select):
+    """A ``<select>`` holding only its selected option; the rest are fetched from the ``kind`` endpoint."""
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('school:autocomplete', args=[self.kind])
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        # Only the selected rows are loaded (one query by primary key), never the whole queryset.
+        selected = [str(v) for v in value if v not in ('', None)]
+        empty_label = self.choices.field.empty_label
+        options = [] if empty_label is None else [('', empty_label)]
+        if selected:
+            source = SOURCES[self.kind]
+            queryset = source.queryset(queryset=self.choices.queryset).filter(pk__in=selected)
+            options += [(obj.pk, source.label(obj)) for obj in queryset]
+        return [
+            (None, [self.create_option(name, pk, label, str(pk) in selected, index, attrs=attrs)], index)
+            for index, (pk, label) in enumerate(options)
+        ]
+
+
+def scope_fields(form, scope):
+    """Narrows every autocomplete field of ``form`` to the teacher's scope; a no-op for other roles."""
+    if scope is None:
+        return form
+    for field in form.fields.values():
+        if isinstance(field.widget, AutocompleteSelect):
+            field.queryset = SOURCES[field.widget.kind].queryset(scope, field.queryset)
+    return form
@@ -0,0 +1,157 @@
+"""
+Per-view benchmarks with query budgets.
+
+Every list, detail and dashboard view is requested through the test
+client as each role that can use it, against whatever data is in the
+database (normally a school from ``seed_school``). Each case has a query
+budget, which must hold regardless of data size, and a latency baseline
+in milliseconds; ``run`` returns one result dict per case and
+``violations`` lists the cases that broke either. The ``benchmark_views``
+command writes the results as JSON so runs can be compared.
+"""
+import statistics
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from .models import ClassRoom, Student, Subject, Teacher, User
+from .scope import TeacherScope
+
+
+class Case:
+    """One view requested as one role."""
+    def __init__(self, role, url_name, query_budget, baseline_ms, args=None, params=None):
+        self.role = role
+        self.url_name = url_name
+        self.query_budget = query_budget
+        self.baseline_ms = baseline_ms
+        self.args = args  # name of a fixture id from ``fixtures()``, or None
+        self.params = params or {}
+
+    @property
+    def name(self):
+        suffix = '?' + '&'.join(f'{key}={value}' for key, value in self.params.items()) if self.params else ''
+        return f'{self.role}:{self.url_name}{suffix}'
+
+
+CASES = [
+    # Baselines are for the default seed_school size on a developer machine.
+    Case('ADMIN', 'school:home', 5, 200),
+    Case('ADMIN', 'school:admin_dashboard', 5, 100),
+    Case('ADMIN', 'school:admin_dashboard_data', 5, 100),
+    Case('ADMIN', 'school:user_list', 5, 100),
+    Case('ADMIN', 'school:classroom_list', 5, 100),
+    Case('ADMIN', 'school:classroom_detail', 7, 100, args='classroom'),
+    Case('ADMIN', 'school:classroom_gradebook', 6, 150, args='classroom'),
+    Case('ADMIN', 'school:subject_list', 7, 100),
+    Case('ADMIN', 'school:subject_detail', 7, 100, args='subject'),
+    Case('ADMIN', 'school:teacher_list', 6, 100),
+    Case('ADMIN', 'school:teacher_detail', 7, 100, args='teacher'),
+    Case('ADMIN', 'school:student_list', 6, 100),
+    Case('ADMIN', 'school:student_list', 6, 100, params={'q': 'ab'}),
+    Case('ADMIN', 'school:student_detail', 5, 100, args='student'),
+    Case('ADMIN', 'school:attendance_list', 5, 100),
+    Case('ADMIN', 'school:attendance_report', 7, 150),
+    Case('ADMIN', 'school:grade_list', 5, 100),
+    Case('ADMIN', 'school:gradebook', 5, 500),
+    Case('ADMIN', 'school:classroom_timetable', 4, 50, args='classroom'),
+    Case('ADMIN', 'school:fee_list', 5, 100),
+    Case('ADMIN', 'school:fee_list', 6, 100, params={'status': 'Unpaid'}),
+    Case('ADMIN', 'school:fee_balances', 5, 150),
+    Case('TEACHER', 'school:teacher_dashboard', 4, 100),
+    Case('TEACHER', 'school:classroom_list', 5, 100),
+    Case('TEACHER', 'school:classroom_detail', 7, 100, args='teacher_classroom'),
+    Case('TEACHER', 'school:classroom_gradebook', 6, 150, args='teacher_classroom'),
+    Case('TEACHER', 'school:student_list', 6, 100),
+    Case('TEACHER', 'school:attendance_list', 5, 100),
+    Case('TEACHER', 'school:attendance_report', 7, 150),
+    Case('TEACHER', 'school:grade_list', 5, 100),
+    Case('TEACHER', 'school:my_timetable', 4, 50),
+    Case('STUDENT', 'school:student_dashboard', 4, 100),
+    Case('STUDENT', 'school:student_detail', 5, 100, args='own_student'),
+    Case('STUDENT', 'school:notice_list', 4, 50),
+    Case('STUDENT', 'school:notice_feed', 2, 20),
+]
+
+
+def fixtures():
+    """Picks one user per role and the ids the detail views are requested with."""
+    teacher = Teacher.objects.select_related('user').filter(subjects__classrooms__isnull=False).order_by('pk').first()
+    student = Student.objects.select_related('user').order_by('pk').first()
+    admin = User.objects.filter(role='ADMIN').order_by('pk').first()
+    if not (teacher and student and admin):
+        raise ValueError("Benchmarks need an admin, a teacher with a classroom and a student; run seed_school first.")
+    scope = TeacherScope.for_user(teacher.user)
+    return {
+        'users': {'ADMIN': admin, 'TEACHER': teacher.user, 'STUDENT': student.user},
+        'ids': {
+            'classroom': ClassRoom.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'subject': Subject.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'teacher': teacher.pk,
+            'student': student.pk,
+            'teacher_classroom': min(scope.classroom_ids),
+            'own_student': student.pk,
+        },
+    }
+
+
+def run(cases=CASES, repeat=5):
+    """Requests every case ``repeat`` times after one warm-up request and returns the measurements."""
+    context = fixtures()
+    clients = {}
+    results = []
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for case in cases:
+            client = clients.get(case.role)
+            if client is None:
+                client = clients[case.role] = Client(raise_request_exception=False)
+                client.force_login(context['users'][case.role])
+            args = [context['ids'][case.args]] if case.args else []
+            url = reverse(case.url_name, args=args)
+
+            client.get(url, case.params)  # Warm caches so timings reflect the steady state
+            timings, queries, status = [], 0, None
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(url, case.params)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries, status = len(captured.captured_queries), response.status_code
+            results.append({
+                'case': case.name,
+                'role': case.role,
+                'view': case.url_name,
+                'status': status,
+                'queries': queries,
+                'query_budget': case.query_budget,
+                'p50_ms': round(statistics.median(timings), 2),
+                'max_ms': round(max(timings), 2),
+                'baseline_ms': case.baseline_ms,
+            })
+    return results
+
+
+def violations(results, latency_tolerance=1.0, check_latency=True):
+    """Human-readable problems: failed requests, exceeded query budgets and (optionally) slow views."""
+    problems = []
+    for result in results:
+        if result['status'] != 200:
+            problems.append(f"{result['case']}: HTTP {result['status']}")
+        if result['queries'] > result['query_budget']:
+            problems.append(f"{result['case']}: {result['queries']} queries (budget {result['query_budget']})")
+        if check_latency and result['p50_ms'] > result['baseline_ms'] * latency_tolerance:
+            problems.append(f"{result['case']}: p50 {result['p50_ms']} ms (baseline {result['baseline_ms']} ms)")
+    return problems
+
+
+def compare(previous, results):
+    """Pairs each case with its result from an earlier run: (case, old p50, new p50, old queries, new queries)."""
+    earlier = {result['case']: result for result in previous}
+    return [
+        (result['case'], earlier[result['case']]['p50_ms'], result['p50_ms'],
+         earlier[result['case']]['queries'], result['queries'])
+        for result in results if result['case'] in earlier
+    ]
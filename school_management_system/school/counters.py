@@ -0,0 +1,80 @@
+"""
+Materialized dashboard counters.
+
+Each tracked model has a row in ``Counter`` that is bumped by
+``post_save``/``post_delete`` receivers, and the whole set is cached as one
+dict so a dashboard request reads it with at most one query. Bulk writes
+skip signals, so anything that uses ``bulk_create`` should call ``adjust``
+itself; the ``reconcile_counters`` command repairs any remaining drift.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import replicas
+from .models import Counter, User, Teacher, Student, ClassRoom, Subject
+
+CACHE_KEY = 'school:counters'
+CACHE_TIMEOUT = 300  # Bounds staleness when workers do not share a cache backend
+
+TRACKED_MODELS = {
+    'teachers': Teacher,
+    'students': Student,
+    'classrooms': ClassRoom,
+    'subjects': Subject,
+    'users': User,
+}
+_NAMES_BY_MODEL = {model: name for name, model in TRACKED_MODELS.items()}
+
+
+def get_counts():
+    """Returns a dict of counter name -> value, from the cache when possible."""
+    counts = cache.get(CACHE_KEY)
+    if counts is None:
+        with replicas.primary():  # One small read; a replica's could predate the last invalidation
+            counts = dict(Counter.objects.filter(name__in=TRACKED_MODELS).values_list('name', 'value'))
+        if counts.keys() != TRACKED_MODELS.keys():
+            counts = reconcile()
+        cache.set(CACHE_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+def adjust(name, delta):
+    """Atomically moves counter ``name`` by ``delta`` and invalidates the cached set."""
+    updated = Counter.objects.filter(name=name).update(value=F('value') + delta, updated_at=timezone.now())
+    if not updated:
+        # First write since the table was created: seed it with a real count.
+        Counter.objects.update_or_create(
+            name=name, defaults={'value': TRACKED_MODELS[name].objects.count()}
+        )
+    # Drop the cached set now for this request, and again after commit in case
+    # another worker re-read the old values while the transaction was open.
+    cache.delete(CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def reconcile():
+    """Recomputes every counter from the real tables and returns the fresh values."""
+    counts = {name: model.objects.count() for name, model in TRACKED_MODELS.items()}
+    with transaction.atomic():
+        for name, value in counts.items():
+            Counter.objects.update_or_create(name=name, defaults={'value': value})
+    cache.set(CACHE_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+@receiver(post_save)
+def count_created(sender, instance, created, **kwargs):
+    name = _NAMES_BY_MODEL.get(sender)
+    if name and created:
+        adjust(name, 1)
+
+
+@receiver(post_delete)
+def count_deleted(sender, instance, **kwargs):
+    name = _NAMES_BY_MODEL.get(sender)
+    if name:
+        adjust(name, -1)
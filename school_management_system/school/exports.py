@@ -0,0 +1,152 @@
+"""
+Constant-memory CSV/JSONL exports.
+
+Each dataset is a ``values_list`` over an indexed ordering read with
+``.iterator(chunk_size=...)``, so rows are pulled from the database cursor
+a chunk at a time and encoded straight into the response (or a file)
+without ever building model instances or holding the full result. Output
+can optionally be gzip-compressed on the fly.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Attendance, Grade, Student
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Dataset:
+    """An exportable table: the columns to read and how to filter it."""
+    def __init__(self, model, columns, ordering, classroom_lookup, date_field=None):
+        self.model = model
+        self.columns = columns  # (header, values_list path) pairs
+        self.ordering = ordering
+        self.classroom_lookup = classroom_lookup
+        self.date_field = date_field
+
+    @property
+    def header(self):
+        return [header for header, _ in self.columns]
+
+    def queryset(self, scope=None, classroom=None, date_from=None, date_to=None, using=None):
+        queryset = self.model.objects.using(using)
+        if scope:
+            queryset = queryset.filter(**{f'{self.classroom_lookup}__in': scope.classroom_ids})
+        if classroom:
+            queryset = queryset.filter(**{self.classroom_lookup: classroom})
+        if self.date_field and date_from:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': date_from})
+        if self.date_field and date_to:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': date_to})
+        return queryset.order_by(*self.ordering).values_list(*(path for _, path in self.columns))
+
+
+DATASETS = {
+    'attendance': Dataset(
+        Attendance,
+        columns=[
+            ('student_id', 'student_id'),
+            ('student', 'student__name'),
+            ('classroom', 'student__classroom__name'),
+            ('section', 'student__classroom__section'),
+            ('date', 'date'),
+            ('status', 'status'),
+        ],
+        ordering=('date', 'id'),
+        classroom_lookup='student__classroom_id',
+        date_field='date',
+    ),
+    'grades': Dataset(
+        Grade,
+        columns=[
+            ('student_id', 'student_id'),
+            ('student', 'student__name'),
+            ('classroom', 'student__classroom__name'),
+            ('section', 'student__classroom__section'),
+            ('subject_code', 'subject__code'),
+            ('subject', 'subject__name'),
+            ('marks', 'marks'),
+            ('grade', 'grade'),
+        ],
+        ordering=('id',),
+        classroom_lookup='student__classroom_id',
+    ),
+    'roster': Dataset(
+        Student,
+        columns=[
+            ('student_id', 'id'),
+            ('name', 'name'),
+            ('age', 'age'),
+            ('gender', 'gender'),
+            ('classroom', 'classroom__name'),
+            ('section', 'classroom__section'),
+            ('parent_contact', 'parent_contact'),
+        ],
+        ordering=('id',),
+        classroom_lookup='classroom_id',
+    ),
+}
+
+
+class _LineBuffer:
+    """File-like sink for csv.writer that hands back what was written."""
+    def write(self, value):
+        return value
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(header, rows, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(header)
+    for batch in _batched(rows, chunk_size):
+        yield ''.join(writer.writerow(row) for row in batch)
+
+
+def iter_jsonl(header, rows, chunk_size=CHUNK_SIZE):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for batch in _batched(rows, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(header, row))) + '\n' for row in batch)
+
+
+def iter_gzip(chunks):
+    """Gzip-compresses an iterable of text chunks as it is consumed."""
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(dataset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE, **filters):
+    """
+    Returns an iterator of encoded chunks for ``dataset`` (a key of DATASETS).
+    ``filters`` are passed to Dataset.queryset (scope, classroom, date_from, date_to, using).
+    """
+    spec = DATASETS[dataset]
+    rows = spec.queryset(**filters).iterator(chunk_size=chunk_size)
+    encode = iter_csv if fmt == 'csv' else iter_jsonl
+    chunks = encode(spec.header, rows, chunk_size)
+    if compress:
+        return iter_gzip(chunks)
+    return (chunk.encode() for chunk in chunks)
+
+
+def export_filename(dataset, fmt, compress, day):
+    return f"{dataset}-{day.isoformat()}.{fmt}{'.gz' if compress else ''}"
@@ -0,0 +1,131 @@
+"""
+Fee billing and balances.
+
+A term is billed with one ``bulk_create``: every student of the selected
+classrooms who has no fee for that term yet gets one unpaid row, so
+billing a term twice adds nothing (a partial unique constraint on
+(student, term) holds even against concurrent runs).
+
+Balances are sums over ``Fee`` rows computed by the database, one
+aggregate query per figure: a student's balance reads only that
+student's rows through the (student, status) index; per-classroom and
+school-wide figures group or filter all fees and are cached under the
+data versions of fees, students and classrooms (see school/fragments.py),
+so they are recomputed only after a change. Code that bulk-writes fees calls
+``fragments.bump('fee')`` itself, as the functions here do.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+
+from . import fragments
+from .models import Fee, Student
+
+SUMS = {
+    'billed': Sum('amount'),
+    'paid': Sum('amount', filter=Q(status='Paid')),
+    'outstanding': Sum('amount', filter=Q(status='Unpaid')),
+}
+DEPENDS = ('fee', 'student', 'classroom')
+ZERO = Decimal('0.00')
+
+
+def _money(value):
+    """Sums as Decimals with two places; NULL (no fees) is zero."""
+    return (value or ZERO).quantize(ZERO)
+
+
+def _amounts(row):
+    return {key: _money(value) if key in SUMS else value for key, value in row.items()}
+
+
+def _cached(name, build):
+    version = '.'.join(map(str, fragments.versions(DEPENDS)))
+    return cache.get_or_set(f'school:fees:{name}:{version}', build, fragments.fragment_timeout())
+
+
+# --- Billing ---
+def bill_term(term, amount, classroom_ids):
+    """Bills ``amount`` for ``term`` to every student of the classrooms not yet billed for it; returns the rows inserted."""
+    if not term:
+        raise ValueError("A term is required; blank terms are for one-off fees.")
+    # term <> '' repeats the partial constraint's condition so SQLite probes its index.
+    already_billed = Fee.objects.filter(student=OuterRef('pk'), term=term).exclude(term='')
+    with transaction.atomic():
+        # The students are locked, so a concurrent run over them waits for this one to commit, and the
+        # counts before and after the insert differ by this run's rows only. SQLite has no row locks, but a
+        # transaction that has read cannot write over a later commit, so the counts hold there too.
+        student_ids = (
+            Student.objects.select_for_update()
+            .filter(classroom_id__in=classroom_ids)
+            .filter(~Exists(already_billed))
+            .order_by()
+            .values_list('pk', flat=True)
+        )
+        fees = [Fee(student_id=pk, amount=amount, status='Unpaid', term=term) for pk in student_ids.iterator()]
+        if not fees:
+            return 0
+        billed = Fee.objects.filter(term=term, student__classroom_id__in=classroom_ids)
+        before = billed.count()
+        Fee.objects.bulk_create(fees, ignore_conflicts=True)
+        inserted = billed.count() - before
+    if inserted:
+        fragments.bump('fee')
+    return inserted
+
+
+def mark_paid(fee_ids):
+    """Marks the unpaid fees among ``fee_ids`` as paid; returns how many changed."""
+    updated = Fee.objects.filter(pk__in=fee_ids, status='Unpaid').update(status='Paid')
+    if updated:
+        fragments.bump('fee')
+    return updated
+
+
+def terms():
+    """Every billed term, most recent first."""
+    return _cached('terms', lambda: list(
+        Fee.objects.exclude(term='').order_by('-term').values_list('term', flat=True).distinct()
+    ))
+
+
+# --- Balances ---
+def student_balance(student_id):
+    """{'billed', 'paid', 'outstanding'} for one student."""
+    return _amounts(Fee.objects.filter(student_id=student_id).aggregate(**SUMS))
+
+
+def student_balances(classroom_id):
+    """Balances of every student in a classroom who has fees, largest outstanding first."""
+    rows = (
+        Fee.objects.filter(student__classroom_id=classroom_id)
+        .values('student_id', 'student__name')
+        .annotate(**SUMS)
+        .order_by('-outstanding', 'student__name')
+    )
+    return [_amounts(row) for row in rows]
+
+
+def classroom_balances():
+    """Balances per classroom with the number of students owing, in classroom order."""
+    def build():
+        rows = (
+            Fee.objects.values('student__classroom_id', 'student__classroom__name', 'student__classroom__section')
+            .annotate(**SUMS, owing=Count('student', distinct=True, filter=Q(status='Unpaid')))
+            .order_by('student__classroom__name', 'student__classroom__section')
+        )
+        return [_amounts(row) for row in rows]
+    return _cached('classrooms', build)
+
+
+def school_outstanding():
+    """School-wide unpaid total with the number of unpaid fees and of students owing."""
+    def build():
+        totals = Fee.objects.filter(status='Unpaid').aggregate(
+            outstanding=Sum('amount'), fees=Count('id'), students=Count('student', distinct=True),
+        )
+        totals['outstanding'] = _money(totals['outstanding'])
+        return totals
+    return _cached('school', build)
@@ -1,8 +1,13 @@
+from decimal import Decimal
+
 from django import forms
+from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm, ReadOnlyPasswordHashField
 
-from .models import Grade, Attendance, Student, Teacher, Subject, ClassRoom, User
+from .models import Grade, Attendance, Fee, Notice, ReportCardBatch, Student, Teacher, Subject, ClassRoom, User
+from . import fragments, grading, rollups
+from .autocomplete import AutocompleteSelect
 
 User = get_user_model()
 
@@ -36,20 +41,200 @@ class CustomUserChangeForm(forms.ModelForm):
 class GradeForm(forms.ModelForm):
     class Meta:
         model = Grade
-        fields = ['student', 'subject', 'marks', 'grade']
+        fields = ['student', 'subject', 'marks']  # The letter comes from the grading scale
+        widgets = {
+            'student': AutocompleteSelect('student'),
+            'subject': AutocompleteSelect('subject'),
+        }
 
 class AttendanceForm(forms.ModelForm):
     class Meta:
         model = Attendance
         fields = ['student', 'date', 'status']
         widgets = {
+            'student': AutocompleteSelect('student'),
             'date': forms.DateInput(attrs={'type': 'date'}),
         }
 
+class RollCallForm(forms.Form):
+    """
+    Attendance for a whole classroom on one date.
+    Adds one status field per student on the roster and saves them all
+    with a single insert-or-update on the (student, date) unique key.
+    """
+    date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, *args, students=(), existing=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.students = list(students)
+        existing = existing or {}
+        for student in self.students:
+            self.fields[self.field_name(student)] = forms.ChoiceField(
+                label=student.name,
+                choices=Attendance.STATUS_CHOICES,
+                initial=existing.get(student.pk, 'Present'),
+                widget=forms.RadioSelect,
+            )
+
+    @staticmethod
+    def field_name(student):
+        return f'status_{student.pk}'
+
+    def rows(self):
+        """Yields (student, bound status field) pairs for the template."""
+        for student in self.students:
+            yield student, self[self.field_name(student)]
+
+    def save(self):
+        """Upserts every status in one statement and returns the number of rows written."""
+        date = self.cleaned_data['date']
+        records = [
+            Attendance(student=student, date=date, status=self.cleaned_data[self.field_name(student)])
+            for student in self.students
+        ]
+        with transaction.atomic():
+            Attendance.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'date'],
+                update_fields=['status'],
+            )
+            # Bulk upserts skip post_save, so the rollups and cached tables are refreshed here.
+            rollups.refresh((student.pk, date) for student in self.students)
+            fragments.bump('attendance')
+        return len(records)
+
+class GradeSheetForm(forms.Form):
+    """
+    Marks for a whole classroom in one subject.
+    Adds one marks field per student on the roster; rows left blank are
+    skipped, and the rest are saved with a single insert-or-update on the
+    (student, subject) unique key.
+    """
+    def __init__(self, *args, students=(), subject=None, existing=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.students = list(students)
+        self.subject = subject
+        existing = existing or {}
+        for student in self.students:
+            self.fields[self.field_name(student)] = forms.FloatField(
+                label=student.name,
+                required=False,
+                min_value=0,
+                max_value=100,
+                initial=existing.get(student.pk),
+                widget=forms.NumberInput(attrs={'step': 'any', 'class': 'form-control form-control-sm'}),
+            )
+
+    @staticmethod
+    def field_name(student):
+        return f'marks_{student.pk}'
+
+    def rows(self):
+        """Yields (student, bound marks field) pairs for the template."""
+        for student in self.students:
+            yield student, self[self.field_name(student)]
+
+    def save(self):
+        """Upserts every entered mark in one statement and returns the number of rows written."""
+        entered = [
+            (student, self.cleaned_data[self.field_name(student)])
+            for student in self.students
+            if self.cleaned_data[self.field_name(student)] is not None
+        ]
+        if not entered:
+            return 0
+        # Bulk upserts skip pre_save, so the letters are derived here, all at once.
+        letters = grading.letters_for([self.subject.pk] * len(entered), [marks for _, marks in entered])
+        records = [
+            Grade(student=student, subject=self.subject, marks=marks, grade=letter)
+            for (student, marks), letter in zip(entered, letters)
+        ]
+        with transaction.atomic():
+            Grade.objects.bulk_create(
+                records,
+                update_conflicts=True,
+                unique_fields=['student', 'subject'],
+                update_fields=['marks', 'grade'],
+            )
+            fragments.bump('grade')
+        return len(records)
+
 class StudentForm(forms.ModelForm):
     class Meta:
         model = Student
         fields = '__all__'  # Use 'exclude = [...]' if you want to omit any fields
+        widgets = {
+            'user': AutocompleteSelect('user'),
+            'classroom': AutocompleteSelect('classroom'),
+        }
+
+class StudentImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with columns: username, name, age, gender, classroom, section "
+                                     "(optional: email, address, parent_contact).")
+    dry_run = forms.BooleanField(required=False, initial=True, help_text="Validate only; nothing is saved.")
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    classroom = forms.IntegerField(required=False, min_value=1)
+    gzip = forms.BooleanField(required=False)
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'csv'
+
+class AttendanceReportForm(forms.Form):
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    classroom = forms.ModelChoiceField(queryset=ClassRoom.objects.all(), required=False)
+    threshold = forms.FloatField(required=False, min_value=0, max_value=100, initial=75,
+                                 help_text="List students whose attendance rate (%) is below this.")
+
+    def __init__(self, *args, classrooms=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if classrooms is not None:
+            self.fields['classroom'].queryset = classrooms
+
+    def clean(self):
+        cleaned_data = super().clean()
+        default_from, default_to = rollups.default_period()
+        cleaned_data['date_from'] = cleaned_data.get('date_from') or default_from
+        cleaned_data['date_to'] = cleaned_data.get('date_to') or default_to
+        if cleaned_data.get('threshold') is None:
+            cleaned_data['threshold'] = 75
+        if cleaned_data['date_from'] > cleaned_data['date_to']:
+            raise forms.ValidationError("The start date must not be after the end date.")
+        return cleaned_data
+
+class TermBillingForm(forms.Form):
+    term = forms.CharField(max_length=Fee._meta.get_field('term').max_length, help_text="For example 2025-T1.")
+    amount = forms.DecimalField(max_digits=8, decimal_places=2, min_value=Decimal('0.01'))
+    classrooms = forms.ModelMultipleChoiceField(queryset=ClassRoom.objects.all(), widget=forms.CheckboxSelectMultiple)
+
+    def clean_term(self):
+        return self.cleaned_data['term'].strip()
+
+class ReportCardBatchForm(forms.ModelForm):
+    class Meta:
+        model = ReportCardBatch
+        fields = ['term', 'date_from', 'date_to', 'classroom']
+        widgets = {
+            'date_from': forms.DateInput(attrs={'type': 'date'}),
+            'date_to': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("The start date must not be after the end date.")
+        return cleaned_data
+
+class NoticeForm(forms.ModelForm):
+    class Meta:
+        model = Notice
+        fields = ['title', 'content']
 
 class TeacherForm(forms.ModelForm):
     class Meta:
@@ -62,7 +247,7 @@ class TeacherForm(forms.ModelForm):
 class SubjectForm(forms.ModelForm):
     class Meta:
         model = Subject
-        fields = ['name', 'code']
+        fields = ['name', 'code', 'weekly_periods']
 
 class ClassRoomForm(forms.ModelForm):
     class Meta:
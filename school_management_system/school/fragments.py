@@ -0,0 +1,123 @@
+"""
+Version-keyed fragment caching for the list tables.
+
+Each model that cached pages display has a data-version counter in the
+cache; any save or delete bumps it, and bulk writers call ``bump``
+themselves. A table's cache key combines the versions of every model it
+shows with the viewer's scope (all data for admins, the classroom set for
+a teacher) and the request's filter, search, sort and cursor parameters.
+A write therefore invalidates every cached page of every affected table
+in O(1), and viewers with different scopes never share a fragment.
+
+Templates wrap the table body in ``{% cache fragment_timeout <name> fragment_key %}``;
+because ``KeysetPage`` loads its rows lazily, a hit costs no page query.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import replicas
+from .models import (
+    Attendance, ClassRoom, Fee, Grade, GradingScale, Notice, Student, Subject, Teacher, Timetable, User,
+)
+from .scope import get_teacher_scope
+
+VERSION_KEY = 'school:data-version:{}'
+
+VERSIONED_MODELS = {
+    Student: 'student',
+    Attendance: 'attendance',
+    Grade: 'grade',
+    ClassRoom: 'classroom',
+    Subject: 'subject',
+    Teacher: 'teacher',
+    Timetable: 'timetable',
+    Fee: 'fee',
+    Notice: 'notice',
+    User: 'user',
+    GradingScale: 'grading_scale',
+}
+
+# The models whose data each cached table shows (names are displayed through foreign keys).
+TABLES = {
+    'student_list': ('student', 'classroom'),
+    'attendance_list': ('attendance', 'student', 'classroom'),
+    'grade_list': ('grade', 'student', 'subject'),
+    'fee_list': ('fee', 'student', 'classroom'),
+}
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60)
+
+
+def versions(names):
+    """The current version of each name; missing versions are seeded from the clock so they never repeat."""
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        found[key] = cache.get_or_set(key, time.time_ns, None)
+    replicas.avoid_stale(names)  # Don't cache replica rows under a version they may predate
+    return [found[VERSION_KEY.format(name)] for name in names]
+
+
+def _bump_now(names):
+    for name in names:
+        key = VERSION_KEY.format(name)
+        if not cache.add(key, time.time_ns(), None):
+            try:
+                cache.incr(key)
+            except ValueError:  # Evicted between add and incr
+                cache.add(key, time.time_ns(), None)
+    replicas.mark_written(names)
+
+
+def bump(*names):
+    """Moves each named model to a new version, invalidating every fragment that shows it."""
+    # Bump now so this request sees its own write, and again after commit in case
+    # another worker cached the old rows under the new version meanwhile.
+    _bump_now(names)
+    transaction.on_commit(lambda: _bump_now(names))
+
+
+def bump_all():
+    bump(*VERSIONED_MODELS.values())
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def viewer_scope(request):
+    """'all' for admins, the teacher's classroom set for teachers, the role otherwise."""
+    scope = get_teacher_scope(request)
+    if scope is not None:
+        return 'teacher:' + _digest(','.join(map(str, sorted(scope.classroom_ids))))
+    role = (getattr(request.user, 'role', None) or '').upper()
+    return 'all' if role == 'ADMIN' else role.lower() or 'anonymous'
+
+
+def table_key(request, table):
+    """The cache key for ``table`` as rendered for this viewer with these query parameters."""
+    data = '.'.join(map(str, versions(TABLES[table])))
+    params = _digest('&'.join(f'{key}={value}' for key, values in sorted(request.GET.lists()) for value in values))
+    return f'{table}:{data}:{viewer_scope(request)}:{params}'
+
+
+def context(request, table):
+    """Template context for a cached table."""
+    return {'fragment_key': table_key(request, table), 'fragment_timeout': fragment_timeout()}
+
+
+# --- Invalidation ---
+@receiver(post_save)
+@receiver(post_delete)
+def data_changed(sender, **kwargs):
+    name = VERSIONED_MODELS.get(sender)
+    if name:
+        bump(name)
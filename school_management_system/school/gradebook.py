@@ -0,0 +1,127 @@
+"""
+Student × subject gradebook pivot.
+
+All marks for the requested classrooms are read with a single
+``values_list`` query and scattered into a NumPy matrix (NaN where a
+student has no grade for a subject). Per-subject statistics and the
+per-student average and rank are then computed column- or row-wise on the
+whole matrix at once, so the Python-level work is independent of the
+number of cells.
+"""
+import numpy as np
+
+from .models import Grade
+
+PERCENTILES = (25, 75, 90)
+STAT_LABELS = {
+    'count': 'Count', 'mean': 'Mean', 'median': 'Median', 'std': 'Std. dev.', 'min': 'Min', 'max': 'Max',
+    **{f'p{q}': f'{q}th pct.' for q in PERCENTILES},
+}
+
+
+class Gradebook:
+    """A marks matrix with its row (student) and column (subject) labels."""
+    def __init__(self, student_ids, student_names, subject_ids, subject_labels, marks):
+        self.student_ids = student_ids
+        self.student_names = student_names
+        self.subject_ids = subject_ids
+        self.subject_labels = subject_labels
+        self.marks = marks  # float matrix, shape (students, subjects), NaN = no grade
+
+    @classmethod
+    def for_classrooms(cls, classroom_ids=None):
+        """Builds the pivot for the given classroom ids (all classrooms when None)."""
+        grades = Grade.objects.all()
+        if classroom_ids is not None:
+            grades = grades.filter(student__classroom_id__in=classroom_ids)
+        return cls.from_rows(grades.values_list('student_id', 'student__name', 'subject_id', 'subject__code', 'marks'))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds the pivot from (student id, student name, subject id, subject code, marks) rows."""
+        rows = list(rows)
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), [], np.empty(0, dtype=np.int64), [], np.empty((0, 0)))
+
+        student_col, name_col, subject_col, code_col, marks_col = zip(*rows)
+        student_ids, first_student, student_index = np.unique(
+            np.array(student_col, dtype=np.int64), return_index=True, return_inverse=True
+        )
+        subject_ids, first_subject, subject_index = np.unique(
+            np.array(subject_col, dtype=np.int64), return_index=True, return_inverse=True
+        )
+        marks = np.full((len(student_ids), len(subject_ids)), np.nan)
+        marks[student_index, subject_index] = np.array(marks_col, dtype=np.float64)
+
+        # Rows and columns come out ordered by id; present them by name and code.
+        student_names = np.array(name_col, dtype=object)[first_student]
+        subject_labels = np.array(code_col, dtype=object)[first_subject]
+        row_order = np.argsort(student_names, kind='stable')
+        column_order = np.argsort(subject_labels, kind='stable')
+        return cls(
+            student_ids[row_order],
+            student_names[row_order].tolist(),
+            subject_ids[column_order],
+            subject_labels[column_order].tolist(),
+            marks[np.ix_(row_order, column_order)],
+        )
+
+    @property
+    def shape(self):
+        return self.marks.shape
+
+    def subject_stats(self):
+        """Per-subject count, mean, median, standard deviation and percentiles, as arrays."""
+        if not self.marks.size:
+            return {}
+        stats = {
+            'count': np.count_nonzero(~np.isnan(self.marks), axis=0),
+            'mean': np.nanmean(self.marks, axis=0),
+            'median': np.nanmedian(self.marks, axis=0),
+            'std': np.nanstd(self.marks, axis=0),
+            'min': np.nanmin(self.marks, axis=0),
+            'max': np.nanmax(self.marks, axis=0),
+        }
+        for q, values in zip(PERCENTILES, np.nanpercentile(self.marks, PERCENTILES, axis=0)):
+            stats[f'p{q}'] = values
+        return stats
+
+    def student_averages(self):
+        return np.nanmean(self.marks, axis=1) if self.marks.size else np.empty(0)
+
+    def student_ranks(self):
+        """Competition ranks by average (1 = best; equal averages share a rank)."""
+        averages = self.student_averages()
+        ordered = np.sort(averages)
+        return len(averages) - np.searchsorted(ordered, averages, side='right') + 1
+
+    def to_dict(self):
+        stats = self.subject_stats()
+        averages = self.student_averages()
+        ranks = self.student_ranks()
+        marks = np.round(self.marks, 2).astype(object)
+        marks[np.isnan(self.marks)] = None
+        return {
+            'subjects': [
+                {'id': int(subject_id), 'code': code, **{name: _number(values[i]) for name, values in stats.items()}}
+                for i, (subject_id, code) in enumerate(zip(self.subject_ids, self.subject_labels))
+            ],
+            'students': [
+                {
+                    'id': int(student_id),
+                    'name': name,
+                    'marks': row,
+                    'average': _number(average),
+                    'rank': int(rank),
+                }
+                for student_id, name, row, average, rank
+                in zip(self.student_ids, self.student_names, marks.tolist(), averages, ranks)
+            ],
+        }
+
+
+def _number(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    value = float(value)
+    return None if np.isnan(value) else round(value, 2)
@@ -0,0 +1,150 @@
+"""
+Letter grades from marks.
+
+A ``GradingScale`` lists the lowest marks for each letter, for one subject
+or for the whole school; a grade uses its subject's scale, else the
+school's, else ``DEFAULT_BANDS``. Every saved ``Grade`` gets its letter
+from its marks (a ``pre_save`` receiver), so letters cannot drift.
+
+Scales are cached as sorted NumPy arrays under the scale data version
+(see school/fragments.py), and a letter is ``numpy.searchsorted`` over the
+band floors, for one mark or a whole array. When a scale changes, every
+grade it governs is recomputed after commit: marks are read in id chunks,
+mapped to letters as arrays, and only rows whose letter changed are
+written back, one ``UPDATE ... WHERE id IN (...)`` per new letter.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import fragments
+from .models import Grade, GradingScale
+
+DEFAULT_BANDS = [(90, 'A'), (80, 'B'), (70, 'C'), (60, 'D'), (0, 'F')]
+CHUNK_SIZE = 2000
+
+
+class Bands:
+    """A scale as ascending band floors and their letters."""
+    def __init__(self, bands):
+        bands = sorted(bands)
+        self.floors = np.array([floor for floor, _ in bands], dtype=np.float64)
+        self.letters = np.array([letter for _, letter in bands], dtype=object)
+
+    def letters_for(self, marks):
+        # side='right' puts a mark equal to a floor into that floor's band; marks under the lowest floor get its letter.
+        index = np.searchsorted(self.floors, np.asarray(marks, dtype=np.float64), side='right') - 1
+        return self.letters[np.maximum(index, 0)]
+
+
+def validate_bands(bands):
+    """Returns ``bands`` as [[floor, letter], ...] from the highest floor down; raises ValueError when invalid."""
+    try:
+        bands = [(float(floor), str(letter).strip()) for floor, letter in bands]
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Bands must be a list of [lowest marks, letter] pairs.') from exc
+    if not bands:
+        raise ValueError('A scale needs at least one band.')
+    if any(not letter or len(letter) > Grade._meta.get_field('grade').max_length for _, letter in bands):
+        raise ValueError('Letters must be one or two characters.')
+    floors = [floor for floor, _ in bands]
+    if len(set(floors)) != len(floors):
+        raise ValueError('Each band needs a different lowest mark.')
+    if min(floors) > 0:
+        raise ValueError('The lowest band must start at 0 so every mark gets a letter.')
+    return [[int(floor) if floor.is_integer() else floor, letter] for floor, letter in sorted(bands, reverse=True)]
+
+
+def scales():
+    """{subject id, or None for the school: Bands}, cached until a scale changes."""
+    version = fragments.versions(['grading_scale'])[0]
+    key = f'school:grading-scales:{version}'
+    found = cache.get(key)
+    if found is None:
+        found = {subject_id: Bands(bands) for subject_id, bands in GradingScale.objects.values_list('subject_id', 'bands')}
+        found.setdefault(None, Bands(DEFAULT_BANDS))
+        cache.set(key, found, fragments.fragment_timeout())
+    return found
+
+
+def bands_for(subject_id, found=None):
+    found = found or scales()
+    return found.get(subject_id) or found[None]
+
+
+def letter_for(subject_id, marks):
+    return bands_for(subject_id).letters_for([marks])[0]
+
+
+def letters_for(subject_ids, marks):
+    """The letter for each (subject id, marks) pair, as an array; one searchsorted per distinct subject."""
+    subject_ids = np.asarray(subject_ids, dtype=np.int64)
+    marks = np.asarray(marks, dtype=np.float64)
+    found = scales()
+    letters = np.empty(len(marks), dtype=object)
+    subjects, inverse = np.unique(subject_ids, return_inverse=True)
+    for i, subject_id in enumerate(subjects):
+        rows = inverse == i
+        letters[rows] = bands_for(int(subject_id), found).letters_for(marks[rows])
+    return letters
+
+
+# --- Recompute ---
+def recompute(grades=None, chunk_size=CHUNK_SIZE):
+    """Rederives the letter of every grade in the queryset ``grades`` (all grades when None); returns the changed count."""
+    grades = (Grade.objects.all() if grades is None else grades).order_by('id')
+    changed, last_id = 0, 0
+    while True:
+        rows = list(grades.filter(id__gt=last_id).values_list('id', 'subject_id', 'marks', 'grade')[:chunk_size])
+        if not rows:
+            break
+        ids, subject_ids, marks, current = zip(*rows)
+        letters = letters_for(subject_ids, marks)
+        stale = letters != np.array(current, dtype=object)
+        # One UPDATE per new letter: bulk_update's CASE over every id costs more than the search itself.
+        ids = np.asarray(ids)
+        for letter in np.unique(letters[stale]):
+            Grade.objects.filter(id__in=ids[stale & (letters == letter)].tolist()).update(grade=letter)
+        changed += int(stale.sum())
+        if len(rows) < chunk_size:
+            break
+        last_id = ids[-1]
+    if changed:
+        fragments.bump('grade')
+    return changed
+
+
+def governed_by(subject_id):
+    """The grades whose letters come from the scale of ``subject_id`` (None: the school scale)."""
+    if subject_id is None:
+        return Grade.objects.filter(subject__grading_scale__isnull=True)
+    return Grade.objects.filter(subject_id=subject_id)
+
+
+# --- Receivers ---
+@receiver(pre_save, sender=Grade)
+def derive_letter(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.grade = letter_for(instance.subject_id, instance.marks)
+
+
+@receiver(post_init, sender=GradingScale)
+def remember_subject(sender, instance, **kwargs):
+    instance._grading_subject = instance.__dict__.get('subject_id')
+
+
+@receiver(post_save, sender=GradingScale)
+@receiver(post_delete, sender=GradingScale)
+def scale_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # A moved scale stops governing its old subject; a deleted subject scale hands its grades to the school scale.
+    subjects = {instance.subject_id, getattr(instance, '_grading_subject', instance.subject_id)}
+    instance._grading_subject = instance.subject_id
+
+    def run():
+        for subject_id in subjects:
+            recompute(governed_by(subject_id))
+    transaction.on_commit(run)
@@ -0,0 +1,258 @@
+"""
+Streaming bulk import of students from CSV or XLSX.
+
+Rows are read lazily and handled in fixed-size chunks: each chunk is
+validated as a whole (one query to find usernames that are already taken),
+classroom names are resolved from a map loaded once up front, and the
+``User`` and ``Student`` rows are written with ``bulk_create``. Bulk
+inserts do not send ``post_save``, so per-row receivers stay out of the
+loop; dashboard counters, the search index and cached list tables are
+updated once per chunk and teacher scopes are invalidated once per run
+instead.
+
+Imported accounts get an unusable password and ``force_password_change``;
+hashing a real password per row would dominate the import time.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import counters, fragments, search
+from .models import ClassRoom, Student, User
+from .scope import invalidate_scopes
+
+REQUIRED_COLUMNS = ('username', 'name', 'age', 'gender', 'classroom', 'section')
+OPTIONAL_COLUMNS = ('email', 'address', 'parent_contact')
+GENDERS = {value for value, _ in Student.GENDER_CHOICES}
+MAX_AGE = 2147483647  # The largest value a PositiveIntegerField holds on every supported backend
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ImportFormatError(Exception):
+    """Raised when the uploaded file cannot be read as a student roster."""
+
+
+class ImportResult:
+    """Summary of an import run, including a per-row error report."""
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.errors = []  # (row number, message) pairs; row 1 is the header
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    def write_report(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(['row', 'error'])
+        writer.writerows(self.errors)
+
+
+# --- Readers ---
+def _normalize_header(header):
+    return [str(column or '').strip().lower() for column in header]
+
+
+def _check_header(header):
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}.")
+
+
+def read_csv(fileobj):
+    """Yields row dicts from a binary or text CSV stream without loading it into memory."""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    try:
+        header = _normalize_header(next(reader, []))
+        _check_header(header)
+        for values in reader:
+            if any(values):
+                yield dict(zip(header, (value.strip() for value in values)))
+    except UnicodeDecodeError as exc:
+        # Rows are decoded as they are read, so earlier chunks may already be imported.
+        raise ImportFormatError(
+            f"The file is not UTF-8 text (near line {reader.line_num + 1}); save it as CSV UTF-8 and upload it again."
+        ) from exc
+    except csv.Error as exc:
+        raise ImportFormatError(f"Malformed CSV on line {reader.line_num}: {exc}. Upload a UTF-8 CSV file.") from exc
+
+
+def read_xlsx(fileobj):
+    """Yields row dicts from an XLSX workbook using openpyxl's streaming read-only mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFormatError("XLSX import requires the 'openpyxl' package.") from exc
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        _check_header(header)
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield dict(zip(header, ('' if value is None else str(value).strip() for value in values)))
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx(fileobj)
+    if filename.lower().endswith('.csv'):
+        return read_csv(fileobj)
+    raise ImportFormatError("Unsupported file type; upload a .csv or .xlsx file.")
+
+
+# --- Import ---
+def _validate_row(row, classrooms):
+    """Returns (cleaned values, list of errors) for a single row."""
+    errors = []
+    username = row.get('username', '')
+    name = row.get('name', '')
+    if not username:
+        errors.append("username is required")
+    elif len(username) > 150:
+        errors.append("username is longer than 150 characters")
+    if not name:
+        errors.append("name is required")
+    elif len(name) > 100:
+        errors.append("name is longer than 100 characters")
+
+    try:
+        age = int(float(row.get('age', '')))
+        if not 0 <= age <= MAX_AGE:
+            raise ValueError
+    except (ValueError, OverflowError):  # int() of "inf" or "1e999" overflows
+        age = None
+        errors.append(f"invalid age '{row.get('age', '')}'")
+
+    gender = row.get('gender', '').capitalize()
+    if gender not in GENDERS:
+        errors.append(f"invalid gender '{row.get('gender', '')}'")
+
+    classroom_key = (row.get('classroom', ''), row.get('section', '').upper())
+    classroom_id = classrooms.get(classroom_key)
+    if classroom_id is None:
+        errors.append(f"unknown classroom '{classroom_key[0]} - {classroom_key[1]}'")
+
+    email = row.get('email', '')
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append(f"invalid email '{email}'")
+
+    cleaned = {
+        'username': username,
+        'email': email,
+        'name': name,
+        'age': age,
+        'gender': gender,
+        'classroom_id': classroom_id,
+        'address': row.get('address', ''),
+        'parent_contact': row.get('parent_contact', '')[:20],
+    }
+    return cleaned, errors
+
+
+def _import_chunk(chunk, classrooms, seen_usernames, result):
+    valid = []
+    for row_number, row in chunk:
+        cleaned, errors = _validate_row(row, classrooms)
+        if cleaned['username'] in seen_usernames:
+            errors.append(f"duplicate username '{cleaned['username']}' in file")
+        seen_usernames.add(cleaned['username'])
+        if errors:
+            result.add_error(row_number, '; '.join(errors))
+        else:
+            valid.append((row_number, cleaned))
+
+    taken = set(
+        User.objects.filter(username__in=[cleaned['username'] for _, cleaned in valid])
+        .values_list('username', flat=True)
+    )
+    rows = []
+    for row_number, cleaned in valid:
+        if cleaned['username'] in taken:
+            result.add_error(row_number, f"username '{cleaned['username']}' already exists")
+        else:
+            rows.append(cleaned)
+
+    if rows and not result.dry_run:
+        _write_rows(rows)
+    result.created += len(rows)
+
+
+def _write_rows(rows):
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=row['username'],
+                email=row['email'],
+                first_name=row['name'][:150],
+                role='STUDENT',
+                password=make_password(None),
+                force_password_change=True,
+            )
+            for row in rows
+        ])
+        if any(user.pk is None for user in users):
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(User.objects.filter(username__in=[row['username'] for row in rows]).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+        students = Student.objects.bulk_create([
+            Student(
+                user_id=user.pk,
+                name=row['name'],
+                age=row['age'],
+                gender=row['gender'],
+                classroom_id=row['classroom_id'],
+                address=row['address'],
+                parent_contact=row['parent_contact'],
+            )
+            for user, row in zip(users, rows)
+        ])
+        counters.adjust('users', len(rows))
+        counters.adjust('students', len(rows))
+        search.index_objects('user', users)
+        search.index_objects('student', students)
+        fragments.bump('student')
+
+
+def import_students(rows, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Imports students from an iterable of row dicts (see ``read_rows``).
+    Valid rows are written chunk by chunk; invalid rows are skipped and
+    listed in the returned ImportResult. With ``dry_run`` nothing is written.
+    """
+    result = ImportResult(dry_run=dry_run)
+    classrooms = {
+        (name, section.upper()): pk
+        for pk, name, section in ClassRoom.objects.values_list('pk', 'name', 'section')
+    }
+    seen_usernames = set()
+    numbered = enumerate(rows, start=2)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        result.rows += len(chunk)
+        _import_chunk(chunk, classrooms, seen_usernames, result)
+
+    if result.created and not dry_run:
+        invalidate_scopes()
+    return result
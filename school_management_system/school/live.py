@@ -0,0 +1,134 @@
+"""
+Live admin dashboard.
+
+The dashboard shows the counters and the newest users, so its figures
+depend on the data versions (see school/fragments.py) of the counted
+models. A snapshot of the figures is cached under those versions, which
+model signals bump on every change.
+
+``dashboard_events`` streams the snapshot as server-sent events: once on
+connect, then again only when the versions move. A receiver wakes the
+streams of this process as soon as a change commits; streams in other
+processes see the new versions in the shared cache within
+``DASHBOARD_EVENTS_CHECK_SECONDS``. Between events a stream is an idle
+coroutine that sends a comment now and then so proxies keep it open, and
+it ends after ``DASHBOARD_EVENTS_MAX_SECONDS`` so the browser reconnects
+(sending the last version as Last-Event-ID) instead of holding one
+connection forever.
+
+Serve the stream through ASGI (school_management_system/asgi.py). Under
+WSGI the view refuses the stream with a 503, because the response would
+be buffered and never reach the browser. The page falls back to
+conditional polling of ``admin_dashboard_data`` when EventSource is
+unavailable, the stream is refused, or no figures arrive shortly after
+connecting.
+"""
+import asyncio
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import fragments
+from .counters import TRACKED_MODELS, get_counts
+from .models import User
+
+DEPENDS = ('user', 'teacher', 'student', 'classroom', 'subject')
+RECENT_USERS = 5
+
+_streams = set()  # (event loop, asyncio.Event) per open stream in this process
+
+
+def check_seconds():
+    return getattr(settings, 'DASHBOARD_EVENTS_CHECK_SECONDS', 5)
+
+
+def heartbeat_seconds():
+    return getattr(settings, 'DASHBOARD_EVENTS_HEARTBEAT_SECONDS', 20)
+
+
+def max_seconds():
+    return getattr(settings, 'DASHBOARD_EVENTS_MAX_SECONDS', 10 * 60)
+
+
+def version():
+    return '.'.join(map(str, fragments.versions(DEPENDS)))
+
+
+def etag(data_version):
+    return '"{}"'.format(hashlib.blake2b(f'dashboard:{data_version}'.encode(), digest_size=12).hexdigest())
+
+
+def snapshot(data_version=None):
+    """(version, figures) for the admin dashboard, from the cache unless something changed."""
+    data_version = data_version or version()
+    key = f'school:dashboard:{data_version}'
+    data = cache.get(key)
+    if data is None:
+        counts = get_counts()
+        data = {
+            'teachers_count': counts['teachers'],
+            'students_count': counts['students'],
+            'classes_count': counts['classrooms'],
+            'subjects_count': counts['subjects'],
+            'users_count': counts['users'],
+            'recent_users': list(User.objects.order_by('-date_joined').values(
+                'username', 'email', 'date_joined', 'last_login'
+            )[:RECENT_USERS]),
+        }
+        cache.set(key, data, fragments.fragment_timeout())
+    return data_version, data
+
+
+def _event(data_version, data):
+    return f"id: {data_version}\nevent: dashboard\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def dashboard_events(last_event_id=None):
+    """Server-sent events carrying the dashboard figures whenever they change."""
+    loop = asyncio.get_running_loop()
+    stream = (loop, asyncio.Event())
+    _streams.add(stream)
+    try:
+        yield f"retry: {check_seconds() * 1000}\n\n"
+        sent, sent_data = last_event_id, None
+        started = last_write = time.monotonic()
+        while time.monotonic() - started < max_seconds():
+            current = await sync_to_async(version)()
+            if current != sent:
+                current, data = await sync_to_async(snapshot)(current)
+                if data != sent_data:  # Versions also move on edits the dashboard does not show
+                    yield _event(current, data)
+                    last_write = time.monotonic()
+                sent, sent_data = current, data
+            if time.monotonic() - last_write >= heartbeat_seconds():
+                yield ": keep-alive\n\n"
+                last_write = time.monotonic()
+            try:
+                await asyncio.wait_for(stream[1].wait(), check_seconds())
+            except asyncio.TimeoutError:
+                pass
+            stream[1].clear()
+    finally:
+        _streams.discard(stream)
+
+
+def _wake_streams():
+    for loop, event in list(_streams):
+        loop.call_soon_threadsafe(event.set)
+
+
+# --- Change notification ---
+@receiver(post_save)
+@receiver(post_delete)
+def dashboard_changed(sender, **kwargs):
+    # Counters move on create and delete; the recent-user table shows any user change.
+    if sender is User or (sender in TRACKED_MODELS.values() and kwargs.get('created', True)):
+        transaction.on_commit(_wake_streams)
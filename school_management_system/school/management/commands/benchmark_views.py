@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Times every list, detail and dashboard view per role against the current database "
+        "(seed it with seed_school first), checks query budgets and latency baselines, and "
+        "writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Timed requests per view.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="A previous results file to compare against.")
+        parser.add_argument('--latency-tolerance', type=float, default=1.0,
+                            help="Allowed multiple of each latency baseline.")
+        parser.add_argument('--no-latency', action='store_true', help="Only enforce query budgets.")
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmarks.run(repeat=options['repeat'])
+        except ValueError as exc:
+            raise CommandError(exc) from exc
+
+        for result in results:
+            self.stdout.write(
+                f"{result['case']:<55} {result['status']:>4} {result['queries']:>4}/{result['query_budget']:<4} "
+                f"p50 {result['p50_ms']:>8.2f} ms  max {result['max_ms']:>8.2f} ms"
+            )
+        if options['compare']:
+            with open(options['compare']) as handle:
+                previous = json.load(handle)['results']
+            self.stdout.write("\nChanges since the previous run:")
+            for case, old_ms, new_ms, old_queries, new_queries in benchmarks.compare(previous, results):
+                self.stdout.write(f"{case:<55} {old_ms:>8.2f} -> {new_ms:>8.2f} ms  {old_queries} -> {new_queries} queries")
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'repeat': options['repeat'], 'results': results}, handle, indent=2)
+
+        problems = benchmarks.violations(
+            results, options['latency_tolerance'], check_latency=not options['no_latency']
+        )
+        if problems:
+            raise CommandError("Benchmark budgets exceeded:\n" + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} views within budget."))
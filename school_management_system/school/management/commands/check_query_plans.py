@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school import queryplans
+
+
+class Command(BaseCommand):
+    help = (
+        "Explains every query of the benchmarked views against the current database (seed it "
+        "with seed_school first) and fails on full scans or temporary sorts of large tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-sql', action='store_true', help="Print the offending SQL.")
+
+    def handle(self, *args, **options):
+        report = queryplans.check()
+        for name, sql, problem in report:
+            self.stdout.write(f"{name:<55} {problem}")
+            if options['verbose_sql'] and sql:
+                self.stdout.write(f"    {sql}")
+        if report:
+            raise CommandError(f"{len(report)} query plan problems.")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(queryplans.CASES)} views use indexed access paths ({len(queryplans.ALLOWED)} allowed exceptions)."
+        ))
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school.exports import DATASETS, FORMATS, stream_export
+from school.forms import ExportForm
+from school.replicas import choose
+
+
+class Command(BaseCommand):
+    help = "Streams attendance, grades or the student roster to a CSV/JSONL file in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--date-from', help="Earliest date to include (YYYY-MM-DD).")
+        parser.add_argument('--date-to', help="Latest date to include (YYYY-MM-DD).")
+        parser.add_argument('--classroom', type=int, help="Only include this classroom id.")
+        parser.add_argument('--gzip', action='store_true', help="Gzip-compress the output.")
+        parser.add_argument('--output', '-o', help="File to write to; defaults to stdout.")
+        parser.add_argument('--database', help="Database alias to read from; defaults to a replica if any.")
+
+    def handle(self, *args, **options):
+        form = ExportForm({
+            'format': options['format'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'classroom': options['classroom'],
+            'gzip': options['gzip'],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        chunks = stream_export(
+            options['dataset'],
+            fmt=form.cleaned_data['format'],
+            compress=form.cleaned_data['gzip'],
+            classroom=form.cleaned_data['classroom'],
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'],
+            using=options['database'] or choose(),
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.flush()
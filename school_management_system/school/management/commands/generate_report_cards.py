@@ -0,0 +1,60 @@
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school import reportcards
+from school.models import ClassRoom, ReportCardBatch
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders queued report-card batches on a process pool, or queues and renders one batch when "
+        "--term is given. Cards whose contents have not changed are skipped unless --force is given. "
+        "Run it from cron, or with --loop as a long-lived worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', help="Generate this term now instead of working off the queue.")
+        parser.add_argument('--date-from', type=date.fromisoformat, help="First day of the term (YYYY-MM-DD).")
+        parser.add_argument('--date-to', type=date.fromisoformat, help="Last day of the term (YYYY-MM-DD).")
+        parser.add_argument('--classroom', type=int, help="Only this classroom id; defaults to every classroom.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (1 renders in this process).")
+        parser.add_argument('--force', action='store_true', help="Re-render cards that have not changed.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting when it is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        if options['term']:
+            if not (options['date_from'] and options['date_to']):
+                raise CommandError("--term needs --date-from and --date-to.")
+            classroom = None
+            if options['classroom']:
+                classroom = ClassRoom.objects.filter(pk=options['classroom']).first()
+                if classroom is None:
+                    raise CommandError(f"No classroom with id {options['classroom']}.")
+            self._run(ReportCardBatch.objects.create(
+                term=options['term'], date_from=options['date_from'], date_to=options['date_to'],
+                classroom=classroom, status='RUNNING',
+            ), options)
+            return
+
+        while True:
+            batch = reportcards.claim_next()
+            if batch is not None:
+                self._run(batch, options)
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _run(self, batch, options):
+        started = time.monotonic()
+        batch = reportcards.run(batch, workers=max(1, options['workers']), force=options['force'], log=self.stderr.write)
+        summary = (
+            f"{batch}: rendered {batch.rendered}, unchanged {batch.unchanged}, failed {batch.failed} "
+            f"of {batch.total} in {time.monotonic() - started:.1f}s."
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not batch.failed else self.style.WARNING(summary))
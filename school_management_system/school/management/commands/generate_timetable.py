@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from school import timetabling
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a clash-free timetable from classroom subjects, qualified teachers, "
+        "Subject.weekly_periods and teacher unavailability. With --teacher, only re-plans that teacher's lessons."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classroom', type=int, action='append', dest='classrooms',
+                            help="Plan only this classroom id (repeatable); other classrooms are kept.")
+        parser.add_argument('--teacher', type=int, help="Repair the lessons of this teacher id instead of planning from scratch.")
+        parser.add_argument('--dry-run', action='store_true', help="Solve and report without writing anything.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['teacher']:
+            plan = timetabling.repair_teacher(options['teacher'])
+        else:
+            plan = timetabling.generate(options['classrooms'])
+        solved = time.monotonic() - started
+        self.stdout.write(f"Planned {plan.lesson_count} lessons in {len(plan.classroom_ids)} classrooms in {solved:.2f}s.")
+
+        if not options['dry_run']:
+            created, deleted = timetabling.write(plan)
+            self.stdout.write(f"{created} rows created, {deleted} deleted.")
+        problems = plan.problems()
+        for problem in problems:
+            self.stderr.write(problem)
+        summary = f"{len(problems)} subject(s) could not be fully placed." if problems else "Every lesson was placed."
+        self.stdout.write(self.style.WARNING(summary) if problems else self.style.SUCCESS(summary))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school.importers import DEFAULT_CHUNK_SIZE, ImportFormatError, import_students, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-imports students (and their user accounts) from a CSV or XLSX roster."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .xlsx file.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing anything.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows validated and inserted per batch.")
+        parser.add_argument('--report', help="Write the per-row error report as CSV to this path instead of stdout.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = import_students(
+                    read_rows(fileobj, options['path']),
+                    dry_run=options['dry_run'],
+                    chunk_size=options['chunk_size'],
+                )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}") from exc
+        except ImportFormatError as exc:
+            raise CommandError(str(exc)) from exc
+
+        if result.errors:
+            if options['report']:
+                with open(options['report'], 'w', newline='') as report:
+                    result.write_report(report)
+                self.stdout.write(f"Error report written to {options['report']}.")
+            else:
+                result.write_report(self.stdout)
+
+        verb = "Would create" if options['dry_run'] else "Created"
+        elapsed = time.monotonic() - started
+        summary = f"{verb} {result.created} of {result.rows} students in {elapsed:.1f}s; {len(result.errors)} rows rejected."
+        self.stdout.write(self.style.SUCCESS(summary) if result.ok else self.style.WARNING(summary))
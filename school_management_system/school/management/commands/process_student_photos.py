@@ -0,0 +1,26 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from school import photos
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the sized WebP/JPEG variants of existing student photos on a process pool. "
+        "Photos that already have variants are skipped unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (1 processes photos in this process).")
+        parser.add_argument('--force', action='store_true', help="Re-render variants that already exist.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed, failed = photos.backfill(
+            workers=max(1, options['workers']), force=options['force'], log=self.stderr.write,
+        )
+        summary = f"Processed {processed} photos in {time.monotonic() - started:.1f}s; {failed} failed."
+        self.stdout.write(self.style.SUCCESS(summary) if not failed else self.style.WARNING(summary))
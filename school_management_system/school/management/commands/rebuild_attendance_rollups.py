@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from school import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-student monthly and per-classroom daily attendance "
+        "rollups from the raw attendance rows, in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Students or classrooms recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        monthly, daily = rollups.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {monthly} student-month and {daily} classroom-day rollup rows."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from school import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Repopulates the SQLite full-text search tables from the source tables. "
+        "PostgreSQL indexes are maintained by the database and need no rebuild."
+    )
+
+    def handle(self, *args, **options):
+        counts = search.rebuild()
+        if not counts:
+            self.stdout.write("Nothing to rebuild on this database backend.")
+            return
+        for kind, rows in counts.items():
+            self.stdout.write(f"{kind}: {rows} rows indexed")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from school import grading
+
+
+class Command(BaseCommand):
+    help = (
+        "Rederives every grade's letter from its marks and grading scale. Saving a scale does this "
+        "for the grades it governs; run it after bulk changes to marks that bypassed save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=grading.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        changed = grading.recompute(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{changed} letter grades changed."))
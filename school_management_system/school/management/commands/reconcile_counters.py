@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from school import counters
+from school.models import Counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the materialized dashboard counters from the real tables. "
+        "Schedule it periodically (e.g. hourly from cron) to repair drift from bulk writes."
+    )
+
+    def handle(self, *args, **options):
+        before = dict(Counter.objects.values_list('name', 'value'))
+        after = counters.reconcile()
+        for name, value in after.items():
+            drift = value - before.get(name, 0)
+            note = f" (corrected by {drift:+d})" if drift else ""
+            self.stdout.write(f"{name}: {value}{note}")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic synthetic school (classrooms, subjects, teachers, students, "
+        "attendance, grades and fees) with bulk inserts. Every account's password is "
+        f"'{seed.DEFAULT_PASSWORD}'; the admin is '{seed.SEED_ADMIN}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classrooms', type=int, default=12)
+        parser.add_argument('--subjects', type=int, default=10)
+        parser.add_argument('--teachers', type=int, default=20)
+        parser.add_argument('--students-per-classroom', type=int, default=30)
+        parser.add_argument('--subjects-per-classroom', type=int, default=6)
+        parser.add_argument('--years', type=int, default=1, help="Years of daily attendance and termly fees.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same school.")
+
+    def handle(self, *args, **options):
+        try:
+            counts = seed.seed_school(
+                classrooms=options['classrooms'],
+                subjects=options['subjects'],
+                teachers=options['teachers'],
+                students_per_classroom=options['students_per_classroom'],
+                subjects_per_classroom=options['subjects_per_classroom'],
+                years=options['years'],
+                seed=options['seed'],
+                log=self.stdout.write,
+            )
+        except seed.SeedError as exc:
+            raise CommandError(exc) from exc
+        summary = ', '.join(f"{count} {table}" for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
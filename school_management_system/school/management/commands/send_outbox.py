@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from school import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Delivers queued emails from the outbox. Run it from cron, or with --loop "
+        "as a long-lived worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=outbox.DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when the queue is drained.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, dead = outbox.deliver_batch(options['batch_size'], options['max_attempts'])
+            if sent or retried or dead:
+                self.stdout.write(f"sent {sent}, will retry {retried}, dead-lettered {dead}")
+            if sent + retried + dead >= options['batch_size']:
+                continue  # More may be waiting; drain before sleeping.
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,222 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` (school/middleware.py) times every request, counts
+its SQL queries and their database time through ``execute_wrapper`` and
+records the response size, keyed by the resolved URL name. A request that
+runs the same SQL shape ``METRICS_NPLUSONE_THRESHOLD`` times or more is
+logged and counted as a likely N+1.
+
+Each worker aggregates into an in-process ``Registry`` and periodically
+publishes a snapshot to the cache; the ``/metrics`` endpoint sums the
+snapshots of every worker. With a shared cache (REDIS_URL) that covers all
+workers; with local memory it covers the serving process only. Snapshots
+expire a few flush intervals after a worker's last flush, and ``collect``
+forgets workers whose snapshot has expired, so restarted workers do not
+pile up in the worker list.
+"""
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as ShapeCounter
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+WORKERS_KEY = 'school:metrics:workers'
+SNAPSHOT_KEY = 'school:metrics:worker:{}'
+
+
+def nplusone_threshold():
+    return getattr(settings, 'METRICS_NPLUSONE_THRESHOLD', 10)
+
+
+def flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+
+
+def snapshot_timeout():
+    # Long enough to survive a few missed flushes of a quiet worker.
+    return flush_interval() * 12
+
+
+# --- Query collection ---
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+class QueryCollector:
+    """An execute_wrapper that counts queries, sums their time and tallies their SQL shapes."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = ShapeCounter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # Parameters are already placeholders; only IN lists vary in length.
+            self.shapes[_IN_LIST.sub('(%s...)', sql)] += 1
+
+    def repeated_shape(self, threshold):
+        """Returns (sql, times) for the most repeated shape if it reaches ``threshold``, else None."""
+        if not self.shapes:
+            return None
+        sql, times = self.shapes.most_common(1)[0]
+        return (sql, times) if times >= threshold else None
+
+
+# --- Aggregation ---
+def _histogram(buckets):
+    return [0] * (len(buckets) + 1)  # one slot per bucket plus +Inf
+
+
+class Registry:
+    """Per-process totals; snapshots are plain dicts so they can be summed across workers."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.views = {}
+        self.requests = {}
+        self.last_flush = 0.0
+
+    def observe(self, view, method, status, duration, queries, db_time, size, nplusone):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = {
+                    'latency': _histogram(LATENCY_BUCKETS), 'latency_sum': 0.0,
+                    'queries': _histogram(QUERY_BUCKETS), 'queries_sum': 0,
+                    'size': _histogram(SIZE_BUCKETS), 'size_sum': 0,
+                    'db_time': 0.0, 'nplusone': 0,
+                }
+            stats['latency'][bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats['latency_sum'] += duration
+            stats['queries'][bisect_left(QUERY_BUCKETS, queries)] += 1
+            stats['queries_sum'] += queries
+            stats['db_time'] += db_time
+            if size is not None:
+                stats['size'][bisect_left(SIZE_BUCKETS, size)] += 1
+                stats['size_sum'] += size
+            stats['nplusone'] += bool(nplusone)
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'views': {view: {name: list(value) if isinstance(value, list) else value for name, value in stats.items()}
+                          for view, stats in self.views.items()},
+                'requests': dict(self.requests),
+            }
+
+    def flush(self, force=False):
+        """Publishes this worker's snapshot to the cache, at most once per flush interval."""
+        now = time.monotonic()
+        if not force and now - self.last_flush < flush_interval():
+            return
+        self.last_flush = now
+        cache.set(SNAPSHOT_KEY.format(WORKER_ID), self.snapshot(), snapshot_timeout())
+        workers = cache.get(WORKERS_KEY) or []
+        if WORKER_ID not in workers:
+            # Re-checked on every flush, so a registration lost to a concurrent write is restored.
+            cache.set(WORKERS_KEY, workers + [WORKER_ID], None)
+
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+registry = Registry()
+
+
+def merge(snapshots):
+    total = {'views': {}, 'requests': {}}
+    for snapshot in snapshots:
+        for view, stats in snapshot['views'].items():
+            into = total['views'].setdefault(view, None)
+            if into is None:
+                total['views'][view] = {name: list(value) if isinstance(value, list) else value
+                                        for name, value in stats.items()}
+                continue
+            for name, value in stats.items():
+                if isinstance(value, list):
+                    into[name] = [a + b for a, b in zip(into[name], value)]
+                else:
+                    into[name] += value
+        for key, count in snapshot['requests'].items():
+            total['requests'][key] = total['requests'].get(key, 0) + count
+    return total
+
+
+def collect():
+    """The summed snapshot of every worker that has published one (including this one)."""
+    registry.flush(force=True)
+    workers = cache.get(WORKERS_KEY) or [WORKER_ID]
+    snapshots = cache.get_many([SNAPSHOT_KEY.format(worker) for worker in workers])
+    alive = [worker for worker in workers if SNAPSHOT_KEY.format(worker) in snapshots]
+    if len(alive) < len(workers):
+        # Exited workers' snapshots have expired; a live worker dropped here by a race re-registers on its next flush.
+        cache.set(WORKERS_KEY, alive, None)
+    return merge(snapshots.values())
+
+
+# --- Exposition ---
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_histogram(lines, name, help_text, buckets, data):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for view, stats in data:
+        view = _label(view)
+        counts, total = stats[0], stats[1]
+        cumulative = 0
+        for bound, count in zip(buckets, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {cumulative}')
+        lines.append(f'{name}_sum{{view="{view}"}} {total}')
+        lines.append(f'{name}_count{{view="{view}"}} {cumulative}')
+
+
+def render(snapshot):
+    """Formats a merged snapshot in the Prometheus text exposition format."""
+    views = sorted(snapshot['views'].items())
+    lines = [
+        '# HELP school_http_requests_total Requests served, by view, method and status.',
+        '# TYPE school_http_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(snapshot['requests'].items()):
+        lines.append(
+            f'school_http_requests_total{{view="{_label(view)}",method="{_label(method)}",status="{status}"}} {count}'
+        )
+    _render_histogram(lines, 'school_http_request_duration_seconds', 'Request latency by view.',
+                      LATENCY_BUCKETS, [(view, (s['latency'], s['latency_sum'])) for view, s in views])
+    _render_histogram(lines, 'school_db_queries_per_request', 'SQL queries run per request, by view.',
+                      QUERY_BUCKETS, [(view, (s['queries'], s['queries_sum'])) for view, s in views])
+    _render_histogram(lines, 'school_http_response_size_bytes', 'Response body size by view (streamed responses excluded).',
+                      SIZE_BUCKETS, [(view, (s['size'], s['size_sum'])) for view, s in views])
+    lines.append('# HELP school_db_query_seconds_total Time spent in SQL queries, by view.')
+    lines.append('# TYPE school_db_query_seconds_total counter')
+    for view, stats in views:
+        lines.append(f'school_db_query_seconds_total{{view="{_label(view)}"}} {stats["db_time"]}')
+    lines.append('# HELP school_db_nplusone_requests_total Requests that repeated one SQL shape past the N+1 threshold.')
+    lines.append('# TYPE school_db_nplusone_requests_total counter')
+    for view, stats in views:
+        lines.append(f'school_db_nplusone_requests_total{{view="{_label(view)}"}} {stats["nplusone"]}')
+    return '\n'.join(lines) + '\n'
@@ -1,6 +1,12 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from . import metrics, replicas
+
 class ForcePasswordChangeMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -10,3 +16,56 @@ class ForcePasswordChangeMiddleware:
             if request.user.force_password_change and request.path != reverse('school:force_password_change'):
                 return redirect('school:force_password_change')
         return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """
+    Lets views marked ``@reads_from_replica`` read from a replica, and pins a
+    browser to the primary for a few seconds after it writes; see school/replicas.py.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replicas.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = replicas.end(token)
+        if wrote:
+            replicas.pin(response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas.route_view(request, view_func)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL query count and time, response size and likely
+    N+1 query patterns per resolved URL name; see school/metrics.py.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = metrics.QueryCollector()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(collector))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or '<unresolved>'
+        repeated = collector.repeated_shape(metrics.nplusone_threshold())
+        if repeated:
+            metrics.logger.warning("Possible N+1 in %s: query repeated %d times: %s", view, repeated[1], repeated[0])
+        size = None if response.streaming else len(response.content)
+        metrics.registry.observe(
+            view, request.method, response.status_code, duration,
+            collector.count, collector.duration, size, repeated,
+        )
+        metrics.registry.flush()
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("school", "0003_user_force_password_change_alter_user_role"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["date", "id"], name="attendance_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["name", "id"], name="student_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["date_joined", "id"], name="user_date_joined_id_idx"
+            ),
+        ),
+    ]
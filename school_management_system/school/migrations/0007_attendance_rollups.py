@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0006_outboundemail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClassroomDailyAttendance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("present", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                (
+                    "classroom",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_attendance",
+                        to="school.classroom",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date", "classroom"],
+                "unique_together": {("classroom", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentMonthlyAttendance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.DateField(help_text="First day of the month.")),
+                ("present", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_attendance",
+                        to="school.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["month", "student"],
+                "indexes": [
+                    models.Index(
+                        fields=["month", "student"], name="attendance_month_student_idx"
+                    )
+                ],
+                "unique_together": {("student", "month")},
+            },
+        ),
+    ]
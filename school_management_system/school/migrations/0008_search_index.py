@@ -0,0 +1,57 @@
+# Full-text search indexes; see school/search.py.
+
+from django.db import migrations
+
+# table -> indexed text expression (must match SearchIndex.sql_text())
+SEARCH_TABLES = {
+    "school_student": "coalesce(name, '')",
+    "school_teacher": "coalesce(name, '')",
+    "school_subject": "coalesce(name, '') || ' ' || coalesce(code, '')",
+    "school_user": (
+        "coalesce(username, '') || ' ' || coalesce(first_name, '') || ' ' || "
+        "coalesce(last_name, '') || ' ' || coalesce(email, '')"
+    ),
+}
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, text in SEARCH_TABLES.items():
+        if vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+                f"text, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (rowid, text) SELECT id, {text} FROM {table}"
+            )
+        elif vendor == "postgresql":
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                f"CREATE INDEX {table}_tsv_idx ON {table} "
+                f"USING GIN (to_tsvector('simple', {text}))"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {table}_trgm_idx ON {table} USING GIN (({text}) gin_trgm_ops)"
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_TABLES:
+        if vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_tsv_idx")
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0007_attendance_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
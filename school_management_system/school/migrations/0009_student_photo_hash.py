@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0008_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="student",
+            name="photo_hash",
+            field=models.CharField(blank=True, editable=False, max_length=24),
+        ),
+    ]
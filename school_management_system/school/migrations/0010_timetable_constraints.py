@@ -0,0 +1,110 @@
+# Generated by Django 5.2 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import IntegrityError, migrations, models
+from django.db.models import Count
+
+
+def check_teacher_slots(apps, schema_editor):
+    """Stops before timetable_teacher_slot_unique is added if a teacher already has two classes in one slot."""
+    Timetable = apps.get_model("school", "Timetable")
+    clashes = (
+        Timetable.objects.values("teacher_id", "day_of_week", "period_time")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by("teacher_id", "day_of_week", "period_time")
+    )
+    lines = []
+    for clash in clashes:
+        rows = list(
+            Timetable.objects.filter(
+                teacher_id=clash["teacher_id"],
+                day_of_week=clash["day_of_week"],
+                period_time=clash["period_time"],
+            )
+            .select_related("teacher", "classroom", "subject")
+            .order_by("id")
+        )
+        classes = ", ".join(
+            f"#{row.id} {row.classroom.name} - {row.classroom.section} ({row.subject.name})" for row in rows
+        )
+        first = rows[0]
+        lines.append(
+            f"  {first.teacher.name} on {first.day_of_week} at {first.period_time:%H:%M}: {classes}"
+        )
+    if lines:
+        raise IntegrityError(
+            "These timetable entries give one teacher two classes at the same time. Move or delete all but one "
+            "entry of each (Timetable ids shown), then run migrate again:\n" + "\n".join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0009_student_photo_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeacherUnavailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "day_of_week",
+                    models.CharField(
+                        choices=[
+                            ("Monday", "Monday"),
+                            ("Tuesday", "Tuesday"),
+                            ("Wednesday", "Wednesday"),
+                            ("Thursday", "Thursday"),
+                            ("Friday", "Friday"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("period_time", models.TimeField()),
+            ],
+            options={
+                "verbose_name_plural": "Teacher unavailability",
+            },
+        ),
+        migrations.AddField(
+            model_name="subject",
+            name="weekly_periods",
+            field=models.PositiveSmallIntegerField(
+                default=4,
+                help_text="Periods per week in every classroom that takes this subject.",
+            ),
+        ),
+        migrations.RunPython(check_teacher_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="timetable",
+            constraint=models.UniqueConstraint(
+                fields=("teacher", "day_of_week", "period_time"),
+                name="timetable_teacher_slot_unique",
+                violation_error_message="This teacher is already teaching another class at that time.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teacherunavailability",
+            name="teacher",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="unavailability",
+                to="school.teacher",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="teacherunavailability",
+            unique_together={("teacher", "day_of_week", "period_time")},
+        ),
+    ]
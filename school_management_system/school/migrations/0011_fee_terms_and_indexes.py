@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0010_timetable_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fee",
+            name="term",
+            field=models.CharField(
+                blank=True,
+                help_text="Billing term, e.g. 2025-T1; blank for one-off fees.",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fee",
+            index=models.Index(
+                fields=["student", "status"], name="fee_student_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fee",
+            index=models.Index(fields=["status", "date"], name="fee_status_date_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="fee",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("term", ""), _negated=True),
+                fields=("student", "term"),
+                name="fee_student_term_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("school", "0011_fee_terms_and_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="fee",
+            index=models.Index(fields=["date", "id"], name="fee_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notice",
+            index=models.Index(
+                fields=["date_posted", "id"], name="notice_date_posted_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["classroom", "name", "id"], name="student_classroom_name_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["role", "date_joined", "id"],
+                name="user_role_date_joined_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.2 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0012_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportCardBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=20)),
+                (
+                    "date_from",
+                    models.DateField(
+                        help_text="First day of the term, for the attendance summary."
+                    ),
+                ),
+                ("date_to", models.DateField(help_text="Last day of the term.")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("RUNNING", "Running"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("rendered", models.PositiveIntegerField(default=0)),
+                (
+                    "unchanged",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Cards whose contents had not changed."
+                    ),
+                ),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "classroom",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Leave blank for every classroom.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="school.classroom",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReportCard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=20)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("generated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_cards",
+                        to="school.student",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("student", "term")},
+            },
+        ),
+    ]
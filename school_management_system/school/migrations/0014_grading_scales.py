@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 20:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0013_report_cards"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="grade",
+            name="grade",
+            field=models.CharField(
+                help_text="Derived from the marks by the grading scale on save.",
+                max_length=2,
+            ),
+        ),
+        migrations.CreateModel(
+            name="GradingScale",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "bands",
+                    models.JSONField(
+                        help_text='Lowest marks for each letter, e.g. [[90, "A"], [80, "B"], [0, "F"]].'
+                    ),
+                ),
+                (
+                    "subject",
+                    models.OneToOneField(
+                        blank=True,
+                        help_text="Leave blank for the school-wide scale.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grading_scale",
+                        to="school.subject",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Full-text search index for classrooms, used by the classroom autocomplete; see school/search.py.
+
+from django.db import migrations
+
+TABLE = "school_classroom"
+TEXT = "coalesce(name, '') || ' ' || coalesce(section, '')"  # must match SearchIndex.sql_text()
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE}_fts USING fts5("
+            f"text, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(f"INSERT INTO {TABLE}_fts (rowid, text) SELECT id, {TEXT} FROM {TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX {TABLE}_tsv_idx ON {TABLE} USING GIN (to_tsvector('simple', {TEXT}))"
+        )
+        schema_editor.execute(f"CREATE INDEX {TABLE}_trgm_idx ON {TABLE} USING GIN (({TEXT}) gin_trgm_ops)")
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TABLE}_tsv_idx")
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TABLE}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0014_grading_scales"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
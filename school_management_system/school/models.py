@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -12,6 +13,12 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, null=True, blank=True)
     force_password_change = models.BooleanField(default=False)  # Add this field
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_date_joined_id_idx'),
+            models.Index(fields=['role', 'date_joined', 'id'], name='user_role_date_joined_id_idx'),
+        ]
+
 class ClassRoom(models.Model):
     name = models.CharField(max_length=100)
     section = models.CharField(max_length=1)
@@ -27,6 +34,7 @@ class ClassRoom(models.Model):
 class Subject(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10)
+    weekly_periods = models.PositiveSmallIntegerField(default=4, help_text="Periods per week in every classroom that takes this subject.")
 
     def __str__(self):
         return self.name
@@ -57,6 +65,7 @@ class Student(models.Model):
     age = models.PositiveIntegerField()
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
     photo = models.ImageField(upload_to='student_photos/', blank=True, null=True)
+    photo_hash = models.CharField(max_length=24, blank=True, editable=False)  # Names the variants; see school/photos.py
     address = models.TextField(blank=True)
     parent_contact = models.CharField(max_length=20, blank=True)
     classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE, related_name='students')
@@ -66,6 +75,10 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='student_name_id_idx'),
+            models.Index(fields=['classroom', 'name', 'id'], name='student_classroom_name_id_idx'),
+        ]
 
 class Attendance(models.Model):
     STATUS_CHOICES = [('Present', 'Present'), ('Absent', 'Absent')]
@@ -76,6 +89,9 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ('student', 'date')
+        indexes = [
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.name} - {self.date} - {self.status}"
@@ -84,11 +100,34 @@ class Attendance(models.Model):
         if Attendance.objects.filter(student=self.student, date=self.date).exclude(pk=self.pk).exists():
             raise ValidationError('Attendance for this student on this date already exists.')
 
+class GradingScale(models.Model):
+    """
+    Letter-grade bands, for one subject or (with no subject) the whole
+    school. Grade letters are derived from marks with the subject's scale,
+    else the school's, else the built-in bands; see school/grading.py.
+    """
+    name = models.CharField(max_length=100)
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='grading_scale', help_text="Leave blank for the school-wide scale.")
+    bands = models.JSONField(help_text='Lowest marks for each letter, e.g. [[90, "A"], [80, "B"], [0, "F"]].')
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        from .grading import validate_bands  # grading imports this module
+        try:
+            self.bands = validate_bands(self.bands)
+        except ValueError as exc:
+            raise ValidationError({'bands': str(exc)}) from exc
+        if self.subject_id is None and GradingScale.objects.filter(subject=None).exclude(pk=self.pk).exists():
+            raise ValidationError('There already is a school-wide grading scale.')
+
 class Grade(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='grades')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='grades')
     marks = models.FloatField()
-    grade = models.CharField(max_length=2)
+    grade = models.CharField(max_length=2, help_text="Derived from the marks by the grading scale on save.")
 
     class Meta:
         unique_together = ('student', 'subject')
@@ -97,7 +136,9 @@ class Grade(models.Model):
         return f"{self.student.name} - {self.subject.name} - {self.grade}"
 
     def clean(self):
-        if Grade.objects.filter(student=self.student, subject=self.subject).exclude(pk=self.pk).exists():
+        if self.student_id is None or self.subject_id is None:
+            return  # The field errors already say which one is missing or not allowed
+        if Grade.objects.filter(student_id=self.student_id, subject_id=self.subject_id).exclude(pk=self.pk).exists():
             raise ValidationError('Grade for this student and subject already exists.')
 
 class Timetable(models.Model):
@@ -117,10 +158,30 @@ class Timetable(models.Model):
 
     class Meta:
         unique_together = ('classroom', 'day_of_week', 'period_time')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['teacher', 'day_of_week', 'period_time'],
+                name='timetable_teacher_slot_unique',
+                violation_error_message='This teacher is already teaching another class at that time.',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.classroom.name} ({self.classroom.section}) - {self.subject.name} - {self.day_of_week} at {self.period_time.strftime('%H:%M')}"
 
+class TeacherUnavailability(models.Model):
+    """A period in which a teacher cannot be timetabled."""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='unavailability')
+    day_of_week = models.CharField(max_length=10, choices=Timetable.DAYS_OF_WEEK)
+    period_time = models.TimeField()
+
+    class Meta:
+        unique_together = ('teacher', 'day_of_week', 'period_time')
+        verbose_name_plural = 'Teacher unavailability'
+
+    def __str__(self):
+        return f"{self.teacher} unavailable {self.day_of_week} at {self.period_time.strftime('%H:%M')}"
+
 class Fee(models.Model):
     STATUS_CHOICES = [('Paid', 'Paid'), ('Unpaid', 'Unpaid')]
 
@@ -128,6 +189,20 @@ class Fee(models.Model):
     amount = models.DecimalField(max_digits=8, decimal_places=2)
     date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    term = models.CharField(max_length=20, blank=True, help_text="Billing term, e.g. 2025-T1; blank for one-off fees.")
+
+    class Meta:
+        indexes = [
+            # Per-student balances, and school-wide outstanding totals by date.
+            models.Index(fields=['student', 'status'], name='fee_student_status_idx'),
+            models.Index(fields=['status', 'date'], name='fee_status_date_idx'),
+            models.Index(fields=['date', 'id'], name='fee_date_id_idx'),
+        ]
+        constraints = [
+            # A term is billed at most once per student; also serves "already billed?" lookups.
+            models.UniqueConstraint(fields=['student', 'term'], condition=~models.Q(term=''),
+                                    name='fee_student_term_unique'),
+        ]
 
     def __str__(self):
         # Format amount with two decimals to pass your test
@@ -144,3 +219,145 @@ class Notice(models.Model):
 
     class Meta:
         ordering = ['-date_posted']
+        indexes = [
+            models.Index(fields=['date_posted', 'id'], name='notice_date_posted_id_idx'),
+        ]
+
+class Counter(models.Model):
+    """
+    Materialized row count for a model, kept current by signals in
+    school/counters.py so dashboards never have to run COUNT(*).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    class Meta:
+        ordering = ['name']
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email outbox. Views write rows in the same transaction as
+    the data they describe; the send_outbox worker delivers them in batches.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.TextField(help_text="Comma-separated recipient addresses.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+class StudentMonthlyAttendance(models.Model):
+    """
+    Present/absent counts for one student in one calendar month, maintained
+    from Attendance writes by school/rollups.py.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='monthly_attendance')
+    month = models.DateField(help_text="First day of the month.")
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.student_id} {self.month:%Y-%m}: {self.present}/{self.present + self.absent}"
+
+    class Meta:
+        ordering = ['month', 'student']
+        unique_together = ('student', 'month')
+        indexes = [
+            models.Index(fields=['month', 'student'], name='attendance_month_student_idx'),
+        ]
+
+class ClassroomDailyAttendance(models.Model):
+    """
+    Present/absent counts for one classroom on one day, maintained from
+    Attendance writes by school/rollups.py.
+    """
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE, related_name='daily_attendance')
+    date = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.classroom_id} {self.date}: {self.present}/{self.present + self.absent}"
+
+    class Meta:
+        ordering = ['date', 'classroom']
+        unique_together = ('classroom', 'date')
+
+class ReportCardBatch(models.Model):
+    """
+    A request to generate a term's report cards, for one classroom or the
+    whole school. The generate_report_cards worker renders it and records
+    its progress here; see school/reportcards.py.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    term = models.CharField(max_length=20)
+    date_from = models.DateField(help_text="First day of the term, for the attendance summary.")
+    date_to = models.DateField(help_text="Last day of the term.")
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.CASCADE, null=True, blank=True,
+                                  help_text="Leave blank for every classroom.")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0, help_text="Cards whose contents had not changed.")
+    failed = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.term} {self.classroom or 'all classrooms'} ({self.status})"
+
+    @property
+    def done(self):
+        return self.rendered + self.unchanged + self.failed
+
+    @property
+    def percent(self):
+        return round(100 * self.done / self.total) if self.total else (100 if self.status == 'DONE' else 0)
+
+    class Meta:
+        ordering = ['-id']
+
+class ReportCard(models.Model):
+    """A student's current report card for a term, stored under the hash of its contents."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='report_cards')
+    term = models.CharField(max_length=20)
+    content_hash = models.CharField(max_length=64)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student_id} {self.term}"
+
+    class Meta:
+        unique_together = ('student', 'term')
@@ -0,0 +1,79 @@
+"""
+The notice feed shown on every dashboard.
+
+The newest notices are cached as one plain-data snapshot keyed by the
+notice data version (see school/fragments.py), which every Notice save or
+delete bumps. Dashboards render the snapshot inside a template fragment
+cached under the same version, and the widget then polls the feed
+endpoint with ``?since=<newest id it has>`` for newer notices only.
+
+Feed responses carry an ETag made from the version and the request, so a
+poll when nothing was posted is answered 304 from two cache reads without
+a query or a body. Deltas also list the ids still in the feed, so clients
+drop notices that were deleted.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from . import fragments
+from .models import Notice
+
+
+def feed_size():
+    return getattr(settings, 'NOTICE_FEED_SIZE', 20)
+
+
+def poll_seconds():
+    return getattr(settings, 'NOTICE_POLL_SECONDS', 60)
+
+
+class Feed:
+    """The newest notices at one data version, newest first."""
+    def __init__(self, version, notices):
+        self.version = version
+        self.notices = notices  # dicts; plain data so the feed pickles small
+        self.latest_id = notices[0]['id'] if notices else 0
+        self.last_modified = timezone.now().replace(microsecond=0)
+
+    @classmethod
+    def build(cls, version):
+        rows = Notice.objects.order_by('-id').values('id', 'title', 'content', 'date_posted')[:feed_size()]
+        return cls(version, list(rows))
+
+    def etag(self, since):
+        return '"{}"'.format(hashlib.blake2b(f'notices:{self.version}:{since}'.encode(), digest_size=12).hexdigest())
+
+    def delta(self, since):
+        """The notices newer than ``since``, with the ids a client should keep."""
+        return {
+            'notices': [notice for notice in self.notices if notice['id'] > since],
+            'ids': [notice['id'] for notice in self.notices],
+            'latest_id': self.latest_id,
+        }
+
+
+def get_feed(version=None):
+    """The cached Feed, built on first use after any notice changes."""
+    if version is None:
+        version = fragments.versions(['notice'])[0]
+    key = f'school:notices:{version}'
+    feed = cache.get(key)
+    if feed is None:
+        feed = Feed.build(version)
+        cache.set(key, feed, fragments.fragment_timeout())
+    return feed
+
+
+def context():
+    """Template context for the notice widget; the feed is only read when the cached fragment misses."""
+    version = fragments.versions(['notice'])[0]
+    return {
+        'notice_version': version,
+        'notice_feed': SimpleLazyObject(lambda: get_feed(version)),
+        'notice_poll_seconds': poll_seconds(),
+        'fragment_timeout': fragments.fragment_timeout(),
+    }
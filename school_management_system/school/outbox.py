@@ -0,0 +1,116 @@
+"""
+Database-backed email outbox.
+
+``enqueue`` stores a message as part of the caller's transaction, so an
+account and its credentials email are committed (or rolled back)
+together and the request never waits on SMTP. ``deliver_batch`` is run
+by the ``send_outbox`` worker: it claims due messages, sends them over one
+reused backend connection, retries failures with exponential backoff and
+moves messages that keep failing to the DEAD state for an admin to review.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_CAP = timedelta(hours=6)
+# A claimed message not finished within this window is assumed lost by a crashed worker.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue(subject, message, recipient_list, from_email=None):
+    """Adds a message to the outbox; call it inside the transaction that creates the data it describes."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        to=','.join(recipient_list),
+    )
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_CAP)
+
+
+def _claim(batch_size, now):
+    due = Q(status='PENDING', next_attempt_at__lte=now) | Q(status='SENDING', next_attempt_at__lte=now - CLAIM_TIMEOUT)
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(status='SENDING', next_attempt_at=now)
+    return batch
+
+
+def deliver_batch(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Sends up to ``batch_size`` due messages over a single connection.
+    Returns a (sent, retried, dead) tuple of counts.
+    """
+    now = timezone.now()
+    batch = _claim(batch_size, now)
+    if not batch:
+        return 0, 0, 0
+
+    sent = retried = dead = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Nothing can be delivered; charge the attempt to every claimed message.
+        for email in batch:
+            dead += _record_failure(email, exc, max_attempts, now)
+        retried = len(batch) - dead
+        OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+        return 0, retried, dead
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=[address for address in email.to.split(',') if address],
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as exc:
+                is_dead = _record_failure(email, exc, max_attempts, now)
+                dead += is_dead
+                retried += not is_dead
+            else:
+                email.status = 'SENT'
+                email.sent_at = timezone.now()
+                email.attempts += 1
+                email.last_error = ''
+                # Credentials should not sit in the database once delivered.
+                email.body = ''
+                sent += 1
+    finally:
+        connection.close()
+
+    OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body'])
+    return sent, retried, dead
+
+
+def _record_failure(email, exc, max_attempts, now):
+    """Updates ``email`` after a failed send and returns True if it is now dead-lettered."""
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if email.attempts >= max_attempts:
+        email.status = 'DEAD'
+        return True
+    email.status = 'PENDING'
+    email.next_attempt_at = now + backoff(email.attempts)
+    return False
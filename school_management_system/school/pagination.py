@@ -0,0 +1,205 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded for the current list spec."""
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated list.
+    Behaves like a list of objects in templates and exposes opaque
+    next/previous cursors instead of page numbers. Pages returned by
+    ``ListSpec.paginate`` run their query on first use, so a template
+    fragment served from the cache never touches the database.
+    """
+    def __init__(self, object_list, sort, next_cursor=None, previous_cursor=None):
+        self._loader = None
+        self._object_list = object_list
+        self._next_cursor = next_cursor
+        self._previous_cursor = previous_cursor
+        self.sort = sort
+
+    @classmethod
+    def deferred(cls, sort, loader):
+        """A page whose (object_list, next_cursor, previous_cursor) come from ``loader()`` when first needed."""
+        page = cls(None, sort)
+        page._loader = loader
+        return page
+
+    def _load(self):
+        if self._loader is not None:
+            self._object_list, self._next_cursor, self._previous_cursor = self._loader()
+            self._loader = None
+
+    @property
+    def object_list(self):
+        self._load()
+        return self._object_list
+
+    @property
+    def next_cursor(self):
+        self._load()
+        return self._next_cursor
+
+    @property
+    def previous_cursor(self):
+        self._load()
+        return self._previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+class ListSpec:
+    """
+    Declarative description of a list view: which sort orders and filters
+    are allowed, which lookup the search box uses and how big a page is.
+
+    Every ordering must end in a unique column (normally ``id``) and use a
+    single direction, so the composite index behind it can be walked in
+    either direction and a cursor always identifies exactly one row.
+    Paging is done with ``WHERE (a, b) > (x, y)`` style predicates rather
+    than OFFSET, so page cost does not grow with how deep the user goes.
+    """
+    def __init__(self, orderings, default_sort=None, filters=None, search=None, per_page=25):
+        if not orderings:
+            raise ValueError("A ListSpec needs at least one ordering.")
+        for key, fields in orderings.items():
+            directions = {field.startswith('-') for field in fields}
+            if len(directions) != 1:
+                raise ValueError(f"Ordering '{key}' mixes ascending and descending fields.")
+            if any('__' in field for field in fields):
+                raise ValueError(f"Ordering '{key}' must only use local columns.")
+        self.orderings = orderings
+        self.default_sort = default_sort or next(iter(orderings))
+        self.filters = filters or {}
+        self.search = search
+        self.per_page = per_page
+
+    # --- Request parsing ---
+    def get_sort(self, request):
+        sort = request.GET.get('sort')
+        return sort if sort in self.orderings else self.default_sort
+
+    def filter_queryset(self, request, queryset):
+        """Applies whitelisted filters and the search box; unknown or malformed params are ignored."""
+        for param, lookup in self.filters.items():
+            value = request.GET.get(param)
+            if not value:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, ValidationError):
+                continue
+        query = request.GET.get('q')
+        if query and self.search:
+            queryset = self.search(queryset, query) if callable(self.search) else queryset.filter(**{self.search: query})
+        return queryset
+
+    # --- Cursors ---
+    def _fields(self, model, sort):
+        return [
+            (model._meta.get_field(name.lstrip('-')), name.startswith('-'))
+            for name in self.orderings[sort]
+        ]
+
+    def encode_cursor(self, obj, sort):
+        values = [field.value_to_string(obj) for field, _ in self._fields(type(obj), sort)]
+        raw = json.dumps([sort] + values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model, sort):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, binascii.Error, UnicodeDecodeError) as exc:
+            raise InvalidCursor(str(exc)) from exc
+
+        fields = self._fields(model, sort)
+        if not isinstance(payload, list) or len(payload) != len(fields) + 1 or payload[0] != sort:
+            raise InvalidCursor("Cursor does not belong to this sort order.")
+        try:
+            return [field.to_python(value) for (field, _), value in zip(fields, payload[1:])]
+        except ValidationError as exc:
+            raise InvalidCursor(str(exc)) from exc
+
+    def _seek(self, fields, values, forward):
+        """Builds the row-value comparison ``(f1, f2, ...) > (v1, v2, ...)`` as nested ORs."""
+        condition = Q()
+        for i, (field, descending) in enumerate(fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{field.name}__{lookup}': values[i]})
+            for (prev_field, _), prev_value in zip(fields[:i], values[:i]):
+                term &= Q(**{prev_field.name: prev_value})
+            condition |= term
+        # Redundant bound on the leading column so the planner can range-scan the index.
+        first_field, descending = fields[0]
+        bound = 'lte' if descending == forward else 'gte'
+        return Q(**{f'{first_field.name}__{bound}': values[0]}) & condition
+
+    # --- Pagination ---
+    def paginate(self, request, queryset):
+        """
+        Filters, orders and slices ``queryset`` according to the request,
+        reading ``sort``, ``after`` and ``before`` from the query string.
+        """
+        sort = self.get_sort(request)
+        queryset = self.filter_queryset(request, queryset)
+        return KeysetPage.deferred(sort, lambda: self._load_page(request, queryset, sort))
+
+    def _load_page(self, request, queryset, sort):
+        model = queryset.model
+        fields = self._fields(model, sort)
+        ordering = list(self.orderings[sort])
+        reverse_ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+        after, before = request.GET.get('after'), request.GET.get('before')
+        try:
+            if before:
+                values = self.decode_cursor(before, model, sort)
+                rows = list(queryset.filter(self._seek(fields, values, forward=False)).order_by(*reverse_ordering)[:self.per_page + 1])
+                has_more_before = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return (
+                    rows,
+                    self.encode_cursor(rows[-1], sort) if rows else None,
+                    self.encode_cursor(rows[0], sort) if has_more_before else None,
+                )
+            if after:
+                queryset = queryset.filter(self._seek(fields, self.decode_cursor(after, model, sort), forward=True))
+        except InvalidCursor:
+            # A stale or tampered cursor just falls back to the first page.
+            after = None
+
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more_after = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return (
+            rows,
+            self.encode_cursor(rows[-1], sort) if has_more_after else None,
+            self.encode_cursor(rows[0], sort) if after and rows else None,
+        )
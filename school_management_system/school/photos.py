@@ -0,0 +1,213 @@
+"""
+Student photo variants.
+
+An uploaded photo is kept as the original and rendered into a few fixed
+sizes, each as WebP and JPEG. Orientation from EXIF is applied first and
+no metadata is written to the variants, so location and camera data never
+reach the browser. Variant names are derived from a hash of the original's
+bytes (``student_photos/v/<hash>/<size>.<ext>``): a name never changes its
+content, so they can be served with a far-future ``immutable`` cache
+header, and a new upload simply gets new names.
+
+Saving a student with a new photo processes it in the request; existing
+photos are converted with the ``process_student_photos`` command, which
+spreads the work over a process pool. ``variants_for`` does the heavy
+lifting and touches only storage, never the database, so it is safe to
+run in worker processes.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import fragments
+from .models import Student
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels; avatars are cropped square. Sized for 2x displays.
+SIZES = {'avatar': 96, 'detail': 480, 'print': 1200}
+SQUARE = {'avatar'}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+# Part of every hash, so changing SIZES or FORMATS gives all variants new names.
+PIPELINE_VERSION = b'1'
+VARIANT_DIR = 'student_photos/v'
+
+
+class PhotoError(Exception):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+def content_hash(data):
+    return hashlib.sha256(PIPELINE_VERSION + data).hexdigest()[:24]
+
+
+def variant_name(photo_hash, size, ext):
+    return f'{VARIANT_DIR}/{photo_hash}/{size}.{ext}'
+
+
+def render(data):
+    """Returns {(size, ext): encoded bytes} for every variant of the image in ``data``."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG decoders can downscale by 1/2..1/8 while decoding, far cheaper than resizing later.
+        largest = max(SIZES.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise PhotoError(str(exc)) from exc
+    image = _flatten(image)
+
+    variants = {}
+    # Largest first, each derived from the previous one, so every resize works on the smallest possible source.
+    source = image
+    for size, pixels in sorted(SIZES.items(), key=lambda item: -item[1]):
+        if size in SQUARE:
+            resized = ImageOps.fit(source, (pixels, pixels), Image.Resampling.LANCZOS)
+        else:
+            resized = source.copy()
+            resized.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+            source = resized
+        for ext, (fmt, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)  # No exif= argument: metadata is dropped
+            variants[size, ext] = buffer.getvalue()
+    return variants
+
+
+def _flatten(image):
+    """RGB for JPEG, with any transparency composited onto white."""
+    if image.mode == 'RGB':
+        return image
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def variants_for(name, force=False):
+    """
+    Writes the variants of the stored original ``name`` unless they already
+    exist, and returns the photo hash. Touches storage only.
+    """
+    with default_storage.open(name, 'rb') as original:
+        data = original.read()
+    photo_hash = content_hash(data)
+    if force or not default_storage.exists(variant_name(photo_hash, 'avatar', 'jpg')):
+        for (size, ext), encoded in render(data).items():
+            target = variant_name(photo_hash, size, ext)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(encoded))
+    return photo_hash
+
+
+def delete_variants(photo_hash):
+    """Removes a hash's variants unless another student still uses them."""
+    if not photo_hash or Student.objects.filter(photo_hash=photo_hash).exists():
+        return
+    for size in SIZES:
+        for ext in FORMATS:
+            default_storage.delete(variant_name(photo_hash, size, ext))
+
+
+def urls(student, size):
+    """{'webp': url, 'jpg': url} for one size, or None when the photo has not been processed."""
+    if not student.photo_hash:
+        return None
+    return {ext: default_storage.url(variant_name(student.photo_hash, size, ext)) for ext in FORMATS}
+
+
+# --- Backfill ---
+def _process(job):
+    pk, name, force = job
+    try:
+        return pk, variants_for(name, force), None
+    except (PhotoError, OSError) as exc:
+        return pk, None, str(exc)
+
+
+def backfill(workers=None, force=False, log=None):
+    """
+    Processes every student photo that has no variants yet (all of them
+    with ``force``) on a pool of ``workers`` processes (1 = in this
+    process). Returns (processed, failed).
+    """
+    log = log or (lambda message: None)
+    students = Student.objects.exclude(photo='').exclude(photo__isnull=True)
+    if not force:
+        students = students.filter(photo_hash='')
+    jobs = [(pk, name, force) for pk, name in students.order_by('pk').values_list('pk', 'photo')]
+    if not jobs:
+        return 0, 0
+
+    if workers == 1:
+        results = map(_process, jobs)
+    else:
+        # django.setup makes workers independent of the start method (fork, spawn or forkserver).
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        results = pool.map(_process, jobs, chunksize=4)
+    processed, failed = [], 0
+    try:
+        for pk, photo_hash, error in results:
+            if error:
+                failed += 1
+                log(f"Student {pk}: {error}")
+            else:
+                processed.append(Student(pk=pk, photo_hash=photo_hash))
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    Student.objects.bulk_update(processed, ['photo_hash'], batch_size=500)
+    fragments.bump('student')
+    return len(processed), failed
+
+
+# --- Processing on upload ---
+@receiver(post_init, sender=Student)
+def remember_photo(sender, instance, **kwargs):
+    # Read the raw attributes: touching a deferred field would cost a query per instance.
+    if 'photo' in instance.__dict__:
+        photo = instance.__dict__['photo']
+        instance._photo_state = (getattr(photo, 'name', photo) or '', instance.__dict__.get('photo_hash', ''))
+
+
+@receiver(post_save, sender=Student)
+def photo_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_photo_state'):
+        return
+    old_name, old_hash = ('', '') if created else instance._photo_state
+    name = instance.photo.name or ''
+    if name == old_name:
+        return
+    photo_hash = ''
+    if name:
+        try:
+            photo_hash = variants_for(name)
+        except PhotoError:
+            logger.warning("Student %s: photo %s could not be processed", instance.pk, name, exc_info=True)
+    # A queryset update, so post_save does not fire again.
+    Student.objects.filter(pk=instance.pk).update(photo_hash=photo_hash)
+    instance.photo_hash = photo_hash
+    instance._photo_state = (name, photo_hash)
+    if old_hash and old_hash != photo_hash:
+        delete_variants(old_hash)
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    delete_variants(instance.__dict__.get('photo_hash'))
@@ -0,0 +1,177 @@
+"""
+Query-plan regression checks.
+
+Every benchmarked view (see school/benchmarks.py) is requested once with a
+cold cache, and each SELECT it runs is explained by the database:
+``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN (FORMAT JSON)`` on PostgreSQL.
+A plan is a problem when it reads a large table in full, or sorts rows of
+a large table in a temporary B-tree instead of reading them in index
+order: both make a view's cost grow with the school rather than with the
+page it shows. Plans that are bounded for a documented reason are listed
+in ``ALLOWED``.
+
+Run it against seeded data (``seed_school``), with ``check_query_plans``
+or through the test suite.
+"""
+import json
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import benchmarks
+from .models import (
+    Attendance, ClassroomDailyAttendance, Fee, Grade, Notice, OutboundEmail, Student,
+    StudentMonthlyAttendance, Timetable, User,
+)
+
+# Tables that grow with the number of students, days or years.
+LARGE_TABLES = {
+    model._meta.db_table for model in (
+        Attendance, ClassroomDailyAttendance, Fee, Grade, Notice, OutboundEmail, Student,
+        StudentMonthlyAttendance, Timetable, User,
+    )
+}
+
+# Filtered variants of the benchmark cases, for the access paths only a filter takes.
+CASES = benchmarks.CASES + [
+    benchmarks.Case('ADMIN', 'school:attendance_list', 5, 100, params={'status': 'Absent'}),
+    benchmarks.Case('ADMIN', 'school:user_list', 5, 100, params={'role': 'ADMIN'}),
+    benchmarks.Case('ADMIN', 'school:user_list', 5, 100, params={'sort': 'username'}),
+]
+
+# (case name, problem) pairs that are bounded or inherent, with the reason.
+_ROLLUP_REPORT = "groups rollup rows of one period (a month by default), not raw attendance"
+ALLOWED = {
+    ('ADMIN:school:gradebook', 'full scan of school_grade'):
+        "the school-wide gradebook pivots every grade by design; classroom gradebooks are the bounded path",
+    ('TEACHER:school:grade_list', 'full scan of school_grade'):
+        "walks grades newest first through the scope EXISTS and stops at the page (see scope.students_in_scope)",
+    ('ADMIN:school:student_list?q=ab', 'temp B-tree sort over school_student'):
+        "sorts only the full-text matches",
+    ('ADMIN:school:attendance_report', 'temp B-tree sort over school_classroomdailyattendance'): _ROLLUP_REPORT,
+    ('ADMIN:school:attendance_report', 'temp B-tree sort over school_student, school_studentmonthlyattendance'):
+        _ROLLUP_REPORT,
+    ('TEACHER:school:attendance_report', 'temp B-tree sort over school_classroomdailyattendance'): _ROLLUP_REPORT,
+    ('TEACHER:school:attendance_report', 'temp B-tree sort over school_student, school_studentmonthlyattendance'):
+        _ROLLUP_REPORT,
+    ('ADMIN:school:fee_list', 'temp B-tree sort over school_fee'):
+        "the term filter's DISTINCT terms, cached under the fee version (see school/fees.py)",
+    ('ADMIN:school:fee_list?status=Unpaid', 'temp B-tree sort over school_fee'):
+        "the term filter's DISTINCT terms, cached under the fee version (see school/fees.py)",
+    ('ADMIN:school:fee_balances', 'temp B-tree sort over school_fee'):
+        "school-wide outstanding total, cached under the fee version",
+    ('ADMIN:school:fee_balances', 'full scan of school_fee'):
+        "balances per classroom aggregate every fee by design, cached under the fee version",
+    ('ADMIN:school:fee_balances', 'temp B-tree sort over school_fee, school_student'):
+        "balances per classroom aggregate every fee by design, cached under the fee version",
+}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?')
+_SQLITE_SEARCH = re.compile(r'^SEARCH (\w+)')
+
+
+def explain(sql):
+    """The plan of one query as (table or None, operation) pairs."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [_sqlite_step(row[-1]) for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            return list(_postgres_steps(plan[0]['Plan']))
+    raise NotImplementedError(f"No query plan support for {connection.vendor}.")
+
+
+def _sqlite_step(detail):
+    match = _SQLITE_SCAN.match(detail)
+    if match:
+        # A full scan in index order may stop early (LIMIT); a bare scan reads every row.
+        return match.group(1), 'index scan' if match.group(2) else 'full scan'
+    match = _SQLITE_SEARCH.match(detail)
+    if match:
+        return match.group(1), 'search'
+    if detail.startswith('USE TEMP B-TREE'):
+        return None, 'temp sort'
+    return None, detail
+
+
+def _postgres_steps(node):
+    relation = node.get('Relation Name')
+    kind = node['Node Type']
+    if kind == 'Seq Scan':
+        yield relation, 'full scan'
+    elif relation:
+        yield relation, 'search'
+    elif kind in ('Sort', 'Incremental Sort'):
+        yield None, 'temp sort'
+    for child in node.get('Plans', []):
+        yield from _postgres_steps(child)
+
+
+_OUTER_LIMIT = re.compile(r' LIMIT \d+(?: OFFSET \d+)?$')
+
+
+def _stops_at_limit(sql, steps):
+    """
+    Whether the plan's first step, a full scan of the outermost table, stops
+    at the LIMIT: SQLite's bare SCAN walks the rowid in order, so without a
+    filter, grouping or sort the first rows it reads are the rows returned.
+    """
+    return (
+        bool(steps) and steps[0][1] == 'full scan'
+        and _OUTER_LIMIT.search(sql) is not None
+        and not any(clause in sql for clause in (' WHERE ', ' GROUP BY ', ' HAVING ', 'DISTINCT'))
+        and not any(operation == 'temp sort' for _, operation in steps)
+    )
+
+
+def problems(sql, steps):
+    """Human-readable problems in the plan of one query."""
+    tables = {table for table, _ in steps if table in LARGE_TABLES}
+    sorts = any(operation == 'temp sort' for _, operation in steps)
+    scans = [table for table, operation in steps if operation == 'full scan' and table in tables]
+    if scans and scans[0] == steps[0][0] and _stops_at_limit(sql, steps):  # Only that first scan is bounded
+        scans = scans[1:]
+    found = [f'full scan of {table}' for table in scans]
+    if tables and sorts:
+        found.append(f"temp B-tree sort over {', '.join(sorted(tables))}")
+    return found
+
+
+def capture(cases=CASES):
+    """Requests every case with a cold cache; returns [(case name, status, [SELECT sql])]."""
+    context = benchmarks.fixtures()
+    clients = {}
+    captured_cases = []
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for case in cases:
+            client = clients.get(case.role)
+            if client is None:
+                client = clients[case.role] = Client(raise_request_exception=False)
+                client.force_login(context['users'][case.role])
+            args = [context['ids'][case.args]] if case.args else []
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(reverse(case.url_name, args=args), case.params)
+            selects = [query['sql'] for query in captured.captured_queries if query['sql'].startswith('SELECT')]
+            captured_cases.append((case.name, response.status_code, selects))
+    return captured_cases
+
+
+def check(cases=CASES, allowed=ALLOWED):
+    """Returns [(case name, sql, problem)] for every problem not in ``allowed``."""
+    report = []
+    for name, status, selects in capture(cases):
+        if status != 200:
+            report.append((name, None, f'HTTP {status}'))
+        for sql in selects:
+            for problem in problems(sql, explain(sql)):
+                if (name, problem) not in allowed:
+                    report.append((name, sql, problem))
+    return report
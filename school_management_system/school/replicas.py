@@ -0,0 +1,160 @@
+"""
+Read replicas.
+
+``ReplicaRouter`` sends every write to the primary (``default``). Reads go
+to a replica only inside views decorated with ``@reads_from_replica`` and
+only for GET and HEAD requests; everything else, including code outside a
+request, reads from the primary. A request sticks to one replica, chosen
+at random from ``settings.REPLICA_DATABASES``.
+
+Replicas lag behind the primary, so two markers keep reads consistent:
+
+* Read-your-writes: a request that wrote anything gets a short-lived
+  cookie, and for ``REPLICA_PIN_SECONDS`` afterwards that browser reads
+  from the primary, so a redirect after a save (``grade_create`` ->
+  ``grade_list``) shows the new row.
+* Cache fills: cached fragments and snapshots are keyed by data versions
+  (see school/fragments.py), and a page built from a replica that has not
+  caught up with a version would stay cached under it. Every version bump
+  also marks the model as recently written for ``REPLICA_PIN_SECONDS``,
+  and a request that reads the version of a recently written model
+  continues on the primary.
+
+Streaming responses are iterated after the middleware returns, so views
+that stream pass ``read_alias()`` to their querysets explicitly.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'school_primary_until'
+WRITTEN_KEY = 'school:replica-written:{}'
+
+_state = ContextVar('school_replica_state', default=None)
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.alias = None  # The replica this request reads from, if any
+        self.wrote = False
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def choose():
+    """A replica alias at random, or the primary when there are none."""
+    aliases = replica_aliases()
+    return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+
+def reads_from_replica(view_func):
+    """Marks a view whose GET and HEAD requests may read from a replica."""
+    view_func.reads_from_replica = True
+    return view_func
+
+
+def read_alias():
+    """The database this request reads from; None (let the router decide) outside a request."""
+    state = _state.get()
+    if state is None:
+        return None
+    return state.alias or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def primary():
+    """Reads inside the block go to the primary, e.g. to build something that will be cached."""
+    state = _state.get()
+    alias = state.alias if state else None
+    if state:
+        state.alias = None
+    try:
+        yield
+    finally:
+        if state:
+            state.alias = alias
+
+
+# --- Recently written models ---
+def mark_written(names):
+    """Records that the named models changed, so cache fills avoid replicas for a while."""
+    if replica_aliases():
+        cache.set_many({WRITTEN_KEY.format(name): True for name in names}, pin_seconds())
+
+
+def avoid_stale(names):
+    """Moves this request to the primary if any named model changed within the replica lag."""
+    state = _state.get()
+    if state and state.alias and cache.get_many([WRITTEN_KEY.format(name) for name in names]):
+        state.alias = None
+
+
+# --- Request lifecycle (see ReplicaMiddleware) ---
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def begin(request):
+    return _state.set(_RequestState(pinned=_pinned(request)))
+
+
+def route_view(request, view_func):
+    state = _state.get()
+    if (
+        state and not state.pinned and request.method in ('GET', 'HEAD')
+        and getattr(view_func, 'reads_from_replica', False) and replica_aliases()
+    ):
+        state.alias = choose()
+
+
+def end(token):
+    """Ends the request's routing; returns whether it wrote."""
+    state = _state.get()
+    _state.reset(token)
+    return state.wrote
+
+
+def pin(response):
+    """Sends this browser's reads to the primary for the next REPLICA_PIN_SECONDS."""
+    if replica_aliases():
+        seconds = pin_seconds()
+        response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+
+
+class ReplicaRouter:
+    """Writes and migrations go to the primary; reads follow the request's replica, if any."""
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        return state.alias if state else None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state:
+            state.wrote = True
+            state.alias = None  # Read back what this request writes
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas copy the primary's schema through replication.
+        return False if db in replica_aliases() else None
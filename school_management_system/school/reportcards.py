@@ -0,0 +1,191 @@
+"""
+Term report cards.
+
+A card shows a student's grades, their attendance over the term and their
+rank in the classroom. Cards are built a classroom at a time from three
+bulk queries (students, grades, attendance), with ranks
+computed on the classroom's gradebook matrix (see school/gradebook.py),
+so the database work does not grow with the number of cards.
+
+Each card's contents are hashed, and the rendered HTML is stored under
+that hash (``report_cards/<xx>/<hash>.html``). ``ReportCard`` records the
+current hash of every (student, term), so a card whose grades and
+attendance have not changed since the last run is skipped, and only
+changed cards are rendered, on a process pool. Rendering touches storage
+only, never the database, so it is safe in worker processes.
+
+Admins queue a ``ReportCardBatch`` on the Report Cards page; the
+``generate_report_cards`` worker runs queued batches and records progress
+on the batch after every classroom, which the page shows.
+"""
+import hashlib
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import rollups
+from .gradebook import Gradebook
+from .models import Attendance, ClassRoom, Grade, ReportCard, ReportCardBatch, Student
+
+TEMPLATE = 'school/report_card.html'
+# Part of every hash, so changing the template or the card contents renders every card again.
+TEMPLATE_VERSION = b'1'
+CARD_DIR = 'report_cards'
+
+
+def content_hash(card):
+    data = json.dumps(card, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(TEMPLATE_VERSION + data).hexdigest()
+
+
+def card_name(card_hash):
+    return f'{CARD_DIR}/{card_hash[:2]}/{card_hash}.html'
+
+
+# --- Card contents ---
+def classroom_cards(classroom, term, date_from, date_to):
+    """The card contents of every student in ``classroom``, as plain data, in name order."""
+    students = list(Student.objects.filter(classroom=classroom).order_by('name', 'id').values_list('id', 'name'))
+    grades = list(
+        Grade.objects.filter(student__classroom=classroom).order_by('subject__code')
+        .values_list('student_id', 'student__name', 'subject_id', 'subject__code', 'marks', 'subject__name', 'grade')
+    )
+    # Counted from the raw rows, because the monthly rollups would widen the term to whole months.
+    attendance = {
+        row['student_id']: (row['present'], row['absent'])
+        for row in Attendance.objects.filter(student__classroom=classroom, date__range=(date_from, date_to))
+        .values('student_id').annotate(**rollups.COUNTS).order_by()
+    }
+
+    gradebook = Gradebook.from_rows(row[:5] for row in grades)  # The pivot's own columns come first
+    standing = {
+        int(student_id): (None if math.isnan(average) else round(float(average), 2), int(rank))
+        for student_id, average, rank
+        in zip(gradebook.student_ids, gradebook.student_averages(), gradebook.student_ranks())
+    }
+    by_student = {}
+    for student_id, _, _, code, marks, subject, letter in grades:
+        by_student.setdefault(student_id, []).append(
+            {'code': code, 'subject': subject, 'marks': round(marks, 2), 'grade': letter}
+        )
+
+    cards = []
+    for student_id, name in students:
+        average, rank = standing.get(student_id, (None, None))
+        present, absent = attendance.get(student_id, (0, 0))
+        cards.append({
+            'student_id': student_id,
+            'name': name,
+            'classroom': f'{classroom.name} - {classroom.section}',
+            'term': term,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'grades': by_student.get(student_id, []),
+            'average': average,
+            'rank': rank,
+            'ranked': len(standing),
+            'present': present,
+            'absent': absent,
+            'attendance_rate': round(100.0 * present / (present + absent), 1) if present + absent else None,
+        })
+    return cards
+
+
+# --- Rendering (worker processes) ---
+def render_card(job):
+    """
+    Stores the HTML of one card under its hash unless it exists (or is
+    forced); returns (student id, hash, error). Touches storage only.
+    """
+    card_hash, card, force = job
+    try:
+        name = card_name(card_hash)
+        if force or not default_storage.exists(name):
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(render_to_string(TEMPLATE, {'card': card}).encode()))
+        return card['student_id'], card_hash, None
+    except Exception as exc:  # One bad card must not stop the batch
+        return card['student_id'], None, f"{type(exc).__name__}: {exc}"
+
+
+def read_card(report_card):
+    with default_storage.open(card_name(report_card.content_hash), 'rb') as stored:
+        return stored.read()
+
+
+# --- Batches ---
+def run(batch, workers=None, force=False, log=None):
+    """
+    Generates the cards of ``batch`` on a pool of ``workers`` processes
+    (1 = in this process), updating its progress after every classroom.
+    Unchanged cards are skipped unless ``force`` is given.
+    """
+    log = log or (lambda message: None)
+    classrooms = ClassRoom.objects.order_by('name', 'section')
+    if batch.classroom_id:
+        classrooms = classrooms.filter(pk=batch.classroom_id)
+    classrooms = list(classrooms)
+    total = Student.objects.filter(classroom__in=classrooms).count()
+    ReportCardBatch.objects.filter(pk=batch.pk).update(status='RUNNING', total=total)
+
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+    try:
+        for classroom in classrooms:
+            rendered, unchanged, failed = _run_classroom(batch, classroom, pool, force, log)
+            ReportCardBatch.objects.filter(pk=batch.pk).update(
+                rendered=F('rendered') + rendered, unchanged=F('unchanged') + unchanged, failed=F('failed') + failed,
+            )
+    except Exception as exc:
+        ReportCardBatch.objects.filter(pk=batch.pk).update(
+            status='FAILED', last_error=f"{type(exc).__name__}: {exc}", finished_at=timezone.now(),
+        )
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+    ReportCardBatch.objects.filter(pk=batch.pk).update(status='DONE', finished_at=timezone.now())
+    batch.refresh_from_db()
+    return batch
+
+
+def _run_classroom(batch, classroom, pool, force, log):
+    cards = classroom_cards(classroom, batch.term, batch.date_from, batch.date_to)
+    current = {} if force else dict(
+        ReportCard.objects.filter(student__classroom=classroom, term=batch.term).values_list('student_id', 'content_hash')
+    )
+    jobs = []
+    for card in cards:
+        card_hash = content_hash(card)
+        if current.get(card['student_id']) != card_hash:
+            jobs.append((card_hash, card, force))
+
+    results = pool.map(render_card, jobs, chunksize=8) if pool else map(render_card, jobs)
+    stored, failed = [], 0
+    for student_id, card_hash, error in results:
+        if error:
+            failed += 1
+            log(f"Student {student_id}: {error}")
+        else:
+            stored.append(ReportCard(student_id=student_id, term=batch.term, content_hash=card_hash))
+    ReportCard.objects.bulk_create(
+        stored, update_conflicts=True, unique_fields=['student', 'term'], update_fields=['content_hash', 'generated_at'],
+    )
+    return len(stored), len(cards) - len(jobs), failed
+
+
+def claim_next():
+    """The oldest queued batch, marked running so no other worker takes it; None when the queue is empty."""
+    for batch in ReportCardBatch.objects.filter(status='PENDING').order_by('id')[:10]:
+        # The conditional update is the claim: only one worker sees it change a row.
+        if ReportCardBatch.objects.filter(pk=batch.pk, status='PENDING').update(status='RUNNING'):
+            return batch
+    return None
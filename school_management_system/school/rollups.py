@@ -0,0 +1,284 @@
+"""
+Attendance rollups.
+
+Raw ``Attendance`` rows are summarized into two tables: present/absent
+counts per student per month and per classroom per day. Every write
+refreshes only the rollup rows it touches, recounted from the raw rows
+with one grouped query per table and stored with one bulk upsert, so a
+whole roll-call costs the same handful of queries as a single edit.
+Receivers cover ``save``/``delete``, including a student saved into another
+classroom. Deleting a student recounts its classroom's days once, in the
+student's own ``pre_delete``/``post_delete``, instead of once per cascaded
+attendance row; deleting a classroom recounts nothing, since its rollup
+rows go with it. Code that bulk-writes attendance or moves students with
+``update()`` must call ``refresh`` itself (or rebuild). ``rebuild_attendance_rollups`` recomputes
+everything from scratch.
+
+Reports read only the rollup tables. Classroom figures are exact to the
+day; student figures are kept per month, so student rates cover the whole
+months in the requested range.
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Attendance, ClassRoom, ClassroomDailyAttendance, Student, StudentMonthlyAttendance
+
+COUNTS = {
+    'present': Count('id', filter=Q(status='Present')),
+    'absent': Count('id', filter=Q(status='Absent')),
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# --- Maintenance ---
+def refresh(keys):
+    """Recounts the rollup rows for an iterable of (student_id, date) pairs whose attendance changed."""
+    to_date = Attendance._meta.get_field('date').to_python
+    keys = {(student_id, to_date(day)) for student_id, day in keys}
+    if not keys:
+        return
+    student_ids = {student_id for student_id, _ in keys}
+    classrooms = dict(Student.objects.filter(pk__in=student_ids).values_list('id', 'classroom_id'))
+
+    with transaction.atomic():
+        months = {(student_id, month_start(day)) for student_id, day in keys}
+        first = min(month for _, month in months)
+        last = next_month(max(month for _, month in months))
+        totals = {
+            (row['student_id'], row['month']): row
+            for row in Attendance.objects.filter(student_id__in=student_ids, date__gte=first, date__lt=last)
+            .annotate(month=TruncMonth('date')).values('student_id', 'month').annotate(**COUNTS)
+        }
+        _store(StudentMonthlyAttendance, ('student_id', 'month'), months, totals)
+
+        _refresh_days({(classrooms[student_id], day) for student_id, day in keys if student_id in classrooms})
+
+
+def _refresh_days(days):
+    """Recounts the classroom-day rollup rows for a set of (classroom_id, date) pairs."""
+    if not days:
+        return
+    totals = {
+        (row['student__classroom_id'], row['date']): row
+        for row in Attendance.objects.filter(
+            student__classroom_id__in={classroom_id for classroom_id, _ in days},
+            date__in={day for _, day in days},
+        ).values('student__classroom_id', 'date').annotate(**COUNTS)
+    }
+    _store(ClassroomDailyAttendance, ('classroom_id', 'date'), days, totals)
+
+
+def _store(model, key_fields, keys, totals):
+    """Upserts the non-empty ``keys`` from ``totals`` and deletes the ones that no longer have attendance."""
+    rows, empty = [], []
+    for key in keys:
+        counts = totals.get(key)
+        if counts and counts['present'] + counts['absent']:
+            rows.append(model(**dict(zip(key_fields, key)), present=counts['present'], absent=counts['absent']))
+        else:
+            empty.append(Q(**dict(zip(key_fields, key))))
+    if rows:
+        model.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=[field.removesuffix('_id') for field in key_fields],
+            update_fields=['present', 'absent'],
+        )
+    if empty:
+        model.objects.filter(reduce(or_, empty)).delete()
+
+
+@receiver(post_init, sender=Attendance)
+def remember_key(sender, instance, **kwargs):
+    # The key the row had when loaded, so an edit that moves it refreshes both sides.
+    instance._rollup_key = (instance.__dict__.get('student_id'), instance.__dict__.get('date'))
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, **kwargs):
+    keys = {(instance.student_id, instance.date)}
+    previous = getattr(instance, '_rollup_key', (None, None))
+    if None not in previous:
+        keys.add(previous)
+    refresh(keys)
+    instance._rollup_key = (instance.student_id, instance.date)
+
+
+def _deleted_by(origin, model):
+    """Whether the delete that sent a signal was called on a ``model`` instance or queryset."""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    # Rows cascading from a student delete are recounted together by student_deleted.
+    if origin is None or _deleted_by(origin, Attendance):
+        refresh([(instance.student_id, instance.date)])
+
+
+@receiver(post_init, sender=Student)
+def remember_classroom(sender, instance, **kwargs):
+    instance._rollup_classroom = instance.__dict__.get('classroom_id')
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created=False, raw=False, **kwargs):
+    # Classroom days count students by their current classroom, so a move recounts
+    # the student's attendance days in both the old and the new classroom.
+    previous = getattr(instance, '_rollup_classroom', None)
+    instance._rollup_classroom = instance.classroom_id
+    if created or raw or previous is None or previous == instance.classroom_id:
+        return
+    dates = set(Attendance.objects.filter(student_id=instance.pk).values_list('date', flat=True).distinct())
+    with transaction.atomic():
+        _refresh_days({(classroom_id, day) for classroom_id in (previous, instance.classroom_id) for day in dates})
+
+
+@receiver(pre_delete, sender=Student)
+def remember_dates(sender, instance, origin=None, **kwargs):
+    # The student's monthly rows cascade with it, and a deleted classroom takes its daily rows along.
+    if _deleted_by(origin, ClassRoom):
+        instance._rollup_dates = set()
+        return
+    instance._rollup_dates = set(Attendance.objects.filter(student_id=instance.pk).values_list('date', flat=True).distinct())
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    # Runs after the cascaded attendance rows are gone, so the recount leaves the student out.
+    dates = getattr(instance, '_rollup_dates', set())
+    _refresh_days({(instance.classroom_id, day) for day in dates})
+
+
+def rebuild(chunk_size=500):
+    """
+    Recomputes both rollup tables from the raw attendance rows, a chunk of
+    students or classrooms at a time. Returns (student-month rows, classroom-day rows).
+    """
+    monthly = daily = 0
+    for ids in _id_chunks(Student.objects.all(), chunk_size):
+        with transaction.atomic():
+            StudentMonthlyAttendance.objects.filter(student_id__in=ids).delete()
+            rows = StudentMonthlyAttendance.objects.bulk_create(
+                StudentMonthlyAttendance(student_id=row['student_id'], month=row['month'],
+                                         present=row['present'], absent=row['absent'])
+                for row in Attendance.objects.filter(student_id__in=ids)
+                .annotate(month=TruncMonth('date')).values('student_id', 'month').annotate(**COUNTS)
+            )
+            monthly += len(rows)
+
+    for ids in _id_chunks(ClassRoom.objects.all(), chunk_size):
+        with transaction.atomic():
+            ClassroomDailyAttendance.objects.filter(classroom_id__in=ids).delete()
+            rows = ClassroomDailyAttendance.objects.bulk_create(
+                ClassroomDailyAttendance(classroom_id=row['student__classroom_id'], date=row['date'],
+                                         present=row['present'], absent=row['absent'])
+                for row in Attendance.objects.filter(student__classroom_id__in=ids)
+                .values('student__classroom_id', 'date').annotate(**COUNTS)
+            )
+            daily += len(rows)
+    return monthly, daily
+
+
+def _id_chunks(queryset, size):
+    last = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+# --- Reports ---
+def _with_rate(queryset):
+    return queryset.annotate(
+        total=F('present') + F('absent'),
+        rate=ExpressionWrapper(100.0 * F('present') / (F('present') + F('absent')), output_field=FloatField()),
+    )
+
+
+def classroom_rates(start, end, classroom_ids=None):
+    """Per-classroom present/absent totals and rate (percent) between ``start`` and ``end`` inclusive."""
+    rows = ClassroomDailyAttendance.objects.filter(date__range=(start, end))
+    if classroom_ids is not None:
+        rows = rows.filter(classroom_id__in=classroom_ids)
+    rows = rows.values('classroom_id', 'classroom__name', 'classroom__section').annotate(
+        present_sum=Sum('present'), absent_sum=Sum('absent'),
+    ).order_by('classroom__name', 'classroom__section')
+    return [
+        _rate({
+            'classroom_id': row['classroom_id'],
+            'classroom': f"{row['classroom__name']} - {row['classroom__section']}",
+            'present': row['present_sum'],
+            'absent': row['absent_sum'],
+        })
+        for row in rows
+    ]
+
+
+def classroom_trend(classroom_id, start, end):
+    """Day-by-day present/absent counts and rate for one classroom."""
+    return list(
+        _with_rate(ClassroomDailyAttendance.objects.filter(classroom_id=classroom_id, date__range=(start, end)))
+        .order_by('date').values('date', 'present', 'absent', 'total', 'rate')
+    )
+
+
+def student_rates(start, end, classroom_ids=None):
+    """
+    Per-student totals and rate over the months touching ``start``..``end``,
+    as a queryset of dicts ordered from the lowest rate up.
+    """
+    rows = StudentMonthlyAttendance.objects.filter(month__range=(month_start(start), month_start(end)))
+    if classroom_ids is not None:
+        rows = rows.filter(student__classroom_id__in=classroom_ids)
+    return rows.values('student_id', 'student__name').annotate(
+        present_sum=Sum('present'), absent_sum=Sum('absent'),
+    ).annotate(
+        rate=ExpressionWrapper(
+            100.0 * F('present_sum') / (F('present_sum') + F('absent_sum')), output_field=FloatField()
+        ),
+    ).order_by('rate', 'student__name')
+
+
+def students_below(threshold, start, end, classroom_ids=None):
+    """Students whose attendance rate (percent) is under ``threshold``."""
+    return [
+        {
+            'student_id': row['student_id'],
+            'name': row['student__name'],
+            'present': row['present_sum'],
+            'absent': row['absent_sum'],
+            'rate': round(row['rate'], 1),
+        }
+        for row in student_rates(start, end, classroom_ids).filter(rate__lt=threshold)
+    ]
+
+
+def _rate(row):
+    total = row['present'] + row['absent']
+    row['total'] = total
+    row['rate'] = round(100.0 * row['present'] / total, 1) if total else None
+    return row
+
+
+def default_period(today=None):
+    """The last 30 days up to today."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=29), today
@@ -0,0 +1,116 @@
+"""
+Per-teacher access scope.
+
+A teacher may see the classrooms that take one of their subjects and the
+students in those classrooms. Instead of re-deriving that with joins in
+every view, the id sets are computed once, cached across requests and
+memoized on the request. Views apply them as plain ``__in`` filters on
+the query that loads the data (or, for long sorted lists, as an EXISTS;
+see ``students_in_scope``), so loading and access checking share a single
+query.
+
+All cached scopes share a version number; any change that can move a
+teacher's boundaries bumps it, which invalidates every scope in O(1).
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from django.http import Http404
+
+from . import replicas
+from .models import ClassRoom, Subject, Teacher, Student
+
+VERSION_KEY = 'school:teacher-scope-version'
+SCOPE_TIMEOUT = 60 * 60
+
+
+class TeacherScope:
+    """The classroom, subject and student ids a single teacher is allowed to see."""
+    def __init__(self, teacher_id, classroom_ids, subject_ids, student_ids):
+        self.teacher_id = teacher_id
+        self.classroom_ids = frozenset(classroom_ids)
+        self.subject_ids = frozenset(subject_ids)
+        self.student_ids = frozenset(student_ids)
+
+    def students_in_scope(self, student_field='student_id'):
+        """
+        A filter for rows whose student is in scope, written as a correlated
+        EXISTS instead of a join: the planner then walks a list's own
+        ordering index and stops at the page size, where a join would make
+        it gather and sort every row in scope first.
+        """
+        return Exists(Student.objects.filter(pk=OuterRef(student_field), classroom_id__in=self.classroom_ids))
+
+    @classmethod
+    def for_user(cls, user):
+        teacher_id = Teacher.objects.filter(user_id=user.pk).values_list('id', flat=True).first()
+        if teacher_id is None:
+            return None
+        subject_ids = list(
+            Teacher.subjects.through.objects.filter(teacher_id=teacher_id).values_list('subject_id', flat=True)
+        )
+        classroom_ids = list(
+            ClassRoom.subjects.through.objects.filter(subject_id__in=subject_ids)
+            .values_list('classroom_id', flat=True).distinct()
+        )
+        student_ids = Student.objects.filter(classroom_id__in=classroom_ids).order_by().values_list('id', flat=True)
+        return cls(teacher_id, classroom_ids, subject_ids, student_ids)
+
+
+def is_teacher(user):
+    return bool(getattr(user, 'role', None)) and user.role.upper() == 'TEACHER'
+
+
+def _cache_key(user):
+    # Seeded from the clock so an evicted version can never come back as an old value.
+    version = cache.get_or_set(VERSION_KEY, time.time_ns, None)
+    return f'school:teacher-scope:{version}:{user.pk}'
+
+
+def get_teacher_scope(request):
+    """
+    Returns the TeacherScope for the requesting teacher, or None for any other role.
+    Raises Http404 when a teacher-role user has no Teacher profile.
+    """
+    if not hasattr(request, '_teacher_scope'):
+        scope = None
+        if is_teacher(request.user):
+            key = _cache_key(request.user)
+            scope = cache.get(key)
+            if scope is None:
+                with replicas.primary():  # Cached, so never built from a lagging replica
+                    scope = TeacherScope.for_user(request.user)
+                if scope is None:
+                    raise Http404("No Teacher profile is linked to this account.")
+                cache.set(key, scope, SCOPE_TIMEOUT)
+        request._teacher_scope = scope
+    return request._teacher_scope
+
+
+def invalidate_scopes():
+    """Invalidates every cached TeacherScope by moving to a new version."""
+    if not cache.add(VERSION_KEY, time.time_ns(), None):
+        cache.incr(VERSION_KEY)
+
+
+# --- Invalidation ---
+@receiver(m2m_changed, sender=ClassRoom.subjects.through)
+@receiver(m2m_changed, sender=Teacher.subjects.through)
+def subjects_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_scopes()
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=ClassRoom)
+@receiver(post_delete, sender=Subject)
+def membership_changed(sender, **kwargs):
+    # Deletes cascade through the m2m tables without sending m2m_changed,
+    # and a saved student may have moved classroom.
+    invalidate_scopes()
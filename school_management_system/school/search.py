@@ -0,0 +1,184 @@
+"""
+Indexed full-text search for the list views.
+
+On SQLite each searchable model has an FTS5 table (``<table>_fts``) whose
+rowid is the model's primary key; the receivers below keep it in sync on
+save/delete, and bulk writers call ``index_objects`` themselves. On
+PostgreSQL the same searches run against GIN indexes on a ``tsvector``
+expression and a trigram index on the raw text, which the database keeps
+up to date without any help. Other backends fall back to ``icontains``.
+
+Every whitespace-separated term must match the start of a word (prefix
+matching), so "ab ke" finds "Abebe Kebede". ``match`` returns a ``Q`` that
+keeps the search inside the caller's query as an ``IN (subquery)``;
+``ranked_ids`` returns the best matches in relevance order.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ClassRoom, Student, Subject, Teacher, User
+
+
+class SearchIndex:
+    """The text fields of one model that are searched together."""
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    def text(self, obj):
+        return ' '.join(str(getattr(obj, field) or '') for field in self.fields)
+
+    def sql_text(self):
+        """The indexed text as a SQL expression; PostgreSQL's expression indexes must match it exactly."""
+        return " || ' ' || ".join(f"coalesce({field}, '')" for field in self.fields)
+
+
+INDEXES = {
+    'student': SearchIndex(Student, ('name',)),
+    'teacher': SearchIndex(Teacher, ('name',)),
+    'subject': SearchIndex(Subject, ('name', 'code')),
+    'user': SearchIndex(User, ('username', 'first_name', 'last_name', 'email')),
+    'classroom': SearchIndex(ClassRoom, ('name', 'section')),
+}
+_KINDS_BY_MODEL = {index.model: kind for kind, index in INDEXES.items()}
+
+
+def _fts_query(q):
+    """Each term as a quoted FTS5 prefix query; quoting keeps user input from being parsed as syntax."""
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in q.split())
+
+
+def _tsquery(q):
+    return ' & '.join(f'{word}:*' for word in re.findall(r'\w+', q))
+
+
+def _like_pattern(q):
+    """``q`` as a contains-pattern for LIKE/ILIKE, with its own wildcards escaped (backslash is the default escape)."""
+    escaped = q.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _matching_ids_sql(index, q):
+    """Returns (sql, params) selecting the primary keys that match ``q``, or None when ``q`` has no terms."""
+    if connection.vendor == 'sqlite':
+        query = _fts_query(q)
+        if not query:
+            return None
+        return f'SELECT rowid FROM {index.fts_table} WHERE {index.fts_table} MATCH %s', [query]
+    if connection.vendor == 'postgresql':
+        query = _tsquery(q)
+        if not query:
+            return None
+        text = index.sql_text()
+        return (
+            f"SELECT id FROM {index.table} "
+            f"WHERE to_tsvector('simple', {text}) @@ to_tsquery('simple', %s) OR {text} ILIKE %s",
+            [query, _like_pattern(q)],
+        )
+    return None
+
+
+def match(kind, q, field='pk'):
+    """A Q restricting ``field`` (a pk or foreign key to the ``kind`` model) to rows matching ``q``."""
+    index = INDEXES[kind]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        lookups = Q()
+        for name in index.fields:
+            lookups |= Q(**{f'{name}__icontains': q})
+        return Q(**{f'{field}__in': index.model.objects.filter(lookups).values('pk')})
+    sql = _matching_ids_sql(index, q)
+    if sql is None:
+        return Q(**{f'{field}__in': []})
+    return Q(**{f'{field}__in': RawSQL(*sql)})
+
+
+def searcher(kind, field='pk'):
+    """A ListSpec ``search`` callable backed by the ``kind`` index."""
+    return lambda queryset, q: queryset.filter(match(kind, q, field))
+
+
+def ranked_ids(kind, q, limit=20):
+    """The primary keys of the best ``limit`` matches for ``q``, most relevant first."""
+    index = INDEXES[kind]
+    if connection.vendor == 'sqlite':
+        query = _fts_query(q)
+        sql = f'SELECT rowid FROM {index.fts_table} WHERE {index.fts_table} MATCH %s ORDER BY rank LIMIT %s'
+        params = [query, limit]
+    elif connection.vendor == 'postgresql':
+        query = _tsquery(q)
+        text = index.sql_text()
+        sql = (
+            f"SELECT id FROM {index.table} "
+            f"WHERE to_tsvector('simple', {text}) @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank(to_tsvector('simple', {text}), to_tsquery('simple', %s)) DESC, id LIMIT %s"
+        )
+        params = [query, query, limit]
+    else:
+        return list(index.model.objects.filter(match(kind, q)).values_list('pk', flat=True)[:limit])
+    if not query:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+# --- Index maintenance (SQLite) ---
+def index_objects(kind, objs):
+    """(Re)indexes ``objs``; bulk writers call this because bulk_create skips post_save."""
+    if connection.vendor != 'sqlite':
+        return
+    index = INDEXES[kind]
+    rows = [(obj.pk, index.text(obj)) for obj in objs]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {index.fts_table} WHERE rowid = %s', [(pk,) for pk, _ in rows])
+        cursor.executemany(f'INSERT INTO {index.fts_table} (rowid, text) VALUES (%s, %s)', rows)
+
+
+def unindex(kind, pk):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {INDEXES[kind].fts_table} WHERE rowid = %s', [pk])
+
+
+def rebuild():
+    """Repopulates every FTS table from its source table. Returns {kind: rows indexed}."""
+    if connection.vendor != 'sqlite':
+        return {}
+    counts = {}
+    with connection.cursor() as cursor:
+        for kind, index in INDEXES.items():
+            cursor.execute(f'DELETE FROM {index.fts_table}')
+            cursor.execute(f'INSERT INTO {index.fts_table} (rowid, text) SELECT id, {index.sql_text()} FROM {index.table}')
+            counts[kind] = cursor.rowcount
+            cursor.execute(f"INSERT INTO {index.fts_table} ({index.fts_table}) VALUES ('optimize')")
+    return counts
+
+
+@receiver(post_save)
+def object_saved(sender, instance, raw=False, **kwargs):
+    kind = _KINDS_BY_MODEL.get(sender)
+    if kind and not raw:
+        index_objects(kind, [instance])
+
+
+@receiver(post_delete)
+def object_deleted(sender, instance, **kwargs):
+    kind = _KINDS_BY_MODEL.get(sender)
+    if kind:
+        unindex(kind, instance.pk)
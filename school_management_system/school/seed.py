@@ -0,0 +1,175 @@
+"""
+Deterministic synthetic school data for benchmarks and local development.
+
+The same seed and sizes always produce the same rows. Everything is
+written with ``bulk_create`` in batches, so receivers do not run per row;
+the counters, attendance rollups, search index, teacher scopes and cached
+list tables are rebuilt or invalidated once at the end instead. All
+accounts share one password, hashed once.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import counters, fragments, rollups, search
+from .grading import DEFAULT_BANDS
+from .models import Attendance, ClassRoom, Fee, Grade, Student, Subject, Teacher, User
+from .scope import invalidate_scopes
+
+SEED_ADMIN = 'seed_admin'
+DEFAULT_PASSWORD = 'seed-pass-123'
+BATCH_SIZE = 5000
+
+FIRST_NAMES = [
+    'Abebe', 'Almaz', 'Biniam', 'Bethlehem', 'Dawit', 'Eden', 'Fikru', 'Genet', 'Haile', 'Hanna',
+    'Kebede', 'Kidist', 'Lemlem', 'Meron', 'Mulugeta', 'Naod', 'Rahel', 'Samuel', 'Selam', 'Tigist',
+    'Tsegaye', 'Yonas', 'Yordanos', 'Zewdu', 'Liya', 'Mekdes', 'Robel', 'Saron', 'Tewodros', 'Hiwot',
+]
+SUBJECT_NAMES = [
+    ('Mathematics', 'MATH'), ('English', 'ENG'), ('Amharic', 'AMH'), ('Physics', 'PHY'),
+    ('Chemistry', 'CHEM'), ('Biology', 'BIO'), ('History', 'HIST'), ('Geography', 'GEO'),
+    ('Civics', 'CIV'), ('Information Technology', 'IT'), ('Physical Education', 'PE'), ('Art', 'ART'),
+]
+class SeedError(Exception):
+    """Raised when the database already holds a seeded school."""
+
+
+def letter_for(marks):
+    return next(letter for floor, letter in DEFAULT_BANDS if marks >= floor)
+
+
+def _subject_name(i):
+    name, _ = SUBJECT_NAMES[i % len(SUBJECT_NAMES)]
+    return name if i < len(SUBJECT_NAMES) else f'{name} {i // len(SUBJECT_NAMES) + 1}'
+
+
+def school_days(end, years):
+    day, start = end, end - timedelta(days=365 * years)
+    days = []
+    while day > start:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def seed_school(classrooms=12, subjects=10, teachers=20, students_per_classroom=30, subjects_per_classroom=6,
+                years=1, seed=42, end_date=date(2025, 6, 30), password=DEFAULT_PASSWORD, log=None):
+    """
+    Creates a complete school and returns a dict of row counts per table.
+    ``log`` is an optional callable for progress messages.
+    """
+    log = log or (lambda message: None)
+    if User.objects.filter(username=SEED_ADMIN).exists():
+        raise SeedError("A seeded school already exists in this database.")
+    rnd = random.Random(seed)
+    password_hash = make_password(password)
+    counts = {}
+
+    def name():
+        return f"{rnd.choice(FIRST_NAMES)} {rnd.choice(FIRST_NAMES)}"
+
+    with transaction.atomic():
+        User.objects.create(username=SEED_ADMIN, password=password_hash, role='ADMIN', is_staff=True)
+
+        subject_rows = Subject.objects.bulk_create(
+            Subject(name=_subject_name(i), code=f'{SUBJECT_NAMES[i % len(SUBJECT_NAMES)][1]}{101 + i}')
+            for i in range(subjects)
+        )
+        classroom_rows = ClassRoom.objects.bulk_create(
+            ClassRoom(name=f'Grade {1 + i // 3}', section='ABC'[i % 3]) for i in range(classrooms)
+        )
+        classroom_subjects = {
+            classroom.pk: rnd.sample(subject_rows, min(subjects_per_classroom, len(subject_rows)))
+            for classroom in classroom_rows
+        }
+        ClassRoom.subjects.through.objects.bulk_create(
+            ClassRoom.subjects.through(classroom_id=classroom_id, subject_id=subject.pk)
+            for classroom_id, chosen in classroom_subjects.items() for subject in chosen
+        )
+        counts.update(subjects=len(subject_rows), classrooms=len(classroom_rows))
+        log(f"{len(classroom_rows)} classrooms, {len(subject_rows)} subjects")
+
+        teacher_users = User.objects.bulk_create(
+            User(username=f'teacher{i:04d}', password=password_hash, role='TEACHER') for i in range(teachers)
+        )
+        teacher_rows = Teacher.objects.bulk_create(
+            Teacher(user=user, name=name(), gender=rnd.choice(['Male', 'Female']), contact=f'09{rnd.randrange(10**8):08d}')
+            for user in teacher_users
+        )
+        # Every subject gets a teacher; two in three teachers take a second subject.
+        pairs = sorted({
+            (teacher.pk, subject_rows[(i + offset) % len(subject_rows)].pk)
+            for i, teacher in enumerate(teacher_rows) for offset in (0, 1)
+            if subject_rows and (offset == 0 or i % 3)
+        })
+        Teacher.subjects.through.objects.bulk_create(
+            Teacher.subjects.through(teacher_id=teacher_id, subject_id=subject_id) for teacher_id, subject_id in pairs
+        )
+        counts['teachers'] = len(teacher_rows)
+        log(f"{len(teacher_rows)} teachers")
+
+        student_users = User.objects.bulk_create(
+            (User(username=f'student{i:05d}', password=password_hash, role='STUDENT')
+             for i in range(classrooms * students_per_classroom)),
+            batch_size=BATCH_SIZE,
+        )
+        student_rows = Student.objects.bulk_create(
+            (Student(user=user, name=name(), age=6 + i // (3 * students_per_classroom) + rnd.randrange(2),
+                     gender=rnd.choice(['Male', 'Female']), parent_contact=f'09{rnd.randrange(10**8):08d}',
+                     classroom=classroom_rows[i // students_per_classroom])
+             for i, user in enumerate(student_users)),
+            batch_size=BATCH_SIZE,
+        )
+        counts['students'] = len(student_rows)
+        log(f"{len(student_rows)} students")
+
+        days = school_days(end_date, years)
+        counts['attendance'] = _bulk_insert(Attendance, (
+            Attendance(student=student, date=day, status='Present' if rnd.random() < presence else 'Absent')
+            for student, presence in ((student, rnd.uniform(0.6, 0.99)) for student in student_rows)
+            for day in days
+        ))
+        log(f"{counts['attendance']} attendance records over {len(days)} school days")
+
+        def grade(student, subject):
+            marks = round(min(100.0, max(0.0, rnd.gauss(72, 14))), 1)
+            return Grade(student=student, subject=subject, marks=marks, grade=letter_for(marks))
+        counts['grades'] = _bulk_insert(Grade, (
+            grade(student, subject)
+            for student in student_rows for subject in classroom_subjects[student.classroom_id]
+        ))
+        log(f"{counts['grades']} grades")
+
+        terms = [f'{end_date.year - years + year + 1}-T{term}' for year in range(years) for term in (1, 2, 3)]
+        counts['fees'] = _bulk_insert(Fee, (
+            Fee(student=student, amount=Decimal(rnd.choice([1500, 1750, 2000])),
+                status='Paid' if rnd.random() < 0.8 else 'Unpaid', term=term)
+            for student in student_rows for term in terms
+        ))
+        log(f"{counts['fees']} fees")
+
+    counters.reconcile()
+    rollups.rebuild()
+    search.rebuild()
+    invalidate_scopes()
+    fragments.bump_all()
+    return counts
+
+
+def _bulk_insert(model, objs):
+    """Writes a generator of unsaved instances in batches without materializing it; returns the row count."""
+    total, batch = 0, []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        total += len(batch)
+    return total
@@ -4,4 +4,7 @@ register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    # Load the user's group names once and reuse them for every check in the request
+    if not hasattr(user, '_group_names'):
+        user._group_names = set(user.groups.values_list('name', flat=True))
+    return group_name in user._group_names
@@ -0,0 +1,15 @@
+from django import template
+
+from school import photos
+
+register = template.Library()
+
+@register.inclusion_tag('school/student_photo.html')
+def student_photo(student, size, width=None, css_class=''):
+    """A <picture> with the WebP and JPEG variants of one size; the original until the photo is processed."""
+    return {
+        'student': student,
+        'urls': photos.urls(student, size),
+        'width': width or photos.SIZES[size] // 2,
+        'css_class': css_class,
+    }
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import autocomplete
+from school.models import ClassRoom, Grade, Student, Subject, Teacher
+
+User = get_user_model()
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.art = Subject.objects.create(name='Art', code='ART101')
+        self.mine = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.other = ClassRoom.objects.create(name='Grade 6', section='B')
+        self.mine.subjects.add(self.math)
+        self.other.subjects.add(self.art)
+        self.abebe = self.make_student('Abebe Kebede', self.mine)
+        self.almaz = self.make_student('Almaz Bekele', self.other)
+
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        teacher_user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        Teacher.objects.create(user=teacher_user, name='Ms. T', gender='Female').subjects.add(self.math)
+        self.teacher = teacher_user
+
+    def make_student(self, name, classroom):
+        return Student.objects.create(user=User.objects.create(username=name.split()[0].lower()), name=name,
+                                      age=11, gender='Female', classroom=classroom)
+
+    def options(self, kind, q=''):
+        response = self.client.get(reverse('school:autocomplete', args=[kind]), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['text'] for row in response.json()['results']]
+
+    def test_prefix_search_scoped_to_the_teacher(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.options('student', 'a'), ['Abebe Kebede (Grade 5 - A)', 'Almaz Bekele (Grade 6 - B)'])
+        self.assertEqual(self.options('student', 'bek'), ['Almaz Bekele (Grade 6 - B)'])
+        self.assertEqual(self.options('classroom', 'grade 6'), ['Grade 6 - B'])
+        self.assertEqual(self.options('user', 'alm'), ['almaz'])
+
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.options('student', 'a'), ['Abebe Kebede (Grade 5 - A)'])
+        self.assertEqual(self.options('classroom'), ['Grade 5 - A'])
+        self.assertEqual(self.options('subject'), ['Mathematics'])
+        self.assertEqual(self.client.get(reverse('school:autocomplete', args=['user'])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('school:autocomplete', args=['fee'])).status_code, 404)
+
+    def test_pages_are_bounded(self):
+        classroom = ClassRoom.objects.create(name='Grade 7', section='C')
+        for i in range(autocomplete.PAGE_SIZE + 1):
+            self.make_student(f'Student{i} Tesfaye', classroom)
+        self.client.force_login(self.admin)
+        data = self.client.get(reverse('school:autocomplete', args=['student']), {'q': 'tesf'}).json()
+        self.assertEqual((len(data['results']), data['more']), (autocomplete.PAGE_SIZE, True))
+
+    def test_forms_render_only_the_selected_option(self):
+        grade = Grade.objects.create(student=self.abebe, subject=self.math, marks=88)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('school:grade_create'))
+        self.assertNotContains(response, 'Almaz')
+        self.assertContains(response, reverse('school:autocomplete', args=['student']))
+
+        response = self.client.get(reverse('school:grade_update', args=[grade.pk]))
+        self.assertContains(response, 'selected>Abebe Kebede (Grade 5 - A)</option>', html=False)
+        self.assertNotContains(response, 'Almaz')
+
+        response = self.client.get(reverse('school:student_update', args=[self.abebe.pk]))
+        self.assertContains(response, '<option value="%d" selected>abebe</option>' % self.abebe.user_id, html=True)
+        self.assertNotContains(response, 'almaz')
+
+    def test_submissions_check_the_submitted_id_against_the_scope(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('school:grade_create'), {
+            'student': self.almaz.pk, 'subject': self.math.pk, 'marks': 70,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('student', response.context['form'].errors)
+
+        response = self.client.post(reverse('school:grade_create'), {
+            'student': self.abebe.pk, 'subject': self.math.pk, 'marks': 70,
+        })
+        self.assertRedirects(response, reverse('school:grade_list'))
+        self.assertEqual(Grade.objects.get().grade, 'C')
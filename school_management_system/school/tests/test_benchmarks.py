@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+
+from school import benchmarks, seed
+from school.models import Attendance, ClassroomDailyAttendance, Counter, Fee, Grade, Student
+
+SMALL = dict(classrooms=3, subjects=5, teachers=4, students_per_classroom=30, subjects_per_classroom=3)
+
+
+def snapshot():
+    return (
+        list(Student.objects.order_by('user__username').values_list('name', 'age', 'classroom__name', 'classroom__section')),
+        list(Grade.objects.order_by('student__user__username', 'subject__code').values_list('marks', flat=True)),
+    )
+
+
+class SeedSchoolTest(TestCase):
+    def test_seed_is_deterministic_and_complete(self):
+        with transaction.atomic():
+            counts = seed.seed_school(**SMALL)
+            first = snapshot()
+            transaction.set_rollback(True)
+
+        seed.seed_school(**SMALL)
+        self.assertEqual(snapshot(), first)
+        self.assertEqual(counts['students'], 90)
+        self.assertEqual(Student.objects.count(), 90)
+        self.assertEqual(Grade.objects.count(), 90 * 3)
+        self.assertEqual(Fee.objects.count(), 90 * 3)
+        self.assertEqual(Attendance.objects.count(), counts['attendance'])
+        self.assertTrue(ClassroomDailyAttendance.objects.exists())
+        self.assertEqual(Counter.objects.get(name='students').value, 90)
+
+        with self.assertRaises(CommandError):
+            call_command('seed_school', stdout=StringIO())
+
+
+class QueryBudgetTest(TestCase):
+    """Every benchmarked view must stay within its query budget; latency is left to benchmark_views."""
+    @classmethod
+    def setUpTestData(cls):
+        seed.seed_school(**SMALL)
+
+    def test_views_within_query_budgets(self):
+        results = benchmarks.run(repeat=1)
+        self.assertEqual(len(results), len(benchmarks.CASES))
+        self.assertEqual(benchmarks.violations(results, check_latency=False), [])
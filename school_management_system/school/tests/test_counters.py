@@ -0,0 +1,54 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import counters
+from school.models import ClassRoom, Student, Subject, Counter
+
+User = get_user_model()
+
+class CounterSignalTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_follow_creates_and_deletes(self):
+        classroom = ClassRoom.objects.create(name='Grade 8', section='A')
+        user = User.objects.create_user(username='student', password='pass1234')
+        student = Student.objects.create(user=user, name='Liya', age=14, gender='Female', classroom=classroom)
+        Subject.objects.create(name='Biology', code='BIO101')
+
+        counts = counters.get_counts()
+        self.assertEqual(counts['classrooms'], 1)
+        self.assertEqual(counts['students'], 1)
+        self.assertEqual(counts['subjects'], 1)
+        self.assertEqual(counts['users'], 1)
+
+        user.delete()  # cascades to the student
+        counts = counters.get_counts()
+        self.assertEqual(counts['students'], 0)
+        self.assertEqual(counts['users'], 0)
+        self.assertEqual(student.classroom.pk, classroom.pk)
+
+    def test_reconcile_repairs_drift(self):
+        self.assertEqual(counters.get_counts()['classrooms'], 0)
+        ClassRoom.objects.bulk_create([ClassRoom(name='Grade 9', section=s) for s in 'ABC'])  # no signals
+        self.assertEqual(counters.get_counts()['classrooms'], 0)
+        call_command('reconcile_counters', stdout=open('/dev/null', 'w'))
+        self.assertEqual(counters.get_counts()['classrooms'], 3)
+        self.assertEqual(Counter.objects.get(name='classrooms').value, 3)
+
+class DashboardCounterQueryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.force_login(self.admin)
+
+    def test_dashboard_data_does_not_count_tables(self):
+        ClassRoom.objects.bulk_create([ClassRoom(name='Grade 10', section=s) for s in 'ABCDE'])
+        counters.reconcile()
+        with self.assertNumQueries(3):  # session, user, recent users
+            response = self.client.get(reverse('school:admin_dashboard_data'))
+        self.assertEqual(response.json()['classes_count'], 5)
+        self.assertEqual(response.json()['users_count'], 1)
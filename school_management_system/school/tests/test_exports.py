@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import date
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school.models import ClassRoom, Subject, Teacher, Student, Attendance, Grade
+
+User = get_user_model()
+
+class ExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.class_a = ClassRoom.objects.create(name='Grade 7', section='A')
+        self.class_b = ClassRoom.objects.create(name='Grade 7', section='B')
+        self.class_a.subjects.add(self.math)
+        self.alice = Student.objects.create(
+            user=User.objects.create(username='alice'), name='Alice', age=13, gender='Female', classroom=self.class_a)
+        self.bob = Student.objects.create(
+            user=User.objects.create(username='bob'), name='Bob', age=13, gender='Male', classroom=self.class_b)
+        for day in (1, 2, 3):
+            Attendance.objects.create(student=self.alice, date=date(2025, 3, day), status='Present')
+            Attendance.objects.create(student=self.bob, date=date(2025, 3, day), status='Absent')
+        Grade.objects.create(student=self.alice, subject=self.math, marks=91, grade='A')
+
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.teacher_user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        Teacher.objects.create(user=self.teacher_user, name='Ms. Tigist', gender='Female').subjects.add(self.math)
+
+    def _get(self, dataset, **params):
+        response = self.client.get(reverse('school:export_data', args=[dataset]), params)
+        body = b''.join(response.streaming_content)
+        return response, body
+
+    def test_attendance_csv_with_date_range(self):
+        self.client.force_login(self.admin)
+        response, body = self._get('attendance', date_from='2025-03-02', date_to='2025-03-03')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.decode().splitlines()
+        self.assertEqual(lines[0], 'student_id,student,classroom,section,date,status')
+        self.assertEqual(len(lines), 5)
+
+    def test_teacher_export_is_scoped(self):
+        self.client.force_login(self.teacher_user)
+        _, body = self._get('attendance', format='jsonl')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual({row['student'] for row in rows}, {'Alice'})
+
+    def test_gzip_grades(self):
+        self.client.force_login(self.admin)
+        response, body = self._get('grades', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz', response['Content-Disposition'])
+        self.assertIn('Alice,Grade 7,A,MATH101,Mathematics,91.0,A', gzip.decompress(body).decode())
+
+    def test_bad_params_and_unknown_dataset(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('school:export_data', args=['attendance']), {'date_from': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('school:export_data', args=['salaries'])).status_code, 404)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'roster.csv')
+            call_command('export_data', 'roster', '--classroom', str(self.class_b.pk), '--output', path)
+            with open(path) as fh:
+                lines = fh.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Bob', lines[1])
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import fees
+from school.models import ClassRoom, Fee, Student
+
+User = get_user_model()
+
+class FeeEngineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_a = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.class_b = ClassRoom.objects.create(name='Grade 5', section='B')
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'student{i}'), name=f'Student {i}',
+                                   age=11, gender='Female', classroom=classroom)
+            for i, classroom in enumerate([self.class_a, self.class_a, self.class_b])
+        ]
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+
+    def test_billing_a_term_is_one_insert_and_idempotent(self):
+        with self.assertNumQueries(6):  # savepoint, students not yet billed, one insert counted before and after
+            self.assertEqual(fees.bill_term('2025-T1', Decimal('1500.00'), [self.class_a.pk]), 2)
+        self.assertEqual(fees.bill_term('2025-T1', Decimal('1500.00'), [self.class_a.pk, self.class_b.pk]), 1)
+        self.assertEqual(Fee.objects.filter(term='2025-T1').count(), 3)
+        self.assertEqual(fees.bill_term('2025-T1', Decimal('1500.00'), [self.class_a.pk, self.class_b.pk]), 0)
+
+    def test_balances(self):
+        fees.bill_term('2025-T1', Decimal('1500.00'), [self.class_a.pk, self.class_b.pk])
+        fees.bill_term('2025-T2', Decimal('1000.00'), [self.class_a.pk])
+        fees.mark_paid(Fee.objects.filter(student=self.students[0], term='2025-T1').values_list('pk', flat=True))
+
+        with self.assertNumQueries(1):
+            balance = fees.student_balance(self.students[0].pk)
+        self.assertEqual(balance, {'billed': Decimal('2500.00'), 'paid': Decimal('1500.00'),
+                                   'outstanding': Decimal('1000.00')})
+        self.assertEqual(fees.student_balance(self.students[-1].pk + 1)['outstanding'], Decimal('0.00'))
+
+        with self.assertNumQueries(1):
+            school = fees.school_outstanding()
+        self.assertEqual(school, {'outstanding': Decimal('5000.00'), 'fees': 4, 'students': 3})
+        classrooms = {row['student__classroom_id']: row for row in fees.classroom_balances()}
+        self.assertEqual(classrooms[self.class_a.pk]['outstanding'], Decimal('3500.00'))
+        self.assertEqual(classrooms[self.class_a.pk]['owing'], 2)
+        self.assertEqual(classrooms[self.class_b.pk]['paid'], Decimal('0.00'))
+
+        with self.assertNumQueries(0):  # Cached until fees change
+            fees.school_outstanding()
+            fees.classroom_balances()
+        fees.mark_paid(Fee.objects.filter(student=self.students[2]).values_list('pk', flat=True))
+        self.assertEqual(fees.school_outstanding()['outstanding'], Decimal('3500.00'))
+
+    def test_views(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('school:fee_bill_term'), {
+            'term': '2025-T1', 'amount': '1500.00', 'classrooms': [self.class_a.pk],
+        })
+        self.assertRedirects(response, reverse('school:fee_balances'))
+        self.assertContains(self.client.get(reverse('school:fee_balances')), '3000.00')
+        self.assertContains(self.client.get(reverse('school:fee_balances'), {'classroom': self.class_a.pk}), 'Student 1')
+        self.assertEqual(self.client.get(reverse('school:fee_balances'), {'format': 'json'}).json()['school']['fees'], 2)
+
+        fee = Fee.objects.filter(student=self.students[0]).get()
+        list_url = reverse('school:fee_list') + '?status=Unpaid'
+        self.assertContains(self.client.get(list_url), 'Mark paid', count=2)
+        response = self.client.post(reverse('school:fee_mark_paid', args=[fee.pk]), {'next': list_url})
+        self.assertRedirects(response, list_url)
+        self.assertContains(self.client.get(list_url), 'Mark paid', count=1)
+        self.assertContains(self.client.get(reverse('school:student_detail', args=[self.students[1].pk])),
+                            '1500.00 outstanding')
+
+    def test_only_admins_manage_fees(self):
+        self.client.force_login(self.students[0].user)
+        self.assertNotEqual(self.client.get(reverse('school:fee_balances')).status_code, 200)
+        self.client.post(reverse('school:fee_bill_term'), {'term': '2025-T1', 'amount': '1500.00',
+                                                          'classrooms': [self.class_a.pk]})
+        self.assertEqual(Fee.objects.count(), 0)
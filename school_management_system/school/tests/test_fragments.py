@@ -0,0 +1,88 @@
+from django.test import TestCase, RequestFactory
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import fragments
+from school.forms import RollCallForm
+from school.models import ClassRoom, Subject, Teacher, Student, Grade
+
+User = get_user_model()
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.class_a = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.class_b = ClassRoom.objects.create(name='Grade 5', section='B')
+        self.class_a.subjects.add(self.math)
+
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.teacher_user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        teacher = Teacher.objects.create(user=self.teacher_user, name='Mr. Abebe', gender='Male')
+        teacher.subjects.add(self.math)
+
+        self.sara = Student.objects.create(
+            user=User.objects.create(username='sa'), name='Sara', age=11, gender='Female', classroom=self.class_a)
+        self.kebede = Student.objects.create(
+            user=User.objects.create(username='sb'), name='Kebede', age=11, gender='Male', classroom=self.class_b)
+        Grade.objects.create(student=self.sara, subject=self.math, marks=88, grade='B')
+        Grade.objects.create(student=self.kebede, subject=self.math, marks=71, grade='C')
+
+    def _key(self, user, table='grade_list', **params):
+        request = self.factory.get('/', params)
+        request.user = user
+        return fragments.table_key(request, table)
+
+    def test_cache_hit_skips_page_query(self):
+        self.client.force_login(self.admin)
+        url = reverse('school:grade_list')
+        self.client.get(url)
+        with self.assertNumQueries(2):  # session, user
+            response = self.client.get(url)
+        self.assertContains(response, 'Kebede')
+
+    def test_save_invalidates_table(self):
+        self.client.force_login(self.admin)
+        url = reverse('school:student_list')
+        self.client.get(url)
+        before = self._key(self.admin, 'student_list')
+        self.sara.name = 'Saron'
+        self.sara.save()
+        self.assertNotEqual(self._key(self.admin, 'student_list'), before)
+        self.assertContains(self.client.get(url), 'Saron')
+
+    def test_delete_invalidates_table(self):
+        self.client.force_login(self.admin)
+        url = reverse('school:grade_list')
+        self.assertContains(self.client.get(url), 'Kebede')
+        Grade.objects.filter(student=self.kebede).delete()  # queryset delete still sends post_delete
+        self.assertNotContains(self.client.get(url), 'Kebede')
+
+    def test_roll_call_bumps_attendance(self):
+        before = self._key(self.admin, 'attendance_list')
+        form = RollCallForm({'date': '2025-03-03', f'status_{self.sara.pk}': 'Absent'}, students=[self.sara])
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertNotEqual(self._key(self.admin, 'attendance_list'), before)
+
+    def test_scope_and_params_are_part_of_the_key(self):
+        self.assertNotEqual(self._key(self.admin), self._key(self.teacher_user))
+        self.assertNotEqual(self._key(self.admin), self._key(self.admin, subject=self.math.pk))
+        self.assertEqual(self._key(self.admin, a='1', b='2'), self._key(self.admin, b='2', a='1'))
+
+    def test_roles_do_not_share_fragments(self):
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get(reverse('school:grade_list')), 'Kebede')
+        self.client.force_login(self.teacher_user)
+        response = self.client.get(reverse('school:grade_list'))
+        self.assertContains(response, 'Sara')
+        self.assertNotContains(response, 'Kebede')
+
+    def test_delete_form_is_outside_cached_fragment(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('school:student_list'))
+        response = self.client.get(reverse('school:student_list'))
+        self.assertContains(response, 'csrfmiddlewaretoken', count=2)  # logout form, delete form
+        self.assertContains(response, reverse('school:student_delete', args=[self.sara.pk]))
@@ -0,0 +1,66 @@
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from school.gradebook import Gradebook
+from school.models import ClassRoom, Grade, Student, Subject, Teacher
+
+User = get_user_model()
+
+
+class GradebookTest(TestCase):
+    def setUp(self):
+        self.classroom = ClassRoom.objects.create(name='Grade 9', section='A')
+        self.other = ClassRoom.objects.create(name='Grade 9', section='B')
+        self.math = Subject.objects.create(name='Mathematics', code='MATH')
+        self.bio = Subject.objects.create(name='Biology', code='BIO')
+        self.students = {}
+        for name, classroom in [('Selam', self.classroom), ('Abebe', self.classroom), ('Kidus', self.classroom), ('Other', self.other)]:
+            self.students[name] = Student.objects.create(
+                user=User.objects.create(username=name.lower()), name=name, age=15, gender='Male', classroom=classroom,
+            )
+        marks = {('Selam', self.math): 90, ('Selam', self.bio): 70, ('Abebe', self.math): 60,
+                 ('Abebe', self.bio): 100, ('Kidus', self.math): 75, ('Other', self.math): 10}
+        for (name, subject), value in marks.items():
+            Grade.objects.create(student=self.students[name], subject=subject, marks=value, grade='A')
+
+    def test_pivot_and_statistics(self):
+        book = Gradebook.for_classrooms([self.classroom.pk])
+        self.assertEqual(book.student_names, ['Abebe', 'Kidus', 'Selam'])
+        self.assertEqual(book.subject_labels, ['BIO', 'MATH'])
+        self.assertTrue(np.isnan(book.marks[1, 0]))  # Kidus has no Biology grade
+
+        stats = book.subject_stats()
+        np.testing.assert_allclose(stats['mean'], [85, 75])
+        np.testing.assert_allclose(stats['median'], [85, 75])
+        np.testing.assert_allclose(stats['std'], [15, np.std([90, 60, 75])])
+        np.testing.assert_array_equal(stats['count'], [2, 3])
+        # Averages 80, 75, 80: the tie shares first place.
+        self.assertEqual(book.student_ranks().tolist(), [1, 3, 1])
+
+    def test_json_view_uses_one_grade_query(self):
+        admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('school:classroom_gradebook', args=[self.classroom.pk]), {'format': 'json'}).json()
+        self.assertEqual(sum('"school_grade"' in query['sql'] for query in ctx.captured_queries), 1)
+        self.assertEqual([student['name'] for student in data['students']], ['Abebe', 'Kidus', 'Selam'])
+        self.assertEqual(data['students'][1]['marks'], [None, 75.0])
+        self.assertEqual(data['subjects'][0]['code'], 'BIO')
+
+        response = self.client.get(reverse('school:gradebook'))
+        self.assertContains(response, 'Other')
+
+    def test_teacher_only_sees_own_classrooms(self):
+        user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        teacher = Teacher.objects.create(user=user, name='Teacher', gender='Female', contact='0911')
+        teacher.subjects.add(self.math)
+        self.other.subjects.add(self.math)
+        self.client.force_login(user)
+
+        self.assertEqual(self.client.get(reverse('school:classroom_gradebook', args=[self.classroom.pk])).status_code, 404)
+        data = self.client.get(reverse('school:gradebook'), {'format': 'json'}).json()
+        self.assertEqual([student['name'] for student in data['students']], ['Other'])
@@ -0,0 +1,77 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+
+from school import grading
+from school.models import ClassRoom, Grade, GradingScale, Student, Subject
+
+User = get_user_model()
+
+
+class GradingScaleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        classroom = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.art = Subject.objects.create(name='Art', code='ART101')
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'student{i}'), name=f'Student {i}', age=11,
+                                   gender='Female', classroom=classroom)
+            for i in range(4)
+        ]
+
+    def _grades(self, subject, marks):
+        return [Grade.objects.create(student=student, subject=subject, marks=value, grade='?')
+                for student, value in zip(self.students, marks)]
+
+    def letters(self, subject):
+        return list(Grade.objects.filter(subject=subject).order_by('student__name').values_list('grade', flat=True))
+
+    def test_letter_is_derived_on_save(self):
+        grade = Grade.objects.create(student=self.students[0], subject=self.math, marks=85, grade='A')
+        self.assertEqual(grade.grade, 'B')  # Built-in bands until a scale is configured
+        grade.marks = 90
+        grade.save()
+        self.assertEqual(Grade.objects.get(pk=grade.pk).grade, 'A')
+        self.assertEqual(list(grading.Bands(grading.DEFAULT_BANDS).letters_for([100, 60, 59.9, -1])), ['A', 'D', 'F', 'F'])
+
+    def test_changing_a_scale_recomputes_its_grades(self):
+        self._grades(self.math, [95, 75, 55, 85])
+        self._grades(self.art, [95, 75, 55, 85])
+        with self.captureOnCommitCallbacks(execute=True):
+            school = GradingScale.objects.create(name='School', bands=[[50, 'P'], [0, 'F']])
+        self.assertEqual(self.letters(self.math), ['P', 'P', 'P', 'P'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GradingScale.objects.create(name='Art', subject=self.art, bands=[[80, 'H'], [60, 'M'], [0, 'L']])
+        self.assertEqual(self.letters(self.art), ['H', 'M', 'L', 'H'])
+        self.assertEqual(self.letters(self.math), ['P', 'P', 'P', 'P'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            school.bands = [[60, 'P'], [0, 'F']]
+            school.save()
+        self.assertEqual(self.letters(self.math), ['P', 'P', 'F', 'P'])
+        self.assertEqual(self.letters(self.art), ['H', 'M', 'L', 'H'])  # Governed by its own scale
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GradingScale.objects.get(subject=self.art).delete()
+        self.assertEqual(self.letters(self.art), ['P', 'P', 'F', 'P'])
+
+    def test_recompute_updates_only_stale_rows_in_chunks(self):
+        self._grades(self.math, [95, 75, 55, 85])
+        Grade.objects.filter(marks=55).update(marks=92)  # Bypasses save(), so the letter is stale
+        with self.assertNumQueries(3):  # two chunks, one update; the scales are cached
+            self.assertEqual(grading.recompute(chunk_size=3), 1)
+        self.assertEqual(self.letters(self.math), ['A', 'C', 'A', 'B'])
+        self.assertEqual(grading.recompute(chunk_size=4), 0)
+
+    def test_validation(self):
+        self.assertEqual(grading.validate_bands([[0, 'F'], [50.5, 'P']]), [[50.5, 'P'], [0, 'F']])
+        for bands in ([], [[50, 'P']], [[0, 'F'], [0, 'G']], [[0, 'TOO']], 'A'):
+            with self.assertRaises(ValueError):
+                grading.validate_bands(bands)
+        GradingScale.objects.create(name='School', bands=grading.DEFAULT_BANDS)
+        with self.assertRaises(ValidationError):
+            GradingScale(name='Another', bands=grading.DEFAULT_BANDS).full_clean()
+        GradingScale(name='Maths', subject=self.math, bands=grading.DEFAULT_BANDS).full_clean()
@@ -0,0 +1,104 @@
+import csv
+import io
+import os
+import tempfile
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import counters
+from school.importers import ImportFormatError, import_students, read_csv
+from school.models import ClassRoom, Student
+
+User = get_user_model()
+
+ROSTER = (
+    "username,name,age,gender,classroom,section,email\n"
+    "s001,Abel Tesfaye,12,male,Grade 6,a,abel@example.com\n"
+    "s002,Hana Bekele,11,Female,Grade 6,A,\n"
+    "s003,Bad Age,twelve,Male,Grade 6,A,\n"
+    "s004,Lost Student,12,Male,Grade 9,Z,\n"
+    "s001,Duplicate,12,Male,Grade 6,A,\n"
+    "taken,Existing User,12,Male,Grade 6,A,\n"
+)
+
+class StudentImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.classroom = ClassRoom.objects.create(name='Grade 6', section='A')
+        User.objects.create_user(username='taken', password='pass1234')
+
+    def _rows(self, text=ROSTER):
+        return read_csv(io.BytesIO(text.encode()))
+
+    def test_valid_rows_are_created_and_invalid_rows_reported(self):
+        counters.get_counts()  # seed the counters before the bulk insert
+        result = import_students(self._rows(), chunk_size=2)
+        self.assertEqual(result.rows, 6)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([row for row, _ in result.errors], [4, 5, 6, 7])
+
+        student = Student.objects.select_related('user').get(name='Abel Tesfaye')
+        self.assertEqual(student.classroom, self.classroom)
+        self.assertEqual(student.gender, 'Male')
+        self.assertEqual(student.user.role, 'STUDENT')
+        self.assertTrue(student.user.force_password_change)
+        self.assertFalse(student.user.has_usable_password())
+        self.assertEqual(counters.get_counts()['students'], 2)
+
+    def test_dry_run_writes_nothing(self):
+        result = import_students(self._rows(), dry_run=True)
+        self.assertEqual(result.created, 2)
+        self.assertFalse(Student.objects.exists())
+
+    def test_queries_scale_with_chunks_not_rows(self):
+        counters.get_counts()
+        header = "username,name,age,gender,classroom,section\n"
+        body = ''.join(f"u{i},Student {i},12,Male,Grade 6,A\n" for i in range(500))
+        with CaptureQueriesContext(connection) as ctx:
+            import_students(self._rows(header + body), chunk_size=250)
+        self.assertEqual(Student.objects.count(), 500)
+        self.assertLess(len(ctx.captured_queries), 40)
+
+    def test_out_of_range_ages_are_row_errors(self):
+        header = "username,name,age,gender,classroom,section\n"
+        body = ''.join(f"a{i},Student {i},{age},Male,Grade 6,A\n"
+                       for i, age in enumerate(['inf', '1e999', 'nan', '-1', '3000000000', '12']))
+        result = import_students(self._rows(header + body))
+        self.assertEqual([row for row, _ in result.errors], [2, 3, 4, 5, 6])
+        self.assertEqual(result.created, 1)
+
+    def test_unreadable_files_are_format_errors(self):
+        latin1 = "username,name,age,gender,classroom,section\nz1,Zoë Café,12,Female,Grade 6,A\n".encode('cp1252')
+        with self.assertRaisesMessage(ImportFormatError, 'UTF-8'):
+            import_students(read_csv(io.BytesIO(latin1)))
+        admin = User.objects.create_superuser(username='root', password='pass1234')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:school_student_import'), {
+            'file': SimpleUploadedFile('roster.csv', latin1, content_type='text/csv'), 'dry_run': '',
+        })
+        self.assertContains(response, 'not UTF-8')
+        with self.assertRaises(ImportFormatError):
+            list(self._rows(f'username,name,age,gender,classroom,section\nx,{"y" * (csv.field_size_limit() + 1)}\n'))
+
+    def test_missing_columns(self):
+        with self.assertRaises(ImportFormatError):
+            list(self._rows("username,name\nx,y\n"))
+
+    def test_management_command_writes_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'roster.csv')
+            report = os.path.join(tmp, 'errors.csv')
+            with open(path, 'w') as fh:
+                fh.write(ROSTER)
+            out = io.StringIO()
+            call_command('import_students', path, '--report', report, stdout=out)
+            with open(report) as fh:
+                self.assertEqual(len(fh.readlines()), 5)
+        self.assertIn("Created 2 of 6 students", out.getvalue())
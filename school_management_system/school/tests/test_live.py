@@ -0,0 +1,75 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import live
+from school.models import Subject
+
+User = get_user_model()
+
+def parse(event):
+    fields = dict(line.split(': ', 1) for line in event.strip().splitlines())
+    return fields['id'], json.loads(fields['data'])
+
+
+@override_settings(DASHBOARD_EVENTS_CHECK_SECONDS=0.01, DASHBOARD_EVENTS_HEARTBEAT_SECONDS=60)
+class DashboardEventsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+
+    async def test_stream_pushes_only_changes(self):
+        stream = live.dashboard_events()
+        self.assertTrue((await anext(stream)).startswith('retry:'))
+        first_id, first = parse(await anext(stream))
+        self.assertEqual(first['users_count'], 1)
+
+        # An edit the dashboard does not show moves the versions but sends nothing.
+        subject = await Subject.objects.acreate(name='Art', code='ART101')
+        second_id, second = parse(await anext(stream))
+        self.assertEqual(second['subjects_count'], 1)
+        subject.name = 'Fine Art'
+        await subject.asave()
+        await User.objects.acreate(username='teacher', role='TEACHER')
+        third_id, third = parse(await anext(stream))
+        self.assertEqual(third['users_count'], 2)
+        self.assertEqual(third['recent_users'][0]['username'], 'teacher')
+        self.assertEqual(len({first_id, second_id, third_id}), 3)
+        await stream.aclose()
+        self.assertEqual(live._streams, set())
+
+    async def test_reconnect_with_current_version_sends_nothing_new(self):
+        data_version, _ = await sync_to_async(live.snapshot)()
+        with self.settings(DASHBOARD_EVENTS_MAX_SECONDS=0.05):
+            events = [event async for event in live.dashboard_events(data_version)]
+        self.assertEqual([event for event in events if 'event: dashboard' in event], [])
+
+    async def test_stream_is_for_admins_only(self):
+        await self.async_client.aforce_login(await User.objects.acreate(username='sara', role='STUDENT'))
+        self.assertEqual((await self.async_client.get(reverse('school:admin_dashboard_events'))).status_code, 403)
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(reverse('school:admin_dashboard_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        await anext(content)
+        self.assertIn(b'event: dashboard', await anext(content))
+        await content.aclose()
+
+    def test_stream_is_refused_under_wsgi(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('school:admin_dashboard_events'))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.streaming)
+
+    def test_polling_fallback_is_conditional(self):
+        self.client.force_login(self.admin)
+        url = reverse('school:admin_dashboard_data')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['users_count'], 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        User.objects.create(username='teacher', role='TEACHER')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
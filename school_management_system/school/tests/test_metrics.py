@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from school import metrics
+from school.models import ClassRoom
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+
+    def scrape(self, **headers):
+        return self.client.get(reverse('school:metrics'), headers=headers)
+
+    def test_endpoint_reports_per_view_metrics(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('school:classroom_list'))
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('school_http_requests_total{view="school:classroom_list",method="GET",status="200"} 1', body)
+        self.assertIn('school_http_request_duration_seconds_count{view="school:classroom_list"} 1', body)
+        self.assertIn('school_db_queries_per_request_bucket{view="school:classroom_list",le="+Inf"} 1', body)
+        self.assertIn('school_http_response_size_bytes_sum{view="school:classroom_list"}', body)
+
+    def test_endpoint_is_admin_only(self):
+        student = User.objects.create_user(username='student', password='pass1234', role='STUDENT')
+        self.client.force_login(student)
+        self.assertNotEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_scraper_token(self):
+        self.assertEqual(self.scrape(Authorization='Bearer s3cret').status_code, 200)
+        self.assertNotEqual(self.scrape(Authorization='Bearer wrong').status_code, 200)
+
+    def test_repeated_query_shape_is_flagged(self):
+        collector = metrics.QueryCollector()
+        classrooms = [ClassRoom.objects.create(name=f'Grade {i}', section='A') for i in range(12)]
+        with connection.execute_wrapper(collector):
+            for classroom in classrooms:
+                ClassRoom.objects.get(pk=classroom.pk)
+            ClassRoom.objects.filter(pk__in=[1, 2]).count()
+            ClassRoom.objects.filter(pk__in=[1, 2, 3]).count()
+        self.assertEqual(collector.count, 14)
+        sql, times = collector.repeated_shape(10)
+        self.assertEqual(times, 12)
+        self.assertIsNone(collector.repeated_shape(13))
+        self.assertEqual(len(collector.shapes), 2)  # IN lists of any length share a shape
+
+    def test_exited_workers_are_forgotten(self):
+        cache.set(metrics.WORKERS_KEY, ['old-host:1', 'old-host:2'], None)
+        cache.set(metrics.SNAPSHOT_KEY.format('old-host:2'), metrics.Registry().snapshot(), metrics.snapshot_timeout())
+        metrics.collect()
+        self.assertEqual(cache.get(metrics.WORKERS_KEY), ['old-host:2', metrics.WORKER_ID])
+
+    def test_snapshots_from_workers_are_summed(self):
+        first, second = metrics.Registry(), metrics.Registry()
+        first.observe('school:home', 'GET', 200, 0.02, 3, 0.001, 500, False)
+        second.observe('school:home', 'GET', 200, 2.0, 40, 0.5, 5000, True)
+        total = metrics.merge([first.snapshot(), second.snapshot()])
+        body = metrics.render(total)
+        self.assertIn('school_http_requests_total{view="school:home",method="GET",status="200"} 2', body)
+        self.assertIn('school_http_request_duration_seconds_bucket{view="school:home",le="0.025"} 1', body)
+        self.assertIn('school_http_request_duration_seconds_bucket{view="school:home",le="2.5"} 2', body)
+        self.assertIn('school_db_queries_per_request_sum{view="school:home"} 43', body)
+        self.assertIn('school_db_nplusone_requests_total{view="school:home"} 1', body)
@@ -78,7 +78,7 @@ class GradeModelTest(TestCase):
         self.subject = Subject.objects.create(name='Science', code='SCI101')
 
     def test_create_grade(self):
-        grade = Grade.objects.create(student=self.student, subject=self.subject, marks=85, grade='A')
+        grade = Grade.objects.create(student=self.student, subject=self.subject, marks=95, grade='A')
         self.assertEqual(str(grade), 'Alice - Science - A')
 
     def test_unique_constraint_on_grade(self):
@@ -0,0 +1,55 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school.models import Notice
+
+User = get_user_model()
+
+class NoticeFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.student = User.objects.create_user(username='sara', password='pass1234', role='STUDENT')
+        self.first = Notice.objects.create(title='Holiday', content='School closed on Friday', posted_by=self.admin)
+        self.url = reverse('school:notice_feed')
+
+    def test_delta_and_conditional_polling(self):
+        self.client.force_login(self.student)
+        data = self.client.get(self.url).json()
+        self.assertEqual([notice['title'] for notice in data['notices']], ['Holiday'])
+        response = self.client.get(self.url, {'since': data['latest_id']})
+        self.assertEqual(response.json()['notices'], [])
+
+        with self.assertNumQueries(2):  # session, user; the feed comes from the cache
+            unchanged = self.client.get(self.url, {'since': data['latest_id']}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(unchanged.status_code, 304)
+
+        second = Notice.objects.create(title='Sports day', content='Bring your kit', posted_by=self.admin)
+        changed = self.client.get(self.url, {'since': data['latest_id']}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual([notice['id'] for notice in changed.json()['notices']], [second.pk])
+
+        self.first.delete()
+        self.assertEqual(self.client.get(self.url, {'since': second.pk}).json()['ids'], [second.pk])
+
+    def test_dashboard_widget_is_cached_until_a_notice_changes(self):
+        self.client.force_login(self.student)
+        url = reverse('school:student_dashboard')
+        self.assertContains(self.client.get(url), 'School closed on Friday')
+        with self.assertNumQueries(3):  # session, user, classroom; the widget comes from the cache
+            self.client.get(url)
+        self.first.title = 'Holiday moved'
+        self.first.save()
+        self.assertContains(self.client.get(url), 'Holiday moved')
+
+    def test_posting(self):
+        self.client.force_login(self.student)
+        self.client.post(reverse('school:notice_create'), {'title': 'Spam', 'content': '...'})
+        self.assertFalse(Notice.objects.filter(title='Spam').exists())
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('school:notice_create'), {'title': 'Exams', 'content': 'Start Monday'})
+        self.assertRedirects(response, reverse('school:notice_list'))
+        self.assertEqual(Notice.objects.get(title='Exams').posted_by, self.admin)
+        self.assertContains(self.client.get(reverse('school:admin_dashboard')), 'Start Monday')
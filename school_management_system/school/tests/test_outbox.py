@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from school import outbox
+from school.models import OutboundEmail, Subject, Teacher
+
+User = get_user_model()
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("SMTP server unavailable")
+
+
+class OutboxViewTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.login(username='admin', password='pass1234')
+
+    def test_teacher_create_queues_email_instead_of_sending(self):
+        subject = Subject.objects.create(name='Physics', code='PHY101')
+        response = self.client.post(reverse('school:teacher_create'), {
+            'username': 'tsegaye', 'email': 'tsegaye@example.com',
+            'name': 'Tsegaye', 'gender': 'Male', 'subjects': [subject.pk], 'contact': '0911',
+        })
+        self.assertRedirects(response, reverse('school:teacher_list'))
+        self.assertTrue(Teacher.objects.filter(user__username='tsegaye').exists())
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.to, 'tsegaye@example.com')
+        self.assertEqual(queued.status, 'PENDING')
+        self.assertIn('Temporary Password', queued.body)
+
+    def test_user_create_queues_email(self):
+        response = self.client.post(reverse('school:user_create_by_admin'), {
+            'username': 'meron', 'email': 'meron@example.com', 'role': 'STUDENT', 'is_active': 'on',
+            'password1': 'Unused-pass-123', 'password2': 'Unused-pass-123',
+        })
+        self.assertRedirects(response, reverse('school:user_list'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().to, 'meron@example.com')
+
+
+class DeliverBatchTest(TestCase):
+    def test_delivers_pending_and_clears_body(self):
+        outbox.enqueue('Hello', 'secret body', ['a@example.com'])
+        outbox.enqueue('Hello', 'secret body', ['b@example.com'])
+
+        self.assertEqual(outbox.deliver_batch(), (2, 0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['a@example.com'])
+        for email in OutboundEmail.objects.all():
+            self.assertEqual(email.status, 'SENT')
+            self.assertEqual(email.body, '')
+            self.assertIsNotNone(email.sent_at)
+        self.assertEqual(outbox.deliver_batch(), (0, 0, 0))
+
+    def test_skips_messages_not_yet_due(self):
+        queued = outbox.enqueue('Later', 'body', ['a@example.com'])
+        OutboundEmail.objects.filter(pk=queued.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(outbox.deliver_batch(), (0, 0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_BACKEND='school.tests.test_outbox.FailingBackend')
+    def test_failures_back_off_then_dead_letter(self):
+        queued = outbox.enqueue('Hello', 'body', ['a@example.com'])
+
+        self.assertEqual(outbox.deliver_batch(max_attempts=2), (0, 1, 0))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'PENDING')
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('SMTP server unavailable', queued.last_error)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+        OutboundEmail.objects.filter(pk=queued.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.deliver_batch(max_attempts=2), (0, 0, 1))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'DEAD')
+        self.assertEqual(queued.body, 'body')
+
+    def test_reclaims_messages_stuck_in_sending(self):
+        queued = outbox.enqueue('Hello', 'body', ['a@example.com'])
+        OutboundEmail.objects.filter(pk=queued.pk).update(
+            status='SENDING', next_attempt_at=timezone.now() - outbox.CLAIM_TIMEOUT - timedelta(minutes=1)
+        )
+        call_command('send_outbox', stdout=StringIO())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'SENT')
+        self.assertEqual(len(mail.outbox), 1)
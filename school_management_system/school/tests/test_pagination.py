@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school.models import ClassRoom, Student, Attendance
+from school.pagination import ListSpec
+
+User = get_user_model()
+
+class ListSpecTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.classroom = ClassRoom.objects.create(name='Grade 6', section='A')
+        self.other = ClassRoom.objects.create(name='Grade 6', section='B')
+        # Duplicate names make sure the id tie-breaker keeps pages stable
+        for i, name in enumerate(['Abel', 'Bethel', 'Bethel', 'Dawit', 'Eden', 'Fikir', 'Gelila']):
+            user = User.objects.create_user(username=f'student{i}', password='pass1234')
+            Student.objects.create(user=user, name=name, age=12, gender='Male', classroom=self.classroom)
+        self.spec = ListSpec(
+            orderings={'name': ('name', 'id'), '-name': ('-name', '-id')},
+            filters={'classroom': 'classroom_id'},
+            search='name__icontains',
+            per_page=3,
+        )
+        self.all_ids = list(Student.objects.order_by('name', 'id').values_list('id', flat=True))
+
+    def _page(self, **params):
+        return self.spec.paginate(self.factory.get('/', params), Student.objects.all())
+
+    def test_walks_forward_and_back_without_gaps(self):
+        seen = []
+        page = self._page()
+        self.assertFalse(page.has_previous)
+        pages = [page]
+        while page.has_next:
+            page = self._page(after=page.next_cursor)
+            pages.append(page)
+        for p in pages:
+            seen.extend(s.id for s in p)
+        self.assertEqual(seen, self.all_ids)
+
+        back = self._page(before=pages[-1].previous_cursor)
+        self.assertEqual([s.id for s in back], [s.id for s in pages[-2]])
+
+    def test_descending_sort(self):
+        page = self._page(sort='-name')
+        self.assertEqual([s.id for s in page], self.all_ids[::-1][:3])
+
+    def test_unknown_sort_and_bad_cursor_fall_back_to_first_page(self):
+        page = self._page(sort='age; DROP TABLE', after='not-a-cursor')
+        self.assertEqual(page.sort, 'name')
+        self.assertEqual([s.id for s in page], self.all_ids[:3])
+
+    def test_cursor_from_other_sort_is_rejected(self):
+        cursor = self._page(sort='-name').next_cursor
+        page = self._page(sort='name', after=cursor)
+        self.assertEqual([s.id for s in page], self.all_ids[:3])
+
+    def test_whitelisted_filters_and_search(self):
+        self.assertEqual(len(self._page(classroom=self.other.id)), 0)
+        self.assertEqual(len(self._page(classroom='abc')), 3)  # malformed filter is ignored
+        self.assertEqual([s.name for s in self._page(q='beth')], ['Bethel', 'Bethel'])
+
+class AttendanceListPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        classroom = ClassRoom.objects.create(name='Grade 7', section='B')
+        user = User.objects.create_user(username='student', password='pass1234', role='STUDENT')
+        student = Student.objects.create(user=user, name='Hana', age=13, gender='Female', classroom=classroom)
+        start = date(2025, 1, 1)
+        Attendance.objects.bulk_create(
+            Attendance(student=student, date=start + timedelta(days=i), status='Present') for i in range(30)
+        )
+        self.client.force_login(self.admin)
+
+    def test_page_is_bounded_and_query_count_is_constant(self):
+        url = reverse('school:attendance_list')
+        with self.assertNumQueries(3):  # session, user, page
+            response = self.client.get(url)
+        page = response.context['page']
+        self.assertEqual(len(page), 25)
+        self.assertEqual(page.object_list[0].date, date(2025, 1, 30))
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(url, {'after': page.next_cursor})
+        self.assertEqual(len(response.context['page']), 5)
+        self.assertFalse(response.context['page'].has_next)
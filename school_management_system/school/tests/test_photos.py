@@ -0,0 +1,105 @@
+import io
+import shutil
+import tempfile
+
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import photos
+from school.models import ClassRoom, Student
+
+User = get_user_model()
+
+def jpeg(width=2000, height=1000, color='red', orientation=None):
+    image = Image.new('RGB', (width, height), color)
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # Make
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class PhotoPipelineTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.classroom = ClassRoom.objects.create(name='Grade 5', section='A')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _student(self, data=None, username='sara'):
+        student = Student(user=User.objects.create(username=username), name='Sara', age=11, gender='Female',
+                          classroom=self.classroom)
+        if data:
+            student.photo = SimpleUploadedFile('phone.jpg', data, content_type='image/jpeg')
+        student.save()
+        return student
+
+    def _open(self, photo_hash, size, ext):
+        with default_storage.open(photos.variant_name(photo_hash, size, ext), 'rb') as f:
+            return Image.open(io.BytesIO(f.read()))
+
+    def test_upload_renders_every_variant_without_metadata(self):
+        student = self._student(jpeg(orientation=6))  # Rotated 90°: portrait once EXIF is applied
+        student.refresh_from_db()
+        self.assertTrue(student.photo_hash)
+        for size, pixels in photos.SIZES.items():
+            for ext in photos.FORMATS:
+                image = self._open(student.photo_hash, size, ext)
+                self.assertEqual(max(image.size), pixels)
+                self.assertFalse(image.getexif())
+        self.assertEqual(self._open(student.photo_hash, 'avatar', 'jpg').size, (96, 96))
+        self.assertEqual(self._open(student.photo_hash, 'detail', 'jpg').size, (240, 480))
+
+    def test_names_follow_content(self):
+        first = self._student(jpeg(color='red'))
+        second = self._student(jpeg(color='red'), username='twin')
+        third = self._student(jpeg(color='blue'), username='other')
+        self.assertEqual(first.photo_hash, second.photo_hash)
+        self.assertNotEqual(first.photo_hash, third.photo_hash)
+
+    def test_replacing_photo_removes_unused_variants(self):
+        student = self._student(jpeg(color='red'))
+        old_hash = student.photo_hash
+        student = Student.objects.get(pk=student.pk)
+        student.photo = SimpleUploadedFile('new.jpg', jpeg(color='blue'), content_type='image/jpeg')
+        student.save()
+        self.assertNotEqual(student.photo_hash, old_hash)
+        self.assertFalse(default_storage.exists(photos.variant_name(old_hash, 'detail', 'webp')))
+
+    def test_saving_other_fields_does_not_reprocess(self):
+        student = self._student(jpeg())
+        student = Student.objects.get(pk=student.pk)
+        student.age = 12
+        with self.assertNumQueries(3):  # the update and the search index refresh; no photo queries
+            student.save()
+
+    def test_unreadable_upload_is_kept_unprocessed(self):
+        with self.assertLogs('school.photos', 'WARNING'):
+            student = self._student(b'not an image')
+        self.assertEqual(student.photo_hash, '')
+
+    def test_backfill(self):
+        student = self._student(jpeg())
+        Student.objects.update(photo_hash='')
+        self.assertEqual(photos.backfill(workers=1), (1, 0))
+        student.refresh_from_db()
+        self.assertTrue(student.photo_hash)
+        self.assertEqual(photos.backfill(workers=1), (0, 0))
+
+    def test_detail_page_serves_sized_variants(self):
+        student = self._student(jpeg())
+        self.client.force_login(User.objects.create_user(username='admin', password='pass1234', role='ADMIN'))
+        response = self.client.get(reverse('school:student_detail', args=[student.pk]))
+        self.assertContains(response, f'{student.photo_hash}/detail.webp')
+        self.assertContains(response, f'{student.photo_hash}/detail.jpg')
+        self.assertNotContains(response, student.photo.url)
@@ -0,0 +1,28 @@
+from django.test import TestCase
+
+from school import queryplans, seed
+from school.tests.test_benchmarks import SMALL
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed.seed_school(**SMALL)
+
+    def test_views_use_indexed_access_paths(self):
+        self.assertEqual([(name, problem) for name, sql, problem in queryplans.check()], [])
+
+    def test_problems(self):
+        sql = 'SELECT * FROM school_grade ORDER BY marks'
+        self.assertEqual(queryplans.problems(sql, [('school_grade', 'full scan'), (None, 'temp sort')]),
+                         ['full scan of school_grade', 'temp B-tree sort over school_grade'])
+        # An unfiltered rowid-ordered scan of the outermost table stops at the LIMIT and reads one page...
+        sql = 'SELECT * FROM school_grade LIMIT 20'
+        self.assertEqual(queryplans.problems(sql, [('school_grade', 'full scan')]), [])
+        # ...but a filtered one reads until enough rows match, and an inner scan is not bounded by it.
+        sql = 'SELECT * FROM school_grade WHERE marks < 10 LIMIT 20'
+        self.assertEqual(queryplans.problems(sql, [('school_grade', 'full scan')]), ['full scan of school_grade'])
+        sql = 'SELECT * FROM school_subject INNER JOIN school_grade ON (subject_id = school_subject.id) LIMIT 20'
+        self.assertEqual(queryplans.problems(sql, [('school_subject', 'full scan'), ('school_grade', 'full scan')]),
+                         ['full scan of school_grade'])
+        self.assertEqual(queryplans.problems(sql, [('school_subject', 'full scan'), ('school_grade', 'search')]), [])
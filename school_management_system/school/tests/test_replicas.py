@@ -0,0 +1,81 @@
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.db import connections
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import replicas
+from school.models import ClassRoom, Grade, Student, Subject
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTest(TestCase):
+    """Two SQLite databases: the test primary and a file snapshot of it taken before any rows exist."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The runner only sets up configured databases, so the replica is added once the class is set up.
+        cls.directory = tempfile.mkdtemp()
+        path = str(Path(cls.directory) / 'replica.sqlite3')
+        connections['default'].ensure_connection()
+        with sqlite3.connect(path) as target:
+            connections['default'].connection.backup(target)
+        connections.settings['replica'] = {**connections['default'].settings_dict, 'NAME': path}
+        cls.databases = {*cls.databases, 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        del cls.databases
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        classroom = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.student = Student.objects.create(user=User.objects.create(username='student'), name='Ada Lovelace',
+                                              age=11, gender='Female', classroom=classroom)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.client.force_login(self.admin)
+        cache.clear()  # Forget the setup writes, as if the replica had caught up
+
+    def test_read_only_views_read_from_the_replica(self):
+        Grade.objects.create(student=self.student, subject=self.subject, marks=91, grade='A')
+        cache.clear()
+        self.assertNotContains(self.client.get(reverse('school:grade_list')), 'Ada Lovelace')
+        # Views that are not marked read from the primary.
+        self.assertContains(self.client.get(reverse('school:student_list')), 'Ada Lovelace')
+
+    def test_writer_reads_own_writes(self):
+        response = self.client.post(reverse('school:grade_create'), {
+            'student': self.student.pk, 'subject': self.subject.pk, 'marks': 91, 'grade': 'A',
+        })
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertContains(self.client.get(reverse('school:grade_list')), 'Ada Lovelace')
+
+        # Once the pin expires the browser is back on the replica, which (in this test) never catches up.
+        del self.client.cookies[replicas.PIN_COOKIE]
+        cache.clear()
+        self.assertNotContains(self.client.get(reverse('school:grade_list')), 'Ada Lovelace')
+
+    def test_recent_writes_are_not_cached_from_the_replica(self):
+        Grade.objects.create(student=self.student, subject=self.subject, marks=91, grade='A')
+        # Another user's page under the new grade version is built from the primary.
+        self.assertContains(self.client.get(reverse('school:grade_list')), 'Ada Lovelace')
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertEqual(router.db_for_write(Grade), 'default')
+        self.assertIsNone(router.db_for_read(Grade))  # Outside a request
+        self.assertFalse(router.allow_migrate('replica', 'school'))
+        self.assertIsNone(router.allow_migrate('default', 'school'))
@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import reportcards
+from school.models import Attendance, ClassRoom, Grade, ReportCard, ReportCardBatch, Student, Subject
+
+User = get_user_model()
+
+TERM = dict(term='2025-T1', date_from=date(2025, 1, 6), date_to=date(2025, 3, 28))
+
+
+class ReportCardTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media)
+        self.override.enable()
+        self.classroom = ClassRoom.objects.create(name='Grade 5', section='A')
+        other = ClassRoom.objects.create(name='Grade 6', section='A')
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.art = Subject.objects.create(name='Art', code='ART101')
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'student{i}', role='STUDENT'), name=name,
+                                   age=11, gender='Female', classroom=classroom)
+            for i, (name, classroom) in enumerate([('Ada', self.classroom), ('Bea', self.classroom), ('Cy', other)])
+        ]
+        for student, marks in zip(self.students, [(90, 80), (70, 60), (50, 50)]):
+            Grade.objects.create(student=student, subject=self.math, marks=marks[0], grade='A')
+            Grade.objects.create(student=student, subject=self.art, marks=marks[1], grade='B')
+        Attendance.objects.create(student=self.students[0], date=date(2025, 2, 3), status='Present')
+        Attendance.objects.create(student=self.students[0], date=date(2025, 2, 4), status='Absent')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def test_classroom_cards_in_bulk(self):
+        with self.assertNumQueries(3):  # students, grades, attendance
+            cards = reportcards.classroom_cards(self.classroom, '2025-T1', date(2025, 1, 6), date(2025, 3, 28))
+        ada, bea = cards
+        self.assertEqual([grade['code'] for grade in ada['grades']], ['ART101', 'MATH101'])
+        self.assertEqual((ada['average'], ada['rank'], ada['ranked']), (85.0, 1, 2))
+        self.assertEqual((ada['present'], ada['absent'], ada['attendance_rate']), (1, 1, 50.0))
+        self.assertEqual((bea['rank'], bea['present'], bea['attendance_rate']), (2, 0, None))
+
+    def test_attendance_is_limited_to_the_term_dates(self):
+        # Same months as the term, but outside its dates.
+        Attendance.objects.create(student=self.students[0], date=date(2025, 1, 3), status='Absent')
+        Attendance.objects.create(student=self.students[1], date=date(2025, 3, 31), status='Absent')
+        Attendance.objects.create(student=self.students[1], date=date(2025, 3, 28), status='Present')
+        ada, bea = reportcards.classroom_cards(self.classroom, '2025-T1', date(2025, 1, 6), date(2025, 3, 28))
+        self.assertEqual((ada['present'], ada['absent'], ada['attendance_rate']), (1, 1, 50.0))
+        self.assertEqual((bea['present'], bea['absent'], bea['attendance_rate']), (1, 0, 100.0))
+
+    def test_unchanged_cards_are_not_rendered_again(self):
+        batch = reportcards.run(ReportCardBatch.objects.create(**TERM), workers=1)
+        self.assertEqual((batch.status, batch.total, batch.rendered, batch.unchanged, batch.percent), ('DONE', 3, 3, 0, 100))
+        card = ReportCard.objects.get(student=self.students[0], term='2025-T1')
+        self.assertIn(b'Ada', reportcards.read_card(card))
+
+        batch = reportcards.run(ReportCardBatch.objects.create(**TERM), workers=1)
+        self.assertEqual((batch.rendered, batch.unchanged), (0, 3))
+
+        Grade.objects.filter(student=self.students[2]).update(marks=55)
+        batch = reportcards.run(ReportCardBatch.objects.create(**TERM), workers=1)
+        self.assertEqual((batch.rendered, batch.unchanged), (1, 2))
+        self.assertEqual(ReportCard.objects.count(), 3)
+
+    def test_worker_renders_queued_batches_on_a_pool(self):
+        ReportCardBatch.objects.create(classroom=self.classroom, **TERM)
+        call_command('generate_report_cards', workers=2, stdout=StringIO())
+        batch = ReportCardBatch.objects.get()
+        self.assertEqual((batch.status, batch.total, batch.rendered), ('DONE', 2, 2))
+        for card in ReportCard.objects.all():
+            self.assertTrue(default_storage.exists(reportcards.card_name(card.content_hash)))
+        self.assertIsNone(reportcards.claim_next())
+
+    def test_views(self):
+        admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('school:report_card_batches'), {
+            'term': '2025-T1', 'date_from': '2025-01-06', 'date_to': '2025-03-28', 'classroom': '',
+        })
+        self.assertRedirects(response, reverse('school:report_card_batches'))
+        self.assertContains(self.client.get(reverse('school:report_card_batches')), 'http-equiv="refresh"')
+        reportcards.run(reportcards.claim_next(), workers=1)
+        self.assertContains(self.client.get(reverse('school:report_card_batches')), '100%')
+
+        own = reverse('school:report_card', args=[self.students[0].pk, '2025-T1'])
+        other = reverse('school:report_card', args=[self.students[1].pk, '2025-T1'])
+        self.assertContains(self.client.get(reverse('school:student_detail', args=[self.students[0].pk])), own)
+        self.client.force_login(self.students[0].user)
+        self.assertContains(self.client.get(own), 'Class rank')
+        self.assertEqual(self.client.get(other).status_code, 404)
+        self.assertNotEqual(self.client.get(reverse('school:report_card_batches')).status_code, 200)
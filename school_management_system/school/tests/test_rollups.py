@@ -0,0 +1,158 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from school import rollups
+from school.forms import RollCallForm
+from school.models import Attendance, ClassRoom, ClassroomDailyAttendance, Student, StudentMonthlyAttendance
+
+User = get_user_model()
+
+
+class RollupTestMixin:
+    def make_student(self, name, classroom):
+        return Student.objects.create(
+            user=User.objects.create(username=name), name=name, age=13, gender='Female', classroom=classroom,
+        )
+
+    def monthly(self, student, month):
+        row = StudentMonthlyAttendance.objects.filter(student=student, month=month).first()
+        return (row.present, row.absent) if row else None
+
+    def daily(self, classroom, day):
+        row = ClassroomDailyAttendance.objects.filter(classroom=classroom, date=day).first()
+        return (row.present, row.absent) if row else None
+
+
+class RollupMaintenanceTest(RollupTestMixin, TestCase):
+    def setUp(self):
+        self.classroom = ClassRoom.objects.create(name='Grade 7', section='B')
+        self.hanna = self.make_student('hanna', self.classroom)
+        self.abel = self.make_student('abel', self.classroom)
+
+    def test_save_update_and_delete_keep_rollups_current(self):
+        record = Attendance.objects.create(student=self.hanna, date=date(2025, 3, 3), status='Present')
+        Attendance.objects.create(student=self.hanna, date=date(2025, 3, 4), status='Absent')
+        Attendance.objects.create(student=self.abel, date=date(2025, 3, 3), status='Present')
+        self.assertEqual(self.monthly(self.hanna, date(2025, 3, 1)), (1, 1))
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (2, 0))
+
+        record.status = 'Absent'
+        record.save()
+        self.assertEqual(self.monthly(self.hanna, date(2025, 3, 1)), (0, 2))
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (1, 1))
+
+        # Moving a record to another month refreshes both months.
+        record = Attendance.objects.get(pk=record.pk)
+        record.date = date(2025, 4, 1)
+        record.save()
+        self.assertEqual(self.monthly(self.hanna, date(2025, 3, 1)), (0, 1))
+        self.assertEqual(self.monthly(self.hanna, date(2025, 4, 1)), (0, 1))
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (1, 0))
+
+        record.delete()
+        self.assertIsNone(self.monthly(self.hanna, date(2025, 4, 1)))
+        self.assertIsNone(self.daily(self.classroom, date(2025, 4, 1)))
+
+    def test_moving_a_student_recounts_both_classrooms(self):
+        other = ClassRoom.objects.create(name='Grade 7', section='C')
+        Attendance.objects.create(student=self.hanna, date=date(2025, 3, 3), status='Present')
+        Attendance.objects.create(student=self.hanna, date=date(2025, 3, 4), status='Absent')
+        Attendance.objects.create(student=self.abel, date=date(2025, 3, 3), status='Present')
+
+        hanna = Student.objects.get(pk=self.hanna.pk)
+        hanna.classroom = other
+        hanna.save()
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (1, 0))
+        self.assertIsNone(self.daily(self.classroom, date(2025, 3, 4)))
+        self.assertEqual(self.daily(other, date(2025, 3, 3)), (1, 0))
+        self.assertEqual(self.daily(other, date(2025, 3, 4)), (0, 1))
+
+        hanna.name = 'Hanna T'
+        with self.assertNumQueries(3):  # The update and its search index entry; no recount
+            hanna.save()
+
+    def test_deleting_a_student_recounts_its_classroom_days_once(self):
+        days = [date(2025, 3, day) for day in range(1, 29)]
+        for day in days:
+            Attendance.objects.create(student=self.hanna, date=day, status='Present')
+            Attendance.objects.create(student=self.abel, date=day, status='Absent')
+
+        # Select the student and its cascades, read its dates, delete, then one recount and one upsert of the days.
+        with self.assertNumQueries(14):
+            Student.objects.get(pk=self.hanna.pk).delete()
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (0, 1))
+        self.assertFalse(StudentMonthlyAttendance.objects.filter(student_id=self.hanna.pk).exists())
+
+        self.classroom.delete()
+        self.assertFalse(ClassroomDailyAttendance.objects.exists())
+        self.assertFalse(StudentMonthlyAttendance.objects.exists())
+
+    def test_roll_call_bulk_upsert_updates_rollups(self):
+        students = [self.hanna, self.abel]
+        data = {'date': '2025-03-03', f'status_{self.hanna.pk}': 'Present', f'status_{self.abel.pk}': 'Absent'}
+        form = RollCallForm(data, students=students)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (1, 1))
+
+        data[f'status_{self.abel.pk}'] = 'Present'
+        form = RollCallForm(data, students=students)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(self.daily(self.classroom, date(2025, 3, 3)), (2, 0))
+        self.assertEqual(self.monthly(self.abel, date(2025, 3, 1)), (1, 0))
+
+    def test_rebuild_matches_incremental_rollups(self):
+        for day in range(1, 11):
+            Attendance.objects.create(student=self.hanna, date=date(2025, 3, day), status='Present' if day % 3 else 'Absent')
+            Attendance.objects.create(student=self.abel, date=date(2025, 3, day), status='Present')
+        expected_monthly = list(StudentMonthlyAttendance.objects.values_list('student_id', 'month', 'present', 'absent'))
+        expected_daily = list(ClassroomDailyAttendance.objects.values_list('classroom_id', 'date', 'present', 'absent'))
+
+        StudentMonthlyAttendance.objects.all().delete()
+        ClassroomDailyAttendance.objects.update(present=99)
+        call_command('rebuild_attendance_rollups', chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(list(StudentMonthlyAttendance.objects.values_list('student_id', 'month', 'present', 'absent')), expected_monthly)
+        self.assertEqual(list(ClassroomDailyAttendance.objects.values_list('classroom_id', 'date', 'present', 'absent')), expected_daily)
+
+
+class RollupReportTest(RollupTestMixin, TestCase):
+    def setUp(self):
+        self.classroom = ClassRoom.objects.create(name='Grade 7', section='B')
+        self.good = self.make_student('good', self.classroom)
+        self.poor = self.make_student('poor', self.classroom)
+        for day in range(3, 7):
+            Attendance.objects.create(student=self.good, date=date(2025, 3, day), status='Present')
+            Attendance.objects.create(student=self.poor, date=date(2025, 3, day), status='Absent' if day < 5 else 'Present')
+
+    def test_rates_trend_and_threshold(self):
+        start, end = date(2025, 3, 1), date(2025, 3, 31)
+        [row] = rollups.classroom_rates(start, end)
+        self.assertEqual((row['present'], row['absent'], row['rate']), (6, 2, 75.0))
+
+        trend = rollups.classroom_trend(self.classroom.pk, start, end)
+        self.assertEqual([day['rate'] for day in trend], [50.0, 50.0, 100.0, 100.0])
+
+        below = rollups.students_below(75, start, end)
+        self.assertEqual([student['name'] for student in below], ['poor'])
+        self.assertEqual(below[0]['rate'], 50.0)
+
+    def test_report_view_reads_only_rollups(self):
+        admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.force_login(admin)
+        url = reverse('school:attendance_report')
+        params = {'date_from': '2025-03-01', 'date_to': '2025-03-31', 'classroom': self.classroom.pk, 'threshold': 60}
+
+        response = self.client.get(url, params)
+        self.assertContains(response, 'poor')
+
+        Attendance.objects.all().delete()
+        StudentMonthlyAttendance.objects.create(student=self.good, month=date(2025, 3, 1), present=1, absent=9)
+        data = self.client.get(url, {**params, 'format': 'json'}).json()
+        self.assertEqual([student['name'] for student in data['below_threshold']], ['good'])
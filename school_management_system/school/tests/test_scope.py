@@ -0,0 +1,81 @@
+from django.test import TestCase, RequestFactory
+from django.core.cache import cache
+from django.template import Context, Template
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+
+from school.models import ClassRoom, Subject, Teacher, Student
+from school.scope import get_teacher_scope
+
+User = get_user_model()
+
+class TeacherScopeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101')
+        self.art = Subject.objects.create(name='Art', code='ART101')
+        self.class_a = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.class_b = ClassRoom.objects.create(name='Grade 5', section='B')
+        self.class_a.subjects.add(self.math)
+        self.class_b.subjects.add(self.art)
+
+        self.teacher_user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        self.teacher = Teacher.objects.create(user=self.teacher_user, name='Mr. Abebe', gender='Male')
+        self.teacher.subjects.add(self.math)
+
+        self.student_a = Student.objects.create(
+            user=User.objects.create(username='sa'), name='Sara', age=11, gender='Female', classroom=self.class_a)
+        self.student_b = Student.objects.create(
+            user=User.objects.create(username='sb'), name='Kebede', age=11, gender='Male', classroom=self.class_b)
+
+    def _scope(self):
+        request = self.factory.get('/')
+        request.user = self.teacher_user
+        return get_teacher_scope(request)
+
+    def test_scope_sets(self):
+        scope = self._scope()
+        self.assertEqual(scope.classroom_ids, {self.class_a.pk})
+        self.assertEqual(scope.subject_ids, {self.math.pk})
+        self.assertEqual(scope.student_ids, {self.student_a.pk})
+
+    def test_scope_is_cached_across_requests(self):
+        self._scope()
+        with self.assertNumQueries(0):
+            self._scope()
+
+    def test_m2m_changes_invalidate_scope(self):
+        self._scope()
+        self.teacher.subjects.add(self.art)
+        self.assertEqual(self._scope().classroom_ids, {self.class_a.pk, self.class_b.pk})
+        self.class_b.subjects.remove(self.art)
+        self.assertEqual(self._scope().classroom_ids, {self.class_a.pk})
+
+    def test_admin_has_no_scope(self):
+        request = self.factory.get('/')
+        request.user = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.assertIsNone(get_teacher_scope(request))
+
+    def test_detail_views_filter_by_scope(self):
+        self.client.force_login(self.teacher_user)
+        self.assertEqual(self.client.get(reverse('school:student_detail', args=[self.student_a.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('school:student_detail', args=[self.student_b.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('school:classroom_detail', args=[self.class_b.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('school:subject_detail', args=[self.art.pk])).status_code, 404)
+
+    def test_student_detail_is_a_single_query_with_warm_scope(self):
+        self.client.force_login(self.teacher_user)
+        url = reverse('school:student_detail', args=[self.student_a.pk])
+        self.client.get(url)
+        with self.assertNumQueries(3):  # session, user, student
+            self.client.get(url)
+
+class HasGroupFilterTest(TestCase):
+    def test_groups_loaded_once(self):
+        user = User.objects.create_user(username='member', password='pass1234')
+        user.groups.add(Group.objects.get_or_create(name='Teacher')[0])
+        template = Template("{% load group_filters %}{{ u|has_group:'Teacher' }} {{ u|has_group:'Admin' }}")
+        with self.assertNumQueries(1):
+            self.assertEqual(template.render(Context({'u': user})), 'True False')
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from school import search
+from school.importers import import_students
+from school.models import Attendance, ClassRoom, Student, Subject, Teacher
+
+User = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.classroom = ClassRoom.objects.create(name='Grade 8', section='A')
+        self.abebe = self.make_student('Abebe Kebede')
+        self.almaz = self.make_student('Almaz Bekele')
+
+    def make_student(self, name):
+        return Student.objects.create(
+            user=User.objects.create(username=name.split()[0].lower()), name=name, age=14, gender='Male',
+            classroom=self.classroom,
+        )
+
+    def find(self, kind, q):
+        return set(INDEXED[kind].objects.filter(search.match(kind, q)).values_list('pk', flat=True))
+
+    def test_prefix_and_multi_term_matching(self):
+        self.assertEqual(self.find('student', 'ab'), {self.abebe.pk})
+        self.assertEqual(self.find('student', 'a'), {self.abebe.pk, self.almaz.pk})
+        self.assertEqual(self.find('student', 'ab ke'), {self.abebe.pk})
+        self.assertEqual(self.find('student', 'abebe bek'), set())
+        self.assertEqual(self.find('student', ''), set())
+
+    def test_index_follows_updates_and_deletes(self):
+        self.abebe.name = 'Dawit Kebede'
+        self.abebe.save()
+        self.assertEqual(self.find('student', 'abebe'), set())
+        self.assertEqual(self.find('student', 'dawit'), {self.abebe.pk})
+
+        self.almaz.delete()
+        self.assertEqual(self.find('student', 'almaz'), set())
+
+    def test_query_syntax_is_not_interpreted(self):
+        for q in ['"', 'abebe"', 'NEAR(ab', 'a OR', '*', 'ab:', '-ab', '^ab']:
+            self.find('student', q)  # must not raise
+
+    def test_bulk_import_is_indexed(self):
+        rows = [{'username': 'tigist', 'name': 'Tigist Haile', 'age': '13', 'gender': 'Female',
+                 'classroom': 'Grade 8', 'section': 'A'}]
+        import_students(rows)
+        self.assertEqual(len(self.find('student', 'tigist')), 1)
+        self.assertEqual(len(self.find('user', 'tigist')), 1)
+
+    def test_like_pattern_escapes_wildcards(self):
+        self.assertEqual(search._like_pattern(' 50%_off\\ '), '%50\\%\\_off\\\\%')
+
+    def test_ranked_ids_prefers_better_matches(self):
+        best = self.make_student('Kebede Kebede')
+        self.assertEqual(search.ranked_ids('student', 'kebede')[0], best.pk)
+        self.assertEqual(search.ranked_ids('student', 'kebede', limit=1), [best.pk])
+        self.assertEqual(search.ranked_ids('student', '  '), [])
+
+    def test_list_views_use_the_index(self):
+        admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('school:student_list'), {'q': 'alm'})
+        self.assertContains(response, 'Almaz Bekele')
+        self.assertNotContains(response, 'Abebe Kebede')
+
+        Attendance.objects.create(student=self.abebe, date='2025-03-03', status='Present')
+        response = self.client.get(reverse('school:attendance_list'), {'q': 'keb'})
+        self.assertContains(response, 'Abebe Kebede')
+
+        subject = Subject.objects.create(name='Chemistry', code='CHEM101')
+        teacher = Teacher.objects.create(user=admin, name='Yonas Tadesse', gender='Male', contact='0911')
+        teacher.subjects.add(subject)
+        self.assertContains(self.client.get(reverse('school:subject_list'), {'q': 'yon'}), 'Chemistry')
+        self.assertContains(self.client.get(reverse('school:subject_list'), {'q': 'chem'}), 'Chemistry')
+
+
+INDEXED = {kind: index.model for kind, index in search.INDEXES.items()}
@@ -0,0 +1,121 @@
+from datetime import time
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from school import timetabling
+from school.models import ClassRoom, Subject, Teacher, TeacherUnavailability, Timetable
+from school.timetabling import Solver, Unit
+
+User = get_user_model()
+
+def check_clash_free(test, units, unavailable=None):
+    classroom_slots, teacher_slots = set(), set()
+    for unit in units:
+        for slot in unit.slots:
+            test.assertNotIn((unit.classroom_id, slot), classroom_slots)
+            test.assertNotIn((unit.teacher_id, slot), teacher_slots)
+            test.assertFalse((unavailable or {}).get(unit.teacher_id, 0) >> slot & 1)
+            classroom_slots.add((unit.classroom_id, slot))
+            teacher_slots.add((unit.teacher_id, slot))
+
+
+class SolverTest(TestCase):
+    def test_large_school_is_placed_without_clashes(self):
+        # 100 classrooms × 10 subjects × 4 periods fill all 4000 slots of a 5 × 8 week.
+        subjects, teachers = 45, 180
+        qualified = {subject: [] for subject in range(subjects)}
+        for teacher in range(teachers):
+            for subject in (teacher % subjects, (teacher * 7 + 3) % subjects):
+                if teacher not in qualified[subject]:
+                    qualified[subject].append(teacher)
+        unavailable = {teacher: 0b101 << (teacher % 30) for teacher in range(teachers)}
+        units = [Unit(classroom, (classroom + i * 4) % subjects, 4) for classroom in range(100) for i in range(10)]
+        solver = Solver(5, 8, qualified, unavailable)
+        solver.solve(units)
+        self.assertEqual(solver.unplaced, [])
+        self.assertEqual(sum(len(unit.slots) for unit in units), 4000)
+        check_clash_free(self, units, unavailable)
+
+    def test_lessons_of_a_subject_go_on_different_days(self):
+        unit = Unit(1, 1, 5)
+        Solver(5, 8, {1: [1]}).solve([unit])
+        self.assertEqual(sorted(slot // 8 for slot in unit.slots), [0, 1, 2, 3, 4])
+
+    def test_blocking_lesson_is_moved(self):
+        # The teacher of subject 2 can only teach in slot 0, which subject 1 took first.
+        solver = Solver(1, 2, {1: [1], 2: [2]}, {2: 0b10})
+        first = Unit(1, 1, 1, teacher_id=1, slots=[0])
+        solver.add(first)
+        second = Unit(1, 2, 1)
+        solver.solve([second])
+        self.assertEqual((first.slots, second.slots), ([1], [0]))
+        self.assertEqual(solver.unplaced, [])
+
+    def test_impossible_lessons_are_reported(self):
+        solver = Solver(1, 2, {1: [1]})
+        unit = Unit(1, 1, 3)
+        solver.solve([unit])
+        self.assertEqual(len(unit.slots), 2)
+        self.assertEqual(solver.unplaced[0][:2], (unit, 1))
+
+
+class TimetableGenerationTest(TestCase):
+    def setUp(self):
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101', weekly_periods=5)
+        self.art = Subject.objects.create(name='Art', code='ART101', weekly_periods=2)
+        self.classrooms = [ClassRoom.objects.create(name='Grade 5', section=section) for section in 'ABC']
+        for classroom in self.classrooms:
+            classroom.subjects.add(self.math, self.art)
+        self.abebe = self._teacher('abebe', self.math)
+        self.hanna = self._teacher('hanna', self.math, self.art)
+
+    def _teacher(self, username, *subjects):
+        teacher = Teacher.objects.create(user=User.objects.create(username=username), name=username.title(), gender='Male')
+        teacher.subjects.add(*subjects)
+        return teacher
+
+    def _rows(self):
+        return set(Timetable.objects.values_list('classroom_id', 'subject_id', 'teacher_id', 'day_of_week', 'period_time'))
+
+    def test_generate_and_write(self):
+        plan = timetabling.generate()
+        self.assertEqual(plan.problems(), [])
+        with self.assertNumQueries(4):  # existing rows, savepoint, one insert, release
+            created, deleted = timetabling.write(plan)
+        self.assertEqual((created, deleted), (21, 0))
+        self.assertEqual(Timetable.objects.filter(subject=self.math).count(), 15)
+        # Solving again changes nothing
+        self.assertEqual(timetabling.write(timetabling.generate()), (0, 0))
+
+    def test_teacher_double_booking_is_rejected(self):
+        Timetable.objects.create(classroom=self.classrooms[0], subject=self.math, teacher=self.abebe,
+                                 day_of_week='Monday', period_time=time(8, 0))
+        clash = Timetable(classroom=self.classrooms[1], subject=self.math, teacher=self.abebe,
+                          day_of_week='Monday', period_time=time(8, 0))
+        with self.assertRaises(ValidationError):
+            clash.full_clean()
+
+    def test_repair_after_unavailability_moves_only_that_teacher(self):
+        timetabling.write(timetabling.generate())
+        before = self._rows()
+        lesson = Timetable.objects.filter(teacher=self.hanna).order_by('pk').first()
+        TeacherUnavailability.objects.create(teacher=self.hanna, day_of_week=lesson.day_of_week, period_time=lesson.period_time)
+
+        timetabling.write(timetabling.repair_teacher(self.hanna.pk))
+        after = self._rows()
+        self.assertFalse(Timetable.objects.filter(teacher=self.hanna, day_of_week=lesson.day_of_week,
+                                                  period_time=lesson.period_time).exists())
+        self.assertEqual(len(after), len(before))
+        self.assertLessEqual(len(after - before), 2)  # The lesson, and at most one lesson moved to make room
+
+    def test_repair_hands_dropped_subject_to_another_teacher(self):
+        timetabling.write(timetabling.generate())
+        math_lessons = Timetable.objects.filter(subject=self.math).count()
+        self.hanna.subjects.remove(self.math)
+        plan = timetabling.repair_teacher(self.hanna.pk)
+        timetabling.write(plan)
+        self.assertEqual(plan.problems(), [])
+        self.assertFalse(Timetable.objects.filter(teacher=self.hanna, subject=self.math).exists())
+        self.assertEqual(Timetable.objects.filter(subject=self.math, teacher=self.abebe).count(), math_lessons)
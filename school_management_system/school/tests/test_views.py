@@ -1,7 +1,14 @@
+from datetime import date
+
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from school import grading
+from school.models import ClassRoom, Grade, Student, Subject, Attendance
+
 class LoginViewTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -21,3 +28,114 @@ def test_login_view_invalid_credentials(self):
     self.assertEqual(response.status_code, 200)  # login page redisplayed
     self.assertContains(response, "Please enter a correct username and password")
 
+
+class AttendanceRollCallViewTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', password='testpass', role='ADMIN')
+        self.client.force_login(self.admin)
+
+    def _make_class(self, name, size):
+        User = get_user_model()
+        classroom = ClassRoom.objects.create(name=name, section='A')
+        students = [
+            Student.objects.create(
+                user=User.objects.create(username=f'{name}-{i}'),
+                name=f'Student {i}', age=12, gender='Male', classroom=classroom,
+            )
+            for i in range(size)
+        ]
+        return classroom, students
+
+    def _submit(self, classroom, students, status):
+        data = {'date': '2025-03-03'}
+        data.update({f'status_{s.pk}': status for s in students})
+        return self.client.post(reverse('school:attendance_roll_call', args=[classroom.pk]), data)
+
+    def test_roll_call_creates_then_updates(self):
+        classroom, students = self._make_class('Grade 7', 3)
+        response = self._submit(classroom, students, 'Present')
+        self.assertRedirects(response, reverse('school:attendance_list'))
+        self.assertEqual(Attendance.objects.filter(status='Present').count(), 3)
+
+        self._submit(classroom, students, 'Absent')
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(Attendance.objects.filter(status='Absent').count(), 3)
+
+    def test_get_prefills_existing_statuses(self):
+        classroom, students = self._make_class('Grade 7', 2)
+        Attendance.objects.create(student=students[0], date=date(2025, 3, 3), status='Absent')
+        response = self.client.get(reverse('school:attendance_roll_call', args=[classroom.pk]), {'date': '2025-03-03'})
+        form = response.context['form']
+        self.assertEqual(form.fields[f'status_{students[0].pk}'].initial, 'Absent')
+        self.assertEqual(form.fields[f'status_{students[1].pk}'].initial, 'Present')
+
+    def test_query_count_is_constant_as_class_grows(self):
+        counts = []
+        for name, size in (('Small', 5), ('Large', 40)):
+            classroom, students = self._make_class(name, size)
+            with CaptureQueriesContext(connection) as ctx:
+                self._submit(classroom, students, 'Present')
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Attendance.objects.count(), 45)
+
+
+class GradeSheetViewTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', password='testpass', role='ADMIN')
+        self.client.force_login(self.admin)
+        self.subject = Subject.objects.create(name='Mathematics', code='MATH101')
+
+    def _make_class(self, name, size):
+        User = get_user_model()
+        classroom = ClassRoom.objects.create(name=name, section='A')
+        classroom.subjects.add(self.subject)
+        students = [
+            Student.objects.create(
+                user=User.objects.create(username=f'{name}-{i}'),
+                name=f'Student {i}', age=12, gender='Male', classroom=classroom,
+            )
+            for i in range(size)
+        ]
+        return classroom, students
+
+    def _submit(self, classroom, marks):
+        data = {f'marks_{student.pk}': value for student, value in marks}
+        return self.client.post(reverse('school:grade_sheet', args=[classroom.pk, self.subject.pk]), data)
+
+    def test_sheet_creates_then_updates_with_derived_letters(self):
+        classroom, students = self._make_class('Grade 7', 3)
+        response = self._submit(classroom, [(students[0], 95), (students[1], 72.5), (students[2], '')])
+        self.assertRedirects(response, reverse('school:classroom_gradebook', args=[classroom.pk]))
+        self.assertEqual(sorted(Grade.objects.values_list('marks', 'grade')), [(72.5, 'C'), (95.0, 'A')])
+
+        self._submit(classroom, [(students[0], 55), (students[1], ''), (students[2], 81)])
+        self.assertEqual(sorted(Grade.objects.values_list('marks', 'grade')), [(55.0, 'F'), (72.5, 'C'), (81.0, 'B')])
+
+        response = self.client.get(reverse('school:grade_sheet', args=[classroom.pk, self.subject.pk]))
+        self.assertEqual(response.context['form'].fields[f'marks_{students[0].pk}'].initial, 55.0)
+
+    def test_one_bad_row_rejects_the_whole_sheet(self):
+        classroom, students = self._make_class('Grade 7', 2)
+        response = self._submit(classroom, [(students[0], 90), (students[1], 140)])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertFalse(Grade.objects.exists())
+
+    def test_subject_must_be_taught_in_the_classroom(self):
+        classroom = ClassRoom.objects.create(name='Grade 8', section='A')
+        response = self.client.get(reverse('school:grade_sheet', args=[classroom.pk, self.subject.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_is_constant_as_class_grows(self):
+        grading.scales()  # Cached across requests; warmed so both submissions do the same work
+        counts = []
+        for name, size in (('Small', 5), ('Large', 40)):
+            classroom, students = self._make_class(name, size)
+            with CaptureQueriesContext(connection) as ctx:
+                self._submit(classroom, [(student, 70) for student in students])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Grade.objects.filter(grade='C').count(), 45)
@@ -0,0 +1,90 @@
+from datetime import time
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from school import timetabling, weekly
+from school.models import ClassRoom, Subject, Teacher, Student, Timetable
+
+User = get_user_model()
+
+class WeeklyTimetableTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.math = Subject.objects.create(name='Mathematics', code='MATH101', weekly_periods=3)
+        self.class_a = ClassRoom.objects.create(name='Grade 5', section='A')
+        self.class_b = ClassRoom.objects.create(name='Grade 5', section='B')
+        self.class_a.subjects.add(self.math)
+        self.teacher_user = User.objects.create_user(username='teacher', password='pass1234', role='TEACHER')
+        self.teacher = Teacher.objects.create(user=self.teacher_user, name='Mr. Abebe', gender='Male')
+        self.teacher.subjects.add(self.math)
+        self.other = Teacher.objects.create(user=User.objects.create(username='other', role='TEACHER'),
+                                            name='Ms. Hanna', gender='Female')
+        self.student_user = User.objects.create_user(username='sara', password='pass1234', role='STUDENT')
+        Student.objects.create(user=self.student_user, name='Sara', age=11, gender='Female', classroom=self.class_a)
+        self.admin = User.objects.create_user(username='admin', password='pass1234', role='ADMIN')
+        timetabling.write(timetabling.generate())
+
+    def test_teacher_week_is_cached_until_timetable_changes(self):
+        self.client.force_login(self.teacher_user)
+        url = reverse('school:my_timetable')
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['week'].lessons), 3)
+        self.assertContains(response, 'MATH101', count=3)
+        with self.assertNumQueries(2):  # session, user; scope and week come from the cache
+            self.client.get(url)
+
+        Timetable.objects.filter(teacher=self.teacher).first().delete()
+        self.assertEqual(len(self.client.get(url).context['week'].lessons), 2)
+
+    def test_access(self):
+        self.client.force_login(self.teacher_user)
+        self.assertEqual(self.client.get(reverse('school:teacher_timetable', args=[self.other.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('school:classroom_timetable', args=[self.class_b.pk])).status_code, 404)
+        self.client.force_login(self.student_user)
+        self.assertContains(self.client.get(reverse('school:classroom_timetable', args=[self.class_a.pk])), 'Mr. Abebe')
+        self.assertEqual(self.client.get(reverse('school:classroom_timetable', args=[self.class_b.pk])).status_code, 404)
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get(reverse('school:teacher_timetable', args=[self.teacher.pk])), 'Grade 5 - A')
+
+    def test_superuser_without_role_sees_any_classroom(self):
+        superuser = User.objects.create_superuser(username='root', password='pass1234')
+        self.assertIsNone(superuser.role)
+        self.client.force_login(superuser)
+        self.assertContains(self.client.get(reverse('school:classroom_timetable', args=[self.class_a.pk])), 'Mr. Abebe')
+
+    def test_dashboard_shows_week(self):
+        self.client.force_login(self.teacher_user)
+        self.assertContains(self.client.get(reverse('school:teacher_dashboard')), 'MATH101', count=3)
+
+    def test_feed_supports_conditional_requests(self):
+        url = reverse('school:timetable_feed', args=[weekly.feed_token('teacher', self.teacher.pk)])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 3)
+        self.assertIn('RRULE:FREQ=WEEKLY', body)
+        self.assertIn('SUMMARY:Mathematics (Grade 5 - A)', body)
+
+        with self.assertNumQueries(0):
+            unchanged = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        lesson = Timetable.objects.filter(teacher=self.teacher).first()
+        lesson.period_time = time(7, 0)
+        lesson.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+    def test_forged_feed_token_is_rejected(self):
+        token = weekly.feed_token('teacher', self.teacher.pk).replace(f'teacher.{self.teacher.pk}', f'teacher.{self.other.pk}')
+        self.assertEqual(self.client.get(reverse('school:timetable_feed', args=[token])).status_code, 404)
+
+    def test_long_lines_are_folded(self):
+        folded = weekly._fold('SUMMARY:' + 'é' * 80)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in folded.split('\r\n')))
+        self.assertEqual(folded.replace('\r\n ', ''), 'SUMMARY:' + 'é' * 80)
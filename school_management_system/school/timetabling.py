@@ -0,0 +1,402 @@
+"""
+Timetable generation.
+
+The week is a grid of slots: ``Timetable.DAYS_OF_WEEK`` × the period start
+times in ``TIMETABLE_PERIODS``. What every classroom and teacher is doing,
+and when each teacher is unavailable, is kept as a bitset over the slots
+(a Python int, one bit per slot), so the slots free for both a classroom
+and its teacher are a single ``~(classroom | teacher | unavailable)``.
+
+Every (classroom, subject) pair needs ``Subject.weekly_periods`` lessons,
+all taught by one teacher qualified through ``Teacher.subjects``. Teachers
+are assigned first, pairs with the fewest qualified teachers first, each
+to the qualified teacher with the most spare periods. Lessons are then
+placed busiest teacher first, spreading a subject over different days and
+each classroom's day evenly. A lesson with no common free slot is placed
+by moving the lessons blocking a slot elsewhere (a chain of up to two
+moves, undone if it leads nowhere); anything that still does not fit is
+reported rather than forced.
+
+``repair_teacher`` re-plans only the lessons of one teacher after their
+subjects or availability changed, with the rest of the timetable fixed.
+``write`` stores a plan as a diff against the existing rows: one delete
+and one ``bulk_create``.
+"""
+from collections import defaultdict
+from datetime import time
+
+from django.conf import settings
+from django.db import transaction
+
+from . import fragments
+from .models import ClassRoom, Subject, Teacher, TeacherUnavailability, Timetable
+
+DEFAULT_PERIODS = ('08:00', '08:50', '09:40', '10:45', '11:35', '13:30', '14:20', '15:10')
+
+
+def days():
+    return [value for value, _ in Timetable.DAYS_OF_WEEK]
+
+
+def period_times():
+    return [time.fromisoformat(value) for value in getattr(settings, 'TIMETABLE_PERIODS', DEFAULT_PERIODS)]
+
+
+def _bits(mask):
+    """The indexes of the set bits of ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Unit:
+    """The weekly lessons of one subject in one classroom, all taught by one teacher."""
+    __slots__ = ('classroom_id', 'subject_id', 'teacher_id', 'periods', 'slots', 'hints')
+
+    def __init__(self, classroom_id, subject_id, periods, teacher_id=None, slots=(), hints=()):
+        self.classroom_id = classroom_id
+        self.subject_id = subject_id
+        self.teacher_id = teacher_id
+        self.periods = periods
+        self.slots = list(slots)
+        self.hints = list(hints)  # Slots to try first, e.g. where the lessons were before a repair
+
+    def __repr__(self):
+        return f'<Unit classroom={self.classroom_id} subject={self.subject_id} teacher={self.teacher_id} slots={self.slots}>'
+
+
+class Solver:
+    """
+    Places units on a grid of ``day_count`` × ``periods_per_day`` slots.
+    ``qualified`` maps subject id -> teacher ids; ``unavailable`` maps
+    teacher id -> bitset of slots they cannot teach.
+    """
+    def __init__(self, day_count, periods_per_day, qualified, unavailable=None):
+        self.periods_per_day = periods_per_day
+        self.slot_count = day_count * periods_per_day
+        self.all = (1 << self.slot_count) - 1
+        self.day_masks = [((1 << periods_per_day) - 1) << (day * periods_per_day) for day in range(day_count)]
+        self.qualified = qualified
+        self.unavailable = unavailable or {}
+        self.classroom_busy = defaultdict(int)
+        self.teacher_busy = defaultdict(int)
+        self.load = defaultdict(int)  # periods assigned per teacher, placed or not
+        self.at_classroom = {}  # (classroom_id, slot) -> unit
+        self.at_teacher = {}  # (teacher_id, slot) -> unit
+        self.units = []
+        self.moved = set()  # ids of previously placed units that a repair moved
+        self.unplaced = []  # (unit, lessons missing, reason)
+        self.journal = []  # (occupied?, unit, slot) since the current placement began
+
+    # --- Bookkeeping ---
+    def _mark(self, unit, slot):
+        bit = 1 << slot
+        self.classroom_busy[unit.classroom_id] |= bit
+        self.teacher_busy[unit.teacher_id] |= bit
+        self.at_classroom[unit.classroom_id, slot] = unit
+        self.at_teacher[unit.teacher_id, slot] = unit
+
+    def _occupy(self, unit, slot):
+        self._mark(unit, slot)
+        unit.slots.append(slot)
+        self.journal.append((True, unit, slot))
+
+    def _vacate(self, unit, slot):
+        bit = 1 << slot
+        self.classroom_busy[unit.classroom_id] &= ~bit
+        self.teacher_busy[unit.teacher_id] &= ~bit
+        del self.at_classroom[unit.classroom_id, slot]
+        del self.at_teacher[unit.teacher_id, slot]
+        unit.slots.remove(slot)
+        self.journal.append((False, unit, slot))
+
+    def _undo(self, mark):
+        """Reverts every occupy/vacate made since ``len(self.journal)`` was ``mark``."""
+        while len(self.journal) > mark:
+            occupied, unit, slot = self.journal.pop()
+            if occupied:
+                self._vacate(unit, slot)
+            else:
+                self._occupy(unit, slot)
+            self.journal.pop()
+
+    def add(self, unit):
+        """Registers a unit with its current slots; they stay put unless a repair has to move them."""
+        self.units.append(unit)
+        if unit.teacher_id is not None:
+            self.load[unit.teacher_id] += unit.periods
+        for slot in unit.slots:
+            self._mark(unit, slot)
+
+    def free(self, unit, exclude=0):
+        return self.all & ~(
+            self.classroom_busy[unit.classroom_id] | self.teacher_busy[unit.teacher_id]
+            | self.unavailable.get(unit.teacher_id, 0) | exclude
+        )
+
+    # --- Solving ---
+    def solve(self, units):
+        """Assigns teachers to and places every lesson of ``units``; returns the units."""
+        units = list(units)
+        for unit in units:
+            self.add(unit)
+        self._assign_teachers([unit for unit in units if unit.teacher_id is None])
+
+        placing = [unit for unit in units if unit.teacher_id is not None and len(unit.slots) < unit.periods]
+        placing.sort(key=lambda unit: (-self.load[unit.teacher_id], -unit.periods, unit.classroom_id, unit.subject_id))
+        for unit in placing:
+            for slot in unit.hints:
+                if len(unit.slots) < unit.periods and self.free(unit) >> slot & 1:
+                    self._occupy(unit, slot)
+            missing = unit.periods - len(unit.slots)
+            for placed in range(missing):
+                if not self._place(unit):
+                    self.unplaced.append((unit, missing - placed, "no free slot for the classroom and teacher"))
+                    break
+        return units
+
+    def _capacity(self, teacher_id):
+        return self.slot_count - self.unavailable.get(teacher_id, 0).bit_count()
+
+    def _assign_teachers(self, units):
+        units.sort(key=lambda unit: (len(self.qualified.get(unit.subject_id, ())), -unit.periods,
+                                     unit.classroom_id, unit.subject_id))
+        for unit in units:
+            candidates = self.qualified.get(unit.subject_id)
+            if not candidates:
+                self.unplaced.append((unit, unit.periods, "no teacher is qualified for the subject"))
+                continue
+            unit.teacher_id = max(candidates, key=lambda teacher_id: (
+                self._capacity(teacher_id) - self.load[teacher_id], -teacher_id
+            ))
+            self.load[unit.teacher_id] += unit.periods
+
+    def _best(self, unit, free):
+        """The free slot that spreads ``unit`` over new days and keeps its classroom's days even."""
+        used_days = 0
+        for slot in unit.slots:
+            used_days |= self.day_masks[slot // self.periods_per_day]
+        candidates = free & ~used_days or free
+        busy = self.classroom_busy[unit.classroom_id]
+        return min(_bits(candidates), key=lambda slot: (
+            (busy & self.day_masks[slot // self.periods_per_day]).bit_count(), slot % self.periods_per_day, slot
+        ))
+
+    def _place(self, unit):
+        self.journal.clear()
+        free = self.free(unit)
+        if free:
+            self._occupy(unit, self._best(unit, free))
+            return True
+        # Take a slot the teacher could teach in by moving the lessons that hold it,
+        # directly to a free slot or, failing that, by moving one more lesson out of the way.
+        blocked = self.unavailable.get(unit.teacher_id, 0)
+        for depth in (1, 2):
+            for slot in _bits(self.all & ~blocked):
+                if self._clear(unit, slot, depth, 1 << slot):
+                    self._occupy(unit, slot)
+                    self.moved.update(id(moved) for occupied, moved, _ in self.journal if not occupied)
+                    return True
+        return False
+
+    def _clear(self, unit, slot, depth, taboo):
+        """Empties ``slot`` for ``unit`` by moving its blockers to slots outside ``taboo``; undone on failure."""
+        blockers = {self.at_classroom.get((unit.classroom_id, slot)), self.at_teacher.get((unit.teacher_id, slot))}
+        blockers.discard(None)
+        if unit in blockers:
+            return False
+        mark = len(self.journal)
+        for blocker in blockers:
+            self._vacate(blocker, slot)
+        for blocker in blockers:
+            free = self.free(blocker, exclude=taboo)
+            if free:
+                self._occupy(blocker, self._best(blocker, free))
+                continue
+            if depth > 1:
+                options = self.all & ~(self.unavailable.get(blocker.teacher_id, 0) | taboo)
+                target = next((other for other in _bits(options)
+                               if self._clear(blocker, other, depth - 1, taboo | 1 << other)), None)
+                if target is not None:
+                    self._occupy(blocker, target)
+                    continue
+            self._undo(mark)
+            return False
+        return True
+
+
+class Plan:
+    """
+    The outcome of a solver run. ``units`` are every unit in the touched
+    classrooms; ``replace`` are the classrooms planned from scratch, whose
+    lessons off the period grid are dropped as well.
+    """
+    def __init__(self, units, classroom_ids, replace, unplaced):
+        self.units = units
+        self.classroom_ids = classroom_ids
+        self.replace = replace
+        self.unplaced = unplaced
+
+    def rows(self):
+        """(classroom_id, subject_id, teacher_id, day, time) for every lesson of the plan."""
+        day_names, times = days(), period_times()
+        per_day = len(times)
+        return {
+            (unit.classroom_id, unit.subject_id, unit.teacher_id, day_names[slot // per_day], times[slot % per_day])
+            for unit in self.units if unit.classroom_id in self.classroom_ids
+            for slot in unit.slots
+        }
+
+    @property
+    def lesson_count(self):
+        return sum(len(unit.slots) for unit in self.units if unit.classroom_id in self.classroom_ids)
+
+    def problems(self):
+        """Human-readable descriptions of the lessons that could not be placed."""
+        if not self.unplaced:
+            return []
+        classrooms = {classroom.pk: str(classroom) for classroom in ClassRoom.objects.all()}
+        subjects = dict(Subject.objects.values_list('pk', 'name'))
+        return [
+            f"{classrooms.get(unit.classroom_id)} / {subjects.get(unit.subject_id)}: "
+            f"{missing} of {unit.periods} lessons not placed ({reason})"
+            for unit, missing, reason in self.unplaced
+        ]
+
+
+# --- Loading and storing ---
+def _slot_index():
+    times = period_times()
+    return {(day, period): d * len(times) + p for d, day in enumerate(days()) for p, period in enumerate(times)}
+
+
+def _solver(slot_of):
+    qualified = defaultdict(list)
+    for subject_id, teacher_id in Teacher.subjects.through.objects.order_by('teacher_id').values_list('subject_id', 'teacher_id'):
+        qualified[subject_id].append(teacher_id)
+    unavailable = defaultdict(int)
+    for teacher_id, day, period in TeacherUnavailability.objects.values_list('teacher_id', 'day_of_week', 'period_time'):
+        slot = slot_of.get((day, period))
+        if slot is not None:
+            unavailable[teacher_id] |= 1 << slot
+    return Solver(len(days()), len(period_times()), qualified, unavailable)
+
+
+def _units_from_rows(rows, slot_of):
+    """Groups (classroom, subject, teacher, day, time) rows into units; rows off the grid are skipped."""
+    units = {}
+    for classroom_id, subject_id, teacher_id, day, period in rows:
+        slot = slot_of.get((day, period))
+        if slot is None:
+            continue
+        unit = units.get((classroom_id, subject_id, teacher_id))
+        if unit is None:
+            unit = units[classroom_id, subject_id, teacher_id] = Unit(classroom_id, subject_id, 0, teacher_id)
+        unit.slots.append(slot)
+        unit.periods += 1
+    return list(units.values())
+
+
+def _lesson_rows(queryset):
+    return queryset.values_list('classroom_id', 'subject_id', 'teacher_id', 'day_of_week', 'period_time')
+
+
+def _requirements(classroom_ids=None):
+    pairs = ClassRoom.subjects.through.objects.all()
+    if classroom_ids is not None:
+        pairs = pairs.filter(classroom_id__in=classroom_ids)
+    return {
+        (classroom_id, subject_id): periods
+        for classroom_id, subject_id, periods in pairs.values_list('classroom_id', 'subject_id', 'subject__weekly_periods')
+        if periods
+    }
+
+
+def _plan(solver, planned, replace):
+    touched = {unit.classroom_id for unit in planned}
+    touched |= {unit.classroom_id for unit in solver.units if id(unit) in solver.moved}
+    return Plan(solver.units, touched | set(replace), set(replace), solver.unplaced)
+
+
+def generate(classroom_ids=None):
+    """
+    Plans the given classrooms (all when None) from scratch. Lessons of
+    other classrooms stay where they are, though a repair may move some.
+    """
+    if classroom_ids is None:
+        classroom_ids = list(ClassRoom.objects.values_list('pk', flat=True))
+    slot_of = _slot_index()
+    solver = _solver(slot_of)
+    for unit in _units_from_rows(_lesson_rows(Timetable.objects.exclude(classroom_id__in=classroom_ids)), slot_of):
+        solver.add(unit)
+    units = [Unit(classroom_id, subject_id, periods)
+             for (classroom_id, subject_id), periods in sorted(_requirements(classroom_ids).items())]
+    solver.solve(units)
+    return _plan(solver, units, classroom_ids)
+
+
+def repair_teacher(teacher_id):
+    """
+    Re-plans the lessons of one teacher after their subjects or
+    availability changed: lessons in slots they can still teach stay,
+    the rest move, and subjects they no longer teach go to another
+    qualified teacher (in the same slots where possible). Classes of
+    their subjects that have no lessons at all are planned too.
+    """
+    slot_of = _slot_index()
+    solver = _solver(slot_of)
+    required = _requirements()
+    teaches = set(Teacher.subjects.through.objects.filter(teacher_id=teacher_id).values_list('subject_id', flat=True))
+    blocked = solver.unavailable.get(teacher_id, 0)
+
+    existing = _units_from_rows(_lesson_rows(Timetable.objects.all()), slot_of)
+    planned = set()
+    replan = []
+    for unit in existing:
+        if unit.teacher_id != teacher_id:
+            solver.add(unit)
+            planned.add((unit.classroom_id, unit.subject_id))
+            continue
+        periods = required.get((unit.classroom_id, unit.subject_id))
+        if not periods:
+            replan.append(Unit(unit.classroom_id, unit.subject_id, 0, teacher_id))  # Dropped: only its rows go
+        elif unit.subject_id in teaches:
+            keep = [slot for slot in unit.slots if not blocked >> slot & 1][:periods]
+            replan.append(Unit(unit.classroom_id, unit.subject_id, periods, teacher_id, slots=keep))
+        else:
+            replan.append(Unit(unit.classroom_id, unit.subject_id, periods, hints=unit.slots))
+        planned.add((unit.classroom_id, unit.subject_id))
+    replan += [
+        Unit(classroom_id, subject_id, periods)
+        for (classroom_id, subject_id), periods in sorted(required.items())
+        if subject_id in teaches and (classroom_id, subject_id) not in planned
+    ]
+    solver.solve(replan)
+    return _plan(solver, replan, ())
+
+
+def write(plan):
+    """Applies a plan to the Timetable table; returns (created, deleted) row counts."""
+    desired = plan.rows()
+    slot_of = _slot_index()
+    stale, present = [], set()
+    existing = Timetable.objects.filter(classroom_id__in=plan.classroom_ids).values_list(
+        'pk', 'classroom_id', 'subject_id', 'teacher_id', 'day_of_week', 'period_time'
+    )
+    for pk, *row in existing:
+        row = tuple(row)
+        if row in desired:
+            present.add(row)
+        elif row[0] in plan.replace or (row[3], row[4]) in slot_of:
+            stale.append(pk)
+    new = [
+        Timetable(classroom_id=classroom_id, subject_id=subject_id, teacher_id=teacher_id,
+                  day_of_week=day, period_time=period)
+        for classroom_id, subject_id, teacher_id, day, period in sorted(desired - present)
+    ]
+    with transaction.atomic():
+        Timetable.objects.filter(pk__in=stale).delete()
+        Timetable.objects.bulk_create(new, batch_size=1000)
+        fragments.bump('timetable')  # bulk_create sends no post_save
+    return len(new), len(stale)
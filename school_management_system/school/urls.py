@@ -15,6 +15,7 @@ urlpatterns = [
     path('logout/', views.CustomLogoutView.as_view(), name='logout'),
     path('role-redirect/', views.role_redirect, name='role_redirect'), # Keep one instance
     path('force-password-change/', views.force_password_change, name='force_password_change'),
+    path('metrics', views.metrics_endpoint, name='metrics'),
     path('no-permission/', views.no_permission, name='no_permission'), # Keep one instance
 
     # User Management (Admin only)
@@ -27,6 +28,7 @@ urlpatterns = [
    
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('admin-dashboard/data/', views.admin_dashboard_data, name='admin_dashboard_data'),
+    path('admin-dashboard/events/', views.admin_dashboard_events, name='admin_dashboard_events'),
     path('teacher-dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
     path('student-dashboard/', views.student_dashboard, name='student_dashboard'),
 
@@ -34,6 +36,9 @@ urlpatterns = [
     path('classrooms/', views.classroom_list, name='classroom_list'),
     path('classrooms/create/', views.classroom_create, name='classroom_create'),
     path('classrooms/<int:pk>/', views.classroom_detail, name='classroom_detail'),
+    path('classrooms/<int:pk>/gradebook/', views.gradebook, name='classroom_gradebook'),
+    path('classrooms/<int:pk>/grades/<int:subject_pk>/', views.grade_sheet, name='grade_sheet'),
+    path('classrooms/<int:pk>/timetable/', views.classroom_timetable, name='classroom_timetable'),
     path('classrooms/<int:pk>/update/', views.classroom_update, name='classroom_update'),
     path('classrooms/<int:pk>/delete/', views.classroom_delete, name='classroom_delete'),
 
@@ -48,6 +53,7 @@ urlpatterns = [
     path('teachers/', views.teacher_list, name='teacher_list'),
     path('teachers/create/', views.teacher_create, name='teacher_create'),
     path('teachers/<int:pk>/', views.teacher_detail, name='teacher_detail'),
+    path('teachers/<int:pk>/timetable/', views.teacher_timetable, name='teacher_timetable'),
     path('teachers/<int:pk>/update/', views.teacher_update, name='teacher_update'),
     path('teachers/<int:pk>/delete/', views.teacher_delete, name='teacher_delete'),
 
@@ -61,12 +67,40 @@ urlpatterns = [
     # --- Attendances ---
     path('attendances/', views.attendance_list, name='attendance_list'),
     path('attendances/create/', views.attendance_create, name='attendance_create'),
+    path('attendances/roll-call/<int:pk>/', views.attendance_roll_call, name='attendance_roll_call'),
+    path('attendances/report/', views.attendance_report, name='attendance_report'),
     path('attendances/<int:pk>/update/', views.attendance_update, name='attendance_update'),
     path('attendances/<int:pk>/delete/', views.attendance_delete, name='attendance_delete'),
 
     # --- Grades ---
     path('grades/', views.grade_list, name='grade_list'),
+    path('grades/gradebook/', views.gradebook, name='gradebook'),
     path('grades/create/', views.grade_create, name='grade_create'),
     path('grades/<int:pk>/update/', views.grade_update, name='grade_update'),
     path('grades/<int:pk>/delete/', views.grade_delete, name='grade_delete'),
+
+    # --- Fees ---
+    path('fees/', views.fee_list, name='fee_list'),
+    path('fees/balances/', views.fee_balances, name='fee_balances'),
+    path('fees/bill-term/', views.fee_bill_term, name='fee_bill_term'),
+    path('fees/<int:pk>/mark-paid/', views.fee_mark_paid, name='fee_mark_paid'),
+
+    # --- Report cards ---
+    path('report-cards/', views.report_card_batches, name='report_card_batches'),
+    path('report-cards/<int:student_pk>/<str:term>/', views.report_card, name='report_card'),
+
+    # --- Notices ---
+    path('notices/', views.notice_list, name='notice_list'),
+    path('notices/feed/', views.notice_feed, name='notice_feed'),
+    path('notices/create/', views.notice_create, name='notice_create'),
+
+    # --- Timetables ---
+    path('timetable/', views.teacher_timetable, name='my_timetable'),
+    path('timetable/feed/<str:token>.ics', views.timetable_feed, name='timetable_feed'),
+
+    # --- Exports ---
+    path('exports/<str:dataset>/', views.export_data, name='export_data'),
+
+    # --- Autocomplete ---
+    path('autocomplete/<str:kind>/', views.autocomplete, name='autocomplete'),
 ]
\ No newline at end of file
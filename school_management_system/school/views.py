@@ -1,28 +1,79 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.views import LoginView, LogoutView
 from django import forms
 from functools import wraps
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.mail import send_mail
 from django.conf import settings
-from django.utils.crypto import get_random_string
+from django.utils.crypto import constant_time_compare, get_random_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
-from django.db import IntegrityError  # For handling unique constraint errors, e.g., on username
-from django.db.models import Q  # For complex queries like OR conditions
+from django.db import IntegrityError, transaction  # For handling unique constraint errors, e.g., on username
 from django.shortcuts import redirect
-from .models import Grade, ClassRoom, Subject, Teacher, Student, Attendance, User
+from .models import Grade, ClassRoom, Subject, Teacher, Student, Attendance, Fee, Notice, ReportCard, ReportCardBatch, User
 from .forms import (
     GradeForm, ClassRoomForm, SubjectForm,
     TeacherForm, StudentForm, AttendanceForm,
-    CustomUserCreationForm
+    CustomUserCreationForm, RollCallForm, GradeSheetForm, ExportForm, AttendanceReportForm, TermBillingForm,
+    NoticeForm, ReportCardBatchForm,
 )
 from .forms import CustomUserCreationForm, CustomUserChangeForm
-from django.core.paginator import Paginator
+from .pagination import ListSpec
+from .counters import get_counts
+from .scope import get_teacher_scope
+from .autocomplete import SOURCES as AUTOCOMPLETE_SOURCES, scope_fields
+from . import fees, fragments, live, metrics, notices, outbox, reportcards, rollups, search, timetabling, weekly
+from .replicas import read_alias, reads_from_replica
+from .gradebook import Gradebook, STAT_LABELS
+from .exports import DATASETS, FORMATS, export_filename, stream_export
 from django.db.models import Prefetch
+
+# --- List specs ---
+# Whitelisted sort orders, filters and search lookups for the keyset-paginated lists.
+# Each ordering is backed by a composite index declared on the model.
+STUDENT_LIST = ListSpec(
+    orderings={'name': ('name', 'id'), '-name': ('-name', '-id')},
+    filters={'classroom': 'classroom_id'},
+    search=search.searcher('student'),
+)
+ATTENDANCE_LIST = ListSpec(
+    orderings={'-date': ('-date', '-id'), 'date': ('date', 'id')},
+    filters={'status': 'status', 'date': 'date', 'classroom': 'student__classroom_id'},
+    search=search.searcher('student', 'student_id'),
+)
+GRADE_LIST = ListSpec(
+    orderings={'-id': ('-id',), 'id': ('id',)},
+    filters={'subject': 'subject_id', 'student': 'student_id'},
+)
+TEACHER_LIST = ListSpec(
+    orderings={'name': ('name', 'id'), '-name': ('-name', '-id')},
+    search=search.searcher('teacher'),
+)
+SUBJECT_LIST = ListSpec(
+    orderings={'name': ('name', 'id'), '-name': ('-name', '-id')},
+    search=lambda qs, q: qs.filter(search.match('subject', q) | search.match('teacher', q, 'teachers')).distinct(),
+)
+FEE_LIST = ListSpec(
+    orderings={'-date': ('-date', '-id'), 'date': ('date', 'id')},
+    filters={'status': 'status', 'term': 'term', 'classroom': 'student__classroom_id', 'student': 'student_id'},
+    search=search.searcher('student', 'student_id'),
+)
+NOTICE_LIST = ListSpec(
+    orderings={'-id': ('-id',)},
+)
+USER_LIST = ListSpec(
+    orderings={'-date_joined': ('-date_joined', '-id'), 'username': ('username', 'id')},
+    filters={'role': 'role'},
+    search=search.searcher('user'),
+    per_page=10,
+)
 @login_required
 def force_password_change(request):
     """
@@ -146,43 +197,75 @@ def role_redirect(request):
 
 #--------------------------------------------------------------------------------------------------------------------------
 # --- Dashboard Views ---
+@reads_from_replica
 @login_required
 @role_required(['ADMIN'])
 def admin_dashboard(request):
+    counts = get_counts()
     context = {
-        'teachers_count': Teacher.objects.count(),
-        'students_count': Student.objects.count(),
-        'classes_count': ClassRoom.objects.count(),
-        'subjects_count': Subject.objects.count(),
-        'users_count': User.objects.count(),
+        'teachers_count': counts['teachers'],
+        'students_count': counts['students'],
+        'classes_count': counts['classrooms'],
+        'subjects_count': counts['subjects'],
+        'users_count': counts['users'],
         'recent_users': User.objects.order_by('-date_joined')[:5],
+        **notices.context(),
     }
     return render(request, 'school/admin_dashboard.html', context)
 
+@reads_from_replica
 @login_required
 @role_required(['ADMIN'])
 def admin_dashboard_data(request):
-    data = {
-        'teachers_count': Teacher.objects.count(),
-        'students_count': Student.objects.count(),
-        'classes_count': ClassRoom.objects.count(),
-        'subjects_count': Subject.objects.count(),
-        'users_count': User.objects.count(),
-        'recent_users': list(User.objects.order_by('-date_joined').values(
-            'username', 'email', 'date_joined', 'last_login'
-        )[:5])
-    }
-    return JsonResponse(data)
+    """Dashboard figures as JSON for pages without EventSource; unchanged figures get 304."""
+    data_version, data = live.snapshot()
+    etag = live.etag(data_version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 #--------------------------------------------------------------------------------------------------------------------------
+async def admin_dashboard_events(request):
+    """
+    Server-sent stream of the dashboard figures, pushed only when they
+    change. Async so an open dashboard costs an idle coroutine under ASGI.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden("Login required.")
+    if not (user.is_superuser or (getattr(user, 'role', '') or '').upper() == 'ADMIN'):
+        return HttpResponseForbidden("Admins only.")
+    if not isinstance(request, ASGIRequest):
+        # WSGI buffers an async stream whole, so the browser would wait forever; refused, the page polls instead.
+        return HttpResponse("Live updates need the ASGI server.", status=503, content_type='text/plain')
+    response = StreamingHttpResponse(
+        live.dashboard_events(request.headers.get('Last-Event-ID')), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+#--------------------------------------------------------------------------------------------------------------------------
+@reads_from_replica
 @role_required(['TEACHER']) # Changed to uppercase
 def teacher_dashboard(request):
-    """Renders the teacher dashboard."""
-    return render(request, 'school/teacher_dashboard.html')
+    """Renders the teacher dashboard with the teacher's week."""
+    teacher_id = Teacher.objects.filter(user=request.user).values_list('pk', flat=True).first()
+    week = weekly.get_week('teacher', teacher_id) if teacher_id else None
+    return render(request, 'school/teacher_dashboard.html', {
+        'week': week,
+        'days': timetabling.days(),
+        'grid': week.grid() if week else [],
+        **notices.context(),
+    })
 #--------------------------------------------------------------------------------------------------------------------------
+@reads_from_replica
 @role_required(['STUDENT']) # Changed to uppercase
 def student_dashboard(request):
     """Renders the student dashboard."""
-    return render(request, 'school/student_dashboard.html')
+    classroom_id = Student.objects.filter(user=request.user).values_list('classroom_id', flat=True).first()
+    return render(request, 'school/student_dashboard.html', {'classroom_id': classroom_id, **notices.context()})
 #--------------------------------------------------------------------------------------------------------------------------
 @login_required
 def home(request):
@@ -197,12 +280,13 @@ def home(request):
         # It's better to check user.role or user.is_superuser directly if your User model has 'role'
         is_admin_or_teacher = user.is_superuser or (hasattr(user, 'role') and user.role.upper() in ['ADMIN', 'TEACHER'])
 
+    counts = get_counts()
     context = {
-        'total_students': Student.objects.count(),
-        'total_teachers': Teacher.objects.count(),
-        'total_subjects': Subject.objects.count(),
-        'total_classrooms': ClassRoom.objects.count(),
-        'students': Student.objects.all(), # Consider limiting this for performance on large datasets
+        'total_students': counts['students'],
+        'total_teachers': counts['teachers'],
+        'total_subjects': counts['subjects'],
+        'total_classrooms': counts['classrooms'],
+        'students': Student.objects.select_related('classroom'), # Consider limiting this for performance on large datasets
         'is_admin_or_teacher': is_admin_or_teacher,
     }
     return render(request, 'school/home.html', context)
@@ -216,8 +300,7 @@ def classroom_list(request):
     if user.is_superuser or (hasattr(user, 'role') and user.role.upper() == 'ADMIN'):
         classrooms = ClassRoom.objects.all()
     elif hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        classrooms = ClassRoom.objects.filter(subjects__teachers=teacher).distinct()
+        classrooms = ClassRoom.objects.filter(pk__in=get_teacher_scope(request).classroom_ids)
     else:
         # This case should ideally be caught by role_required, but defensive check
         return HttpResponseForbidden("You do not have permission to view this page.")
@@ -227,13 +310,13 @@ def classroom_list(request):
 @role_required(['ADMIN', 'TEACHER'])
 def classroom_detail(request, pk):
     """Displays details of a specific classroom, with teacher-specific access control."""
-    classroom = get_object_or_404(ClassRoom, pk=pk)
-    user = request.user
+    classrooms = ClassRoom.objects.all()
 
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        if not classroom.subjects.filter(teachers=teacher).exists():
-            return HttpResponseForbidden("You do not have permission to view this classroom.")
+    # Out-of-scope classrooms 404 from the same query that loads them
+    scope = get_teacher_scope(request)
+    if scope:
+        classrooms = classrooms.filter(pk__in=scope.classroom_ids)
+    classroom = get_object_or_404(classrooms, pk=pk)
 
     students = Student.objects.filter(classroom=classroom)
     subjects = classroom.subjects.all()
@@ -241,6 +324,7 @@ def classroom_detail(request, pk):
         'classroom': classroom,
         'students': students,
         'subjects': subjects,
+        'markable_subject_ids': scope.subject_ids if scope else None,  # Teachers enter marks for their own subjects
     })
 
 #--------------------------------------------------------------------------------------------------------------------------
@@ -292,38 +376,31 @@ def classroom_delete(request, pk):
 # ---------- SUBJECT VIEWS ----------
 @role_required(['ADMIN', 'TEACHER'])
 def subject_list(request):
-    user = request.user
     subjects = Subject.objects.all()
 
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        subjects = subjects.filter(teachers=teacher)
-
-    query = request.GET.get('q')
-    if query:
-        subjects = subjects.filter(
-            Q(name__icontains=query) | Q(teachers__name__icontains=query)
-        ).distinct()
+    scope = get_teacher_scope(request)
+    if scope:
+        subjects = subjects.filter(pk__in=scope.subject_ids)
 
     # Prefetch related classrooms and teachers for efficient DB access
     subjects = subjects.prefetch_related(
         'teachers',
         Prefetch('classrooms', queryset=ClassRoom.objects.all())
     )
+    page = SUBJECT_LIST.paginate(request, subjects)
 
-    return render(request, 'school/subject_list.html', {'subjects': subjects})
+    return render(request, 'school/subject_list.html', {'subjects': page, 'page': page})
 
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER'])
 def subject_detail(request, pk):
     """Displays details of a specific subject, with teacher-specific access control."""
-    subject = get_object_or_404(Subject, pk=pk)
-    user = request.user
+    subjects = Subject.objects.all()
 
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        if not subject.teachers.filter(pk=teacher.pk).exists():
-            return HttpResponseForbidden("You do not have permission to view this subject.")
+    scope = get_teacher_scope(request)
+    if scope:
+        subjects = subjects.filter(pk__in=scope.subject_ids)
+    subject = get_object_or_404(subjects, pk=pk)
 
     return render(request, 'school/subject_detail.html', {'subject': subject})
 
@@ -378,12 +455,10 @@ def subject_delete(request, pk):
 def teacher_list(request):
     """Lists all teachers, with search functionality."""
     query = request.GET.get('q', '')
-    if query:
-        teachers = Teacher.objects.filter(name__icontains=query)
-    else:
-        teachers = Teacher.objects.all()
+    page = TEACHER_LIST.paginate(request, Teacher.objects.prefetch_related('subjects'))
     context = {
-        'teachers': teachers,
+        'teachers': page,
+        'page': page,
         'query': query,
     }
     return render(request, 'school/teacher_list.html', context)
@@ -396,7 +471,7 @@ def teacher_detail(request, pk):
     user = request.user
 
     # A teacher can only view their own profile unless they are an Admin
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER' and teacher.user != user:
+    if hasattr(user, 'role') and user.role.upper() == 'TEACHER' and teacher.user_id != user.pk:
         return HttpResponseForbidden("You do not have permission to view this teacher's details.")
 
     return render(request, 'school/teacher_detail.html', {'teacher': teacher})
@@ -406,7 +481,7 @@ def teacher_detail(request, pk):
 def teacher_create(request):
     """
     Handles creation of a new teacher, including associated User account.
-    Generates a temporary password and sends an email.
+    Generates a temporary password and queues the credentials email.
     """
     if request.method == 'POST':
         form = TeacherForm(request.POST)
@@ -427,47 +502,38 @@ def teacher_create(request):
                 # Generate a secure temporary password
                 temp_password = get_random_string(length=12) # Longer for better security
 
-                # Create user first
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    password=temp_password, # Use temp_password
-                    role='TEACHER', # Assign the role
-                    force_password_change=True # Force password change on first login
-                )
-                user.save() # Ensure user is saved
+                # The account, the teacher profile and the credentials email commit together
+                with transaction.atomic():
+                    user = User.objects.create_user(
+                        username=username,
+                        email=email,
+                        password=temp_password, # Use temp_password
+                        role='TEACHER', # Assign the role
+                        force_password_change=True # Force password change on first login
+                    )
 
-                teacher = form.save(commit=False)
-                teacher.user = user
-                teacher.save()
-                form.save_m2m() # Save ManyToMany relationships if any
+                    teacher = form.save(commit=False)
+                    teacher.user = user
+                    teacher.save()
+                    form.save_m2m() # Save ManyToMany relationships if any
 
-                # Send email with credentials
-                try:
-                    send_mail(
+                    # Queued in the outbox; the send_outbox worker delivers it
+                    outbox.enqueue(
                         subject='Your New Teacher Account Credentials',
                         message=f"Hello {user.username},\n\nYour teacher account has been created for the School Management System.\n\n"
                                 f"Username: {user.username}\nTemporary Password: {temp_password}\n\n"
                                 f"Please log in using these credentials at {request.build_absolute_uri('/')} and "
                                 f"change your password immediately for security reasons. You will be prompted to do so.\n\n"
                                 f"Thank you.",
-                        from_email=settings.DEFAULT_FROM_EMAIL,
                         recipient_list=[user.email],
-                        fail_silently=False,
                     )
-                    messages.success(request, f"Teacher '{teacher.name}' created successfully. Login credentials sent to {user.email}.")
-                except Exception as e:
-                    messages.warning(request, f"Teacher '{teacher.name}' created, but failed to send email: {e}. Please provide credentials manually.")
-                
+                messages.success(request, f"Teacher '{teacher.name}' created successfully. Login credentials will be emailed to {user.email}.")
                 return redirect('school:teacher_list')
 
             except IntegrityError:
                 messages.error(request, "A user with this email or username might already exist.")
             except Exception as e:
                 messages.error(request, f"An unexpected error occurred: {e}")
-                # Consider deleting the partially created user if teacher creation fails
-                if 'user' in locals() and user.pk:
-                    user.delete()
         else:
             messages.error(request, "Error creating teacher. Please correct the form errors.")
     else:
@@ -511,22 +577,16 @@ def teacher_delete(request, pk):
 # ---------- STUDENT VIEWS ----------
 @role_required(['ADMIN', 'TEACHER', 'STUDENT'])
 def student_list(request):
-    students = Student.objects.all()
+    """Lists students one keyset page at a time, with name search and classroom filter."""
+    students = Student.objects.select_related('classroom')
     classrooms = ClassRoom.objects.all()
-
-    # Filter by search query
-    q = request.GET.get('q')
-    if q:
-        students = students.filter(name__icontains=q)
-
-    # Filter by classroom
-    classroom_id = request.GET.get('classroom')
-    if classroom_id:
-        students = students.filter(classroom_id=classroom_id)
+    page = STUDENT_LIST.paginate(request, students)
 
     return render(request, 'school/student_list.html', {
-        'students': students,
+        'students': page,
+        'page': page,
         'classrooms': classrooms,
+        **fragments.context(request, 'student_list'),
     })
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER', 'STUDENT'])
@@ -534,21 +594,24 @@ def student_detail(request, pk):
     """
     Displays details of a specific student, with role-based access control.
     """
-    student = get_object_or_404(Student, pk=pk)
+    students = Student.objects.select_related('classroom')
     user = request.user
 
     # Student can only view their own profile
-    if hasattr(user, 'role') and user.role.upper() == 'STUDENT' and student.user != user:
-        return HttpResponseForbidden("You do not have permission to view this student's details.")
+    if hasattr(user, 'role') and user.role.upper() == 'STUDENT':
+        students = students.filter(user=user)
 
     # Teacher can only view students in classrooms they teach subjects in
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        # Check if the student's classroom is associated with any subject taught by this teacher
-        if not ClassRoom.objects.filter(pk=student.classroom.pk, subjects__teachers=teacher).exists():
-            return HttpResponseForbidden("You do not have permission to view this student.")
-
-    return render(request, 'school/student_detail.html', {'student': student})
+    scope = get_teacher_scope(request)
+    if scope:
+        students = students.filter(classroom_id__in=scope.classroom_ids)
+
+    student = get_object_or_404(students, pk=pk)
+    balance = None if scope else fees.student_balance(student.pk)  # Fees are for the office and the student
+    report_terms = [] if scope else list(student.report_cards.order_by('-term').values_list('term', flat=True))
+    return render(request, 'school/student_detail.html', {
+        'student': student, 'balance': balance, 'report_terms': report_terms,
+    })
 
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN'])
@@ -600,25 +663,67 @@ def student_delete(request, pk):
 
 #--------------------------------------------------------------------------------------------------------------------------
 # ---------- GRADES VIEWS ----------
+@reads_from_replica
 @role_required(['ADMIN', 'TEACHER'])
 def grade_list(request):
     """Lists all grades, filtered for teachers to show only relevant ones."""
-    user = request.user
-    grades = Grade.objects.select_related('student', 'subject').order_by('-id')
+    grades = Grade.objects.select_related('student', 'subject')
 
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        classrooms = ClassRoom.objects.filter(subjects__teachers=teacher)
-        grades = grades.filter(student__classroom__in=classrooms)
+    scope = get_teacher_scope(request)
+    if scope:
+        grades = grades.filter(scope.students_in_scope())
 
-    return render(request, 'school/grade_list.html', {'grades': grades})
+    page = GRADE_LIST.paginate(request, grades)
+    return render(request, 'school/grade_list.html', {
+        'grades': page, 'page': page, **fragments.context(request, 'grade_list'),
+    })
+
+#--------------------------------------------------------------------------------------------------------------------------
+GRADEBOOK_HTML_ROWS = 200  # The school-wide HTML view shows the top ranks; JSON has everything.
+
+@reads_from_replica
+@role_required(['ADMIN', 'TEACHER'])
+def gradebook(request, pk=None):
+    """
+    Student × subject marks matrix with per-subject statistics and
+    per-student rank, for one classroom or (pk=None) every classroom the
+    user can see. Add ?format=json for the full pivot.
+    """
+    classroom = None
+    scope = get_teacher_scope(request)
+    classroom_ids = scope.classroom_ids if scope else None
+    if pk is not None:
+        classrooms = ClassRoom.objects.all()
+        if scope:
+            classrooms = classrooms.filter(pk__in=scope.classroom_ids)
+        classroom = get_object_or_404(classrooms, pk=pk)
+        classroom_ids = [classroom.pk]
+
+    data = Gradebook.for_classrooms(classroom_ids).to_dict()
+    if request.GET.get('format') == 'json':
+        return JsonResponse(data)
+
+    students = data['students']
+    truncated = classroom is None and len(students) > GRADEBOOK_HTML_ROWS
+    if classroom is None:
+        students = sorted(students, key=lambda student: student['rank'])[:GRADEBOOK_HTML_ROWS]
+    stat_rows = [(label, [subject[name] for subject in data['subjects']]) for name, label in STAT_LABELS.items()]
+    return render(request, 'school/gradebook.html', {
+        'classroom': classroom,
+        'subjects': data['subjects'],
+        'students': students,
+        'stat_rows': stat_rows,
+        'truncated': truncated,
+        'student_total': len(data['students']),
+    })
 
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER'])
 def grade_create(request):
     """Handles creation of a new grade."""
+    scope = get_teacher_scope(request)  # Teachers pick from their own classrooms and subjects
     if request.method == 'POST':
-        form = GradeForm(request.POST)
+        form = scope_fields(GradeForm(request.POST), scope)
         if form.is_valid():
             form.save()
             messages.success(request, 'Grade added successfully.')
@@ -626,16 +731,17 @@ def grade_create(request):
         else:
             messages.error(request, "Error adding grade. Please check the form.")
     else:
-        form = GradeForm()
+        form = scope_fields(GradeForm(), scope)
     return render(request, 'school/grade_form.html', {'form': form, 'title': 'Add Grade'})
 
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER'])
 def grade_update(request, pk):
     """Handles updating an existing grade."""
+    scope = get_teacher_scope(request)
     grade = get_object_or_404(Grade, pk=pk)
     if request.method == 'POST':
-        form = GradeForm(request.POST, instance=grade)
+        form = scope_fields(GradeForm(request.POST, instance=grade), scope)
         if form.is_valid():
             form.save()
             messages.success(request, 'Grade updated successfully.')
@@ -643,7 +749,7 @@ def grade_update(request, pk):
         else:
             messages.error(request, "Error updating grade. Please check the form.")
     else:
-        form = GradeForm(instance=grade)
+        form = scope_fields(GradeForm(instance=grade), scope)
     return render(request, 'school/grade_form.html', {'form': form, 'title': 'Edit Grade'})
 
 #--------------------------------------------------------------------------------------------------------------------------
@@ -657,31 +763,72 @@ def grade_delete(request, pk):
         return redirect('school:grade_list')
     return render(request, 'school/grade_confirm_delete.html', {'grade': grade})
 
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN', 'TEACHER'])
+def grade_sheet(request, pk, subject_pk):
+    """
+    Enters marks for a whole classroom in one subject, spreadsheet-style.
+    The roster and the existing marks are loaded in two queries and the
+    submission is validated as one form and written with a single bulk
+    upsert, so the cost of a submission does not depend on the class size.
+    """
+    classrooms = ClassRoom.objects.all()
+    subjects = Subject.objects.filter(classrooms=pk)
+
+    scope = get_teacher_scope(request)
+    if scope:
+        classrooms = classrooms.filter(pk__in=scope.classroom_ids)
+        subjects = subjects.filter(pk__in=scope.subject_ids)
+    classroom = get_object_or_404(classrooms, pk=pk)
+    subject = get_object_or_404(subjects, pk=subject_pk)
+
+    students = list(Student.objects.filter(classroom=classroom).order_by('name', 'id').only('id', 'name'))
+
+    if request.method == 'POST':
+        form = GradeSheetForm(request.POST, students=students, subject=subject)
+        if form.is_valid():
+            count = form.save()
+            messages.success(request, f"Marks saved for {count} students in {subject.name}.")
+            return redirect('school:classroom_gradebook', pk=classroom.pk)
+        else:
+            messages.error(request, "Error saving marks. Please check the highlighted rows.")
+    else:
+        existing = dict(
+            Grade.objects.filter(student__classroom=classroom, subject=subject).values_list('student_id', 'marks')
+        )
+        form = GradeSheetForm(students=students, subject=subject, existing=existing)
+
+    return render(request, 'school/grade_sheet.html', {
+        'form': form,
+        'classroom': classroom,
+        'subject': subject,
+        'title': f"{subject.name} Marks: {classroom}",
+    })
+
 #--------------------------------------------------------------------------------------------------------------------------
 # ---------- ATTENDANCE VIEWS ----------
+@reads_from_replica
 @role_required(['ADMIN', 'TEACHER'])
 def attendance_list(request):
     """Lists all attendance records, filtered for teachers to show only relevant ones. Supports search."""
-    attendances = Attendance.objects.all().order_by('-date')
-    user = request.user
-
-    if hasattr(user, 'role') and user.role.upper() == 'TEACHER':
-        teacher = get_object_or_404(Teacher, user=user)
-        classrooms = ClassRoom.objects.filter(subjects__teachers=teacher)
-        attendances = attendances.filter(student__classroom__in=classrooms)
+    attendances = Attendance.objects.select_related('student__classroom')
 
-    query = request.GET.get('q')
-    if query:
-        attendances = attendances.filter(student__name__icontains=query)
+    scope = get_teacher_scope(request)
+    if scope:
+        attendances = attendances.filter(scope.students_in_scope())
 
-    return render(request, 'school/attendance_list.html', {'attendances': attendances})
+    page = ATTENDANCE_LIST.paginate(request, attendances)
+    return render(request, 'school/attendance_list.html', {
+        'attendances': page, 'page': page, **fragments.context(request, 'attendance_list'),
+    })
 
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER'])
 def attendance_create(request):
     """Handles creation of a new attendance record."""
+    scope = get_teacher_scope(request)
     if request.method == 'POST':
-        form = AttendanceForm(request.POST)
+        form = scope_fields(AttendanceForm(request.POST), scope)
         if form.is_valid():
             form.save()
             messages.success(request, "Attendance recorded successfully.")
@@ -689,16 +836,95 @@ def attendance_create(request):
         else:
             messages.error(request, "Error recording attendance. Please check the form.")
     else:
-        form = AttendanceForm()
+        form = scope_fields(AttendanceForm(), scope)
     return render(request, 'school/attendance_form.html', {'form': form, 'title': 'Record Attendance'})
 
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN', 'TEACHER'])
+def attendance_roll_call(request, pk):
+    """
+    Marks attendance for a whole classroom on one date.
+    The roster and any existing statuses are loaded in two queries and
+    the submission is written with a single bulk upsert, so the cost of a
+    roll-call does not depend on how many students are in the class.
+    """
+    classrooms = ClassRoom.objects.all()
+
+    scope = get_teacher_scope(request)
+    if scope:
+        classrooms = classrooms.filter(pk__in=scope.classroom_ids)
+    classroom = get_object_or_404(classrooms, pk=pk)
+
+    students = list(Student.objects.filter(classroom=classroom).only('id', 'name'))
+
+    if request.method == 'POST':
+        form = RollCallForm(request.POST, students=students)
+        if form.is_valid():
+            count = form.save()
+            messages.success(request, f"Attendance recorded for {count} students on {form.cleaned_data['date']}.")
+            return redirect('school:attendance_list')
+        else:
+            messages.error(request, "Error recording attendance. Please check the form.")
+    else:
+        try:
+            day = forms.DateField().clean(request.GET.get('date')) or timezone.localdate()
+        except forms.ValidationError:
+            day = timezone.localdate()
+        existing = dict(
+            Attendance.objects.filter(student__classroom=classroom, date=day).values_list('student_id', 'status')
+        )
+        form = RollCallForm(initial={'date': day}, students=students, existing=existing)
+
+    return render(request, 'school/attendance_roll_call.html', {
+        'form': form,
+        'classroom': classroom,
+        'title': f"Roll Call: {classroom}",
+    })
+
+#--------------------------------------------------------------------------------------------------------------------------
+@reads_from_replica
+@role_required(['ADMIN', 'TEACHER'])
+def attendance_report(request):
+    """
+    Attendance rates per classroom, a daily trend for one classroom and the
+    students below a threshold rate, read from the rollup tables only.
+    Teachers see their own classrooms. Add ?format=json for the raw figures.
+    """
+    classrooms = ClassRoom.objects.all()
+    scope = get_teacher_scope(request)
+    if scope:
+        classrooms = classrooms.filter(pk__in=scope.classroom_ids)
+    classroom_ids = scope.classroom_ids if scope else None
+
+    form = AttendanceReportForm(request.GET, classrooms=classrooms)
+    if not form.is_valid():
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'errors': form.errors}, status=400)
+        return render(request, 'school/attendance_report.html', {'form': form})
+
+    start, end = form.cleaned_data['date_from'], form.cleaned_data['date_to']
+    classroom = form.cleaned_data.get('classroom')
+    selected_ids = [classroom.pk] if classroom else classroom_ids
+    data = {
+        'date_from': start,
+        'date_to': end,
+        'threshold': form.cleaned_data['threshold'],
+        'classrooms': rollups.classroom_rates(start, end, classroom_ids),
+        'trend': rollups.classroom_trend(classroom.pk, start, end) if classroom else [],
+        'below_threshold': rollups.students_below(form.cleaned_data['threshold'], start, end, selected_ids),
+    }
+    if request.GET.get('format') == 'json':
+        return JsonResponse(data)
+    return render(request, 'school/attendance_report.html', {'form': form, 'classroom': classroom, **data})
+
 #--------------------------------------------------------------------------------------------------------------------------
 @role_required(['ADMIN', 'TEACHER'])
 def attendance_update(request, pk):
     """Handles updating an existing attendance record."""
+    scope = get_teacher_scope(request)
     attendance = get_object_or_404(Attendance, pk=pk)
     if request.method == 'POST':
-        form = AttendanceForm(request.POST, instance=attendance)
+        form = scope_fields(AttendanceForm(request.POST, instance=attendance), scope)
         if form.is_valid():
             form.save()
             messages.success(request, "Attendance updated successfully.")
@@ -706,7 +932,7 @@ def attendance_update(request, pk):
         else:
             messages.error(request, "Error updating attendance. Please check the form.")
     else:
-        form = AttendanceForm(instance=attendance)
+        form = scope_fields(AttendanceForm(instance=attendance), scope)
     return render(request, 'school/attendance_form.html', {'form': form, 'title': 'Edit Attendance'})
 
 #--------------------------------------------------------------------------------------------------------------------------
@@ -720,6 +946,219 @@ def attendance_delete(request, pk):
         return redirect('school:attendance_list')
     return render(request, 'school/attendance_confirm_delete.html', {'attendance': attendance})
 
+#--------------------------------------------------------------------------------------------------------------------------
+# ---------- FEE VIEWS ----------
+@role_required(['ADMIN'])
+def fee_list(request):
+    """Lists fees, filterable by status, term, classroom and student."""
+    page = FEE_LIST.paginate(request, Fee.objects.select_related('student__classroom'))
+    return render(request, 'school/fee_list.html', {
+        'fees': page, 'page': page, 'terms': fees.terms(), **fragments.context(request, 'fee_list'),
+    })
+
+#--------------------------------------------------------------------------------------------------------------------------
+@reads_from_replica
+@role_required(['ADMIN'])
+def fee_balances(request):
+    """
+    School-wide outstanding total and balances per classroom, or per
+    student with ?classroom=<id>. Add ?format=json for the raw figures.
+    """
+    classroom = None
+    if request.GET.get('classroom'):
+        if not request.GET['classroom'].isdigit():
+            return HttpResponseBadRequest("Invalid classroom.")
+        classroom = get_object_or_404(ClassRoom, pk=request.GET['classroom'])
+    data = {
+        'school': fees.school_outstanding(),
+        'classrooms': fees.classroom_balances(),
+        'students': fees.student_balances(classroom.pk) if classroom else [],
+    }
+    if request.GET.get('format') == 'json':
+        return JsonResponse(data)
+    return render(request, 'school/fee_balances.html', {'classroom': classroom, **data})
+
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN'])
+def fee_bill_term(request):
+    """Bills a term's fee to every student of the selected classrooms in one bulk insert."""
+    if request.method == 'POST':
+        form = TermBillingForm(request.POST)
+        if form.is_valid():
+            data = form.cleaned_data
+            count = fees.bill_term(data['term'], data['amount'], [classroom.pk for classroom in data['classrooms']])
+            messages.success(request, f"Billed {count} students for {data['term']}.")
+            return redirect('school:fee_balances')
+        else:
+            messages.error(request, "Error billing the term. Please check the form.")
+    else:
+        form = TermBillingForm()
+    return render(request, 'school/fee_bill_term.html', {'form': form, 'title': 'Bill a Term'})
+
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN'])
+def fee_mark_paid(request, pk):
+    """Marks one fee as paid."""
+    fee = get_object_or_404(Fee.objects.select_related('student'), pk=pk)
+    if request.method == 'POST':
+        if fees.mark_paid([fee.pk]):
+            messages.success(request, f"Fee of {fee.amount:.2f} for {fee.student.name} marked as paid.")
+        next_url = request.POST.get('next')
+        if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            return redirect(next_url)
+    return redirect('school:fee_list')
+
+#--------------------------------------------------------------------------------------------------------------------------
+# ---------- REPORT CARD VIEWS ----------
+REPORT_CARD_BATCHES_SHOWN = 20
+
+@role_required(['ADMIN'])
+def report_card_batches(request):
+    """
+    Queues a term's report cards for one classroom or the whole school, and
+    shows the progress of recent batches. The generate_report_cards worker
+    renders them.
+    """
+    if request.method == 'POST':
+        form = ReportCardBatchForm(request.POST)
+        if form.is_valid():
+            batch = form.save(commit=False)
+            batch.requested_by = request.user
+            batch.save()
+            messages.success(request, f"Report cards for {batch.term} queued.")
+            return redirect('school:report_card_batches')
+        else:
+            messages.error(request, "Error queueing report cards. Please check the form.")
+    else:
+        form = ReportCardBatchForm()
+    batches = list(ReportCardBatch.objects.select_related('classroom', 'requested_by')[:REPORT_CARD_BATCHES_SHOWN])
+    return render(request, 'school/report_card_batches.html', {
+        'form': form,
+        'batches': batches,
+        'in_progress': any(batch.status in ('PENDING', 'RUNNING') for batch in batches),
+    })
+
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN', 'TEACHER', 'STUDENT'])
+def report_card(request, student_pk, term):
+    """Serves a generated report card: any for admins, their classrooms' for teachers, their own for students."""
+    cards = ReportCard.objects.filter(term=term)
+    if (request.user.role or '').upper() == 'STUDENT':
+        cards = cards.filter(student__user=request.user)
+    scope = get_teacher_scope(request)
+    if scope:
+        cards = cards.filter(student_id__in=scope.student_ids)
+    card = get_object_or_404(cards, student_id=student_pk)
+    try:
+        return HttpResponse(reportcards.read_card(card), content_type='text/html; charset=utf-8')
+    except FileNotFoundError:
+        raise Http404("This report card has not been generated yet.") from None
+
+#--------------------------------------------------------------------------------------------------------------------------
+# ---------- NOTICE VIEWS ----------
+@login_required
+def notice_list(request):
+    """Lists every notice, newest first."""
+    page = NOTICE_LIST.paginate(request, Notice.objects.select_related('posted_by'))
+    user = request.user
+    can_post = user.is_superuser or (getattr(user, 'role', '') or '').upper() in ('ADMIN', 'TEACHER')
+    return render(request, 'school/notice_list.html', {'notices': page, 'page': page, 'can_post': can_post})
+
+#--------------------------------------------------------------------------------------------------------------------------
+@login_required
+def notice_feed(request):
+    """
+    The newest notices as JSON, or only those after ?since=<id>. Polls
+    that find nothing new are answered 304 from the cache.
+    """
+    try:
+        since = int(request.GET.get('since') or 0)
+    except ValueError:
+        return HttpResponseBadRequest("since must be a notice id.")
+    feed = notices.get_feed()
+    etag = feed.etag(since)
+    last_modified = int(feed.last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(feed.delta(since))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN', 'TEACHER'])
+def notice_create(request):
+    """Posts a notice to every dashboard."""
+    if request.method == 'POST':
+        form = NoticeForm(request.POST)
+        if form.is_valid():
+            notice = form.save(commit=False)
+            notice.posted_by = request.user
+            notice.save()
+            messages.success(request, 'Notice posted successfully.')
+            return redirect('school:notice_list')
+        else:
+            messages.error(request, "Error posting notice. Please check the form.")
+    else:
+        form = NoticeForm()
+    return render(request, 'school/notice_form.html', {'form': form, 'title': 'Post Notice'})
+
+#--------------------------------------------------------------------------------------------------------------------------
+# ---------- TIMETABLE VIEWS ----------
+def _week_page(request, week):
+    if week.title is None:
+        raise Http404("No such teacher or classroom.")
+    feed = reverse('school:timetable_feed', args=[weekly.feed_token(week.kind, week.owner_id)])
+    return render(request, 'school/timetable_week.html', {
+        'week': week,
+        'days': timetabling.days(),
+        'grid': week.grid(),
+        'feed_url': request.build_absolute_uri(feed),
+    })
+
+@role_required(['ADMIN', 'TEACHER'])
+def teacher_timetable(request, pk=None):
+    """A teacher's week: their own without a pk, any teacher's for admins."""
+    scope = get_teacher_scope(request)
+    if scope:
+        if pk is not None and pk != scope.teacher_id:
+            raise Http404("Teachers can only view their own timetable.")
+        pk = scope.teacher_id
+    elif pk is None:
+        raise Http404("Only teachers have a timetable of their own.")
+    return _week_page(request, weekly.get_week('teacher', pk))
+
+#--------------------------------------------------------------------------------------------------------------------------
+@role_required(['ADMIN', 'TEACHER', 'STUDENT'])
+def classroom_timetable(request, pk):
+    """A classroom's week, for admins, the classroom's teachers and its students."""
+    scope = get_teacher_scope(request)
+    if scope and pk not in scope.classroom_ids:
+        raise Http404("Classroom not found.")
+    if (request.user.role or '').upper() == 'STUDENT' and not Student.objects.filter(user=request.user, classroom_id=pk).exists():
+        raise Http404("Classroom not found.")
+    return _week_page(request, weekly.get_week('classroom', pk))
+
+#--------------------------------------------------------------------------------------------------------------------------
+def timetable_feed(request, token):
+    """
+    iCalendar feed of a week for calendar subscriptions. The signed token
+    in the URL stands in for a login; polls of an unchanged week get 304.
+    """
+    owner = weekly.read_feed_token(token)
+    week = weekly.get_week(*owner) if owner else None
+    if week is None or week.title is None:
+        raise Http404("Unknown calendar feed.")
+    last_modified = int(week.last_modified.timestamp())
+    response = get_conditional_response(request, etag=week.etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(weekly.to_ics(week), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = week.etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 #--------------------------------------------------------------------------------------------------------------------------
 # --- User Management (Admin Only) ---
 @role_required(['ADMIN'])
@@ -727,16 +1166,7 @@ def user_list(request):
     search_query = request.GET.get('q', '')
     role_filter = request.GET.get('role', '')
 
-    users = User.objects.all()
-
-    if search_query:
-        users = users.filter(username__icontains=search_query)
-    if role_filter:
-        users = users.filter(role__iexact=role_filter)
-
-    paginator = Paginator(users.order_by('-date_joined'), 10)  # 10 per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = USER_LIST.paginate(request, User.objects.all())
 
     context = {
         'page_obj': page_obj,
@@ -773,38 +1203,97 @@ def user_create_by_admin(request):
     """
     Handles creation of new user accounts by an admin.
     Generates a temporary password, forces password change on first login,
-    and sends credentials via email.
+    and queues the credentials email.
     """
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            user = form.save(commit=False)
             temp_password = get_random_string(length=12) # Generate a secure temporary password
-            user.set_password(temp_password)
-            user.force_password_change = True # Set flag to force password change
-            user.save()
-
-            # Send email with credentials
-            try:
-                send_mail(
+            with transaction.atomic():
+                user = form.save(commit=False)
+                user.set_password(temp_password)
+                user.force_password_change = True # Set flag to force password change
+                user.save()
+
+                # Queued in the outbox; the send_outbox worker delivers it
+                outbox.enqueue(
                     subject='Your Account Credentials for School Management System',
                     message=f"Hello {user.username},\n\nYour account has been created.\n\n"
                             f"Username: {user.username}\nTemporary Password: {temp_password}\n\n"
                             f"Please log in using these credentials at {request.build_absolute_uri('/')} and "
                             f"change your password immediately. You will be prompted to do so.\n\n"
                             f"If you have any questions, please contact the administrator.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=[user.email],
-                    fail_silently=False, # Set to True in production to avoid crashing on email errors
                 )
-                messages.success(request, f"User '{user.username}' created and email sent successfully.")
-            except Exception as e:
-                messages.warning(request, f"User '{user.username}' created, but failed to send email: {e}. Please provide credentials manually.")
-            
+            messages.success(request, f"User '{user.username}' created. Login credentials will be emailed to {user.email}.")
+
             return redirect('school:user_list')
         else:
             messages.error(request, "Error creating user. Please correct the form errors.")
     else:
         form = CustomUserCreationForm()
     return render(request, 'school/user_form.html', {'form': form, 'title': 'Create User'})
+#--------------------------------------------------------------------------------------------------------------------------
+# --- Exports ---
+@reads_from_replica
+@role_required(['ADMIN', 'TEACHER'])
+def export_data(request, dataset):
+    """
+    Streams attendance, grades or the student roster as CSV or JSON Lines.
+    Teachers only get rows for their own classrooms. Supports
+    ?date_from=&date_to=&classroom=&format=csv|jsonl&gzip=1.
+    """
+    if dataset not in DATASETS:
+        raise Http404("Unknown export.")
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    options = form.cleaned_data
+    fmt, compress = options['format'], options['gzip']
+    chunks = stream_export(
+        dataset, fmt=fmt, compress=compress,
+        scope=get_teacher_scope(request),
+        classroom=options['classroom'],
+        date_from=options['date_from'],
+        date_to=options['date_to'],
+        using=read_alias(),  # Streamed after the middleware has finished routing
+    )
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if compress else FORMATS[fmt])
+    filename = export_filename(dataset, fmt, compress, timezone.localdate())
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+#--------------------------------------------------------------------------------------------------------------------------
+# --- Autocomplete ---
+@reads_from_replica
+@role_required(['ADMIN', 'TEACHER'])
+def autocomplete(request, kind):
+    """
+    Options for an autocomplete field as JSON: {"results": [{"id", "text"}], "more"}.
+    ?q= matches word prefixes; teachers only get rows in their scope.
+    """
+    source = AUTOCOMPLETE_SOURCES.get(kind)
+    if source is None:
+        raise Http404("Unknown autocomplete.")
+    if not request.user.is_superuser and (request.user.role or '').upper() not in source.roles:
+        return HttpResponseForbidden()
+    options, more = source.options(request.GET.get('q', '')[:100], get_teacher_scope(request))
+    return JsonResponse({'results': [{'id': pk, 'text': label} for pk, label in options], 'more': more})
+#--------------------------------------------------------------------------------------------------------------------------
+# --- Metrics ---
+def metrics_endpoint(request):
+    """
+    Prometheus scrape target with per-view request metrics from every worker.
+    Open to admins, or to a scraper sending "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    token = settings.METRICS_TOKEN
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return _metrics_response()
+    return _admin_metrics(request)
+
+@role_required(['ADMIN'])
+def _admin_metrics(request):
+    return _metrics_response()
 
+def _metrics_response():
+    return HttpResponse(metrics.render(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
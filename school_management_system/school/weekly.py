@@ -0,0 +1,156 @@
+"""
+Weekly timetables for one teacher or one classroom.
+
+A week is read with a single ``select_related`` query and laid out as a
+day × period grid. Built weeks are cached per teacher and per classroom
+under the data versions of the timetable and of the models whose names it
+shows (see school/fragments.py), so any Timetable change invalidates
+every cached week in O(1) and an unchanged week is never rebuilt.
+
+Each week is also published as an iCalendar feed of weekly recurring
+events. Calendar apps poll feeds without logging in, so feed URLs carry a
+signed token instead, and responses have an ETag and Last-Modified so a
+poll of an unchanged week is answered with 304 from the cache alone.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import fragments
+from .models import ClassRoom, Teacher, Timetable
+from .timetabling import days, period_times
+
+DEPENDS = ('timetable', 'subject', 'teacher', 'classroom')
+OWNER_FIELDS = {'teacher': 'teacher_id', 'classroom': 'classroom_id'}
+OWNER_MODELS = {'teacher': Teacher, 'classroom': ClassRoom}
+FEED_SALT = 'school.weekly.feed'
+
+
+def period_minutes():
+    return getattr(settings, 'TIMETABLE_PERIOD_MINUTES', 45)
+
+
+class Week:
+    """The lessons of one teacher or classroom, with the validators for conditional requests."""
+    def __init__(self, kind, owner_id, title, lessons, version):
+        self.kind = kind
+        self.owner_id = owner_id
+        self.title = title  # None when the teacher or classroom does not exist
+        self.lessons = lessons  # dicts; plain data so the week pickles small
+        self.last_modified = timezone.now().replace(microsecond=0)
+        self.etag = '"{}"'.format(hashlib.blake2b(f'{kind}:{owner_id}:{version}'.encode(), digest_size=12).hexdigest())
+
+    @classmethod
+    def build(cls, kind, owner_id, version):
+        owner = OWNER_MODELS[kind].objects.filter(pk=owner_id).first()
+        if owner is None:
+            return cls(kind, owner_id, None, [], version)
+        rows = (
+            Timetable.objects.filter(**{OWNER_FIELDS[kind]: owner_id})
+            .select_related('subject', 'teacher', 'classroom')
+            .order_by('day_of_week', 'period_time')  # The order of the unique indexes; grid() lays them out
+        )
+        lessons = [
+            {
+                'id': row.pk,
+                'day': row.day_of_week,
+                'time': row.period_time,
+                'subject': row.subject.name,
+                'subject_code': row.subject.code,
+                'teacher': row.teacher.name,
+                'teacher_id': row.teacher_id,
+                'classroom': str(row.classroom),
+                'classroom_id': row.classroom_id,
+            }
+            for row in rows
+        ]
+        return cls(kind, owner_id, str(owner), lessons, version)
+
+    def grid(self):
+        """[(period start, [lesson or None for each day])], covering every period with a lesson."""
+        day_names = days()
+        times = sorted(set(period_times()) | {lesson['time'] for lesson in self.lessons})
+        cells = {(lesson['day'], lesson['time']): lesson for lesson in self.lessons}
+        return [(period, [cells.get((day, period)) for day in day_names]) for period in times]
+
+
+def get_week(kind, owner_id):
+    """The cached Week of a teacher or classroom, built on first use after any change."""
+    version = '.'.join(map(str, fragments.versions(DEPENDS)))
+    key = f'school:week:{kind}:{owner_id}:{version}'
+    week = cache.get(key)
+    if week is None:
+        week = Week.build(kind, owner_id, version)
+        cache.set(key, week, fragments.fragment_timeout())
+    return week
+
+
+# --- Calendar feeds ---
+def feed_token(kind, owner_id):
+    return signing.Signer(salt=FEED_SALT).sign(f'{kind}.{owner_id}')
+
+
+def read_feed_token(token):
+    """Returns (kind, owner_id), or None for a forged or malformed token."""
+    try:
+        kind, owner_id = signing.Signer(salt=FEED_SALT).unsign(token).split('.')
+        return (kind, int(owner_id)) if kind in OWNER_FIELDS else None
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def _escape(text):
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Splits content lines longer than 75 octets, as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # Never split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode())
+        start = end
+    return '\r\n '.join(parts)
+
+
+def to_ics(week):
+    """The week as an iCalendar document of events repeating weekly from the week it was built."""
+    local = timezone.localtime(week.last_modified)
+    monday = local.date() - timedelta(days=local.weekday())
+    offsets = {day: index for index, day in enumerate(days())}
+    stamp = week.last_modified.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//School Management System//Timetable//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(week.title)} timetable',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ]
+    for lesson in week.lessons:
+        if lesson['day'] not in offsets:
+            continue
+        start = datetime.combine(monday + timedelta(days=offsets[lesson['day']]), lesson['time'])
+        other = lesson['classroom'] if week.kind == 'teacher' else lesson['teacher']
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:timetable-{lesson['id']}@school",
+            f'DTSTAMP:{stamp}',
+            f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",  # Floating: the school's local time
+            f'DURATION:PT{period_minutes()}M',
+            'RRULE:FREQ=WEEKLY',
+            f"SUMMARY:{_escape(lesson['subject'])} ({_escape(other)})",
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
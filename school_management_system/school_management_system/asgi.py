@@ -2,6 +2,9 @@
 ASGI config for school_management_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the site through it (e.g. ``uvicorn school_management_system.asgi:application``)
+so the admin dashboard's event stream, an async view, holds no worker thread
+per open dashboard.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -29,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'school.middleware.MetricsMiddleware',  # First, so it times the whole stack
+    'school.middleware.ReplicaMiddleware',  # Before sessions, so saving a session pins to the primary
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +81,65 @@ else:
         }
     }
 
+# Read replicas
+# DATABASE_REPLICAS lists replica databases, comma-separated: SQLite file paths, or
+# PostgreSQL hosts sharing the primary's credentials. Views marked read-only read from
+# them (see school/replicas.py); after a write, a browser reads from the primary for
+# REPLICA_PIN_SECONDS, which should exceed the replicas' usual lag.
+REPLICA_DATABASES = []
+for number, location in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    replica = dict(DATABASES['default'])
+    replica['HOST' if replica['ENGINE'].endswith('postgresql') else 'NAME'] = location.strip()
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{number}'] = replica
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['school.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
+# Cache
+# Counters and other cached read models are shared across workers only when
+# a shared backend is configured; local memory is fine for a single process.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cached list-table fragments; writes invalidate them through version counters,
+# so the timeout only bounds how long unused fragments occupy the cache.
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Start times of the daily periods that generated timetables fill, Monday to Friday.
+TIMETABLE_PERIODS = ['08:00', '08:50', '09:40', '10:45', '11:35', '13:30', '14:20', '15:10']
+TIMETABLE_PERIOD_MINUTES = 45
+
+# Dashboard notice widget: how many notices it shows and how often it polls for new ones.
+NOTICE_FEED_SIZE = 20
+NOTICE_POLL_SECONDS = 60
+
+# Admin dashboard event stream (served through ASGI): how often a stream checks the
+# shared cache for changes made by other processes, how often it sends a keep-alive
+# comment, and how long a stream lives before the browser reconnects.
+DASHBOARD_EVENTS_CHECK_SECONDS = 5
+DASHBOARD_EVENTS_HEARTBEAT_SECONDS = 20
+DASHBOARD_EVENTS_MAX_SECONDS = 10 * 60
+
+# Metrics
+# Requests that repeat one SQL shape this many times are flagged as likely N+1;
+# each worker publishes its totals to the cache at most every METRICS_FLUSH_INTERVAL seconds.
+# Set METRICS_TOKEN to let a Prometheus scraper read /metrics with a bearer token.
+METRICS_NPLUSONE_THRESHOLD = int(os.getenv('METRICS_NPLUSONE_THRESHOLD', '10'))
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},